@@ -1,7 +1,7 @@
 import os
-from flask import Flask
+import atexit
+from flask import Flask, jsonify
 from flask_cors import CORS
-from dotenv import load_dotenv
 from app.routes.auth_routes import auth_bp 
 from app.routes.schedule_routes import schedule_bp
 from app.routes.collections_routes import collections_bp
@@ -12,17 +12,43 @@ from app.routes.password_routes import reset_password_bp
 from app.routes.pm_routes import rm_bp
 from app.routes.notifications_routes import notifications_bp
 from app.routes.wallet_routes import wallet_bp
+from app.routes.slot_routes import slots_bp
 # from app.routes.register_routes import register_bpcd
 from app.firebase_setup import init_firebase
-
-load_dotenv()
+from app.models.db import close_pools, get_connection, init_unit_of_work
+from app.models.schema import bootstrap_schema
+from app.models.instrumentation import init_instrumentation
+from app.models.resilience import DatabaseUnavailable
+from app.config import init_settings, watch_settings
+from app.ratelimit import init_rate_limits
+from app.json_provider import FastJSONProvider
 
 def create_app():
     app = Flask(__name__) 
+    app.json = FastJSONProvider(app)
     app.config.from_object('app.config.Config')
     CORS(app)
 
+    # Validated once here; the request path only reads the cached Settings.
+    settings = init_settings()
+    watch_settings()
+
+    if settings.db_backend == "sqlite":
+        with get_connection() as cnxn:
+            bootstrap_schema(cnxn)
+
     init_firebase()
+    # Registered first so throttled requests are shed before any other work.
+    init_rate_limits(app)
+    init_instrumentation(app)
+    init_unit_of_work(app)
+    atexit.register(close_pools)
+
+    @app.errorhandler(DatabaseUnavailable)
+    def database_unavailable(e):
+        response = jsonify({"success": False, "message": str(e)})
+        response.headers["Retry-After"] = str(e.retry_after)
+        return response, 503
 
     app.register_blueprint(auth_bp, url_prefix="/api")
     # app.register_blueprint(user_bp, url_prefix='/api') 
@@ -35,6 +61,7 @@ def create_app():
     app.register_blueprint(rm_bp, url_prefix='/api')
     app.register_blueprint(notifications_bp, url_prefix='/api')
     app.register_blueprint(wallet_bp, url_prefix='/api')
+    app.register_blueprint(slots_bp, url_prefix='/api')
     # app.register_blueprint(register_bp, url_prefix='/api')
     
     return app
\ No newline at end of file
@@ -1,5 +1,244 @@
+import importlib.util
 import os
+import sys
+import signal
+import threading
+import time
+from dataclasses import dataclass, fields
+from dotenv import dotenv_values
 
 class Config:
     DEBUG = True
-    SECRET_KEY = os.environ.get("SECRET_KEY", "dev_key")
\ No newline at end of file
+    SECRET_KEY = os.environ.get("SECRET_KEY", "dev_key")
+
+
+class SettingsError(ValueError):
+    pass
+
+
+@dataclass(frozen=True)
+class Settings:
+    db_backend: str = "mssql"
+    sqlite_path: str = "greengo.db"
+    db_driver: str = None
+    db_server: str = None
+    db_name: str = None
+    db_user: str = None
+    db_password: str = None
+    db_pool_size: int = 10
+    db_pool_timeout: float = 5.0
+    db_pool_max_lifetime: float = 1800.0
+    db_pool_ping_after: float = 30.0
+    db_connect_timeout: int = 5
+    db_retry_attempts: int = 2
+    db_retry_base_delay: float = 0.05
+    db_retry_max_delay: float = 1.0
+    db_breaker_threshold: int = 5
+    db_breaker_reset: float = 10.0
+    db_replica_servers: str = None
+    db_replica_sticky_seconds: float = 5.0
+    db_replica_cooldown: float = 30.0
+
+    # /db-stats and the pool/replica details of /db-check are only served to
+    # requests sending this value in X-Diagnostics-Token; unset, they are off.
+    diagnostics_token: str = None
+
+    slow_query_ms: float = 200.0
+    query_budget: int = 10
+    n_plus_one_threshold: int = 5
+
+    async_io_workers: int = 16
+    stream_batch_size: int = 500
+
+    token_cache_size: int = 10000
+    token_cache_max_ttl: float = 300.0
+    user_id_cache_size: int = 50000
+    user_id_cache_ttl: float = 3600.0
+    qr_cache_size: int = 256
+
+    collection_time_slots: str = "08:00 - 10:00,10:00 - 12:00,13:00 - 15:00,15:00 - 17:00,17:00 - 19:00"
+    slot_capacity: int = 20
+    max_availability_days: int = 31
+    max_bulk_collections: int = 100
+
+    pricing_refresh_seconds: float = 60.0
+    reprice_batch_size: int = 500
+
+    idempotency_max_keys: int = 10000
+    idempotency_ttl: float = 86400.0
+    idempotency_wait_seconds: float = 30.0
+
+    rate_limits: str = None
+    rate_limit_backend: str = "memory"
+    rate_limit_redis_url: str = None
+    rate_limit_max_keys: int = 100000
+
+    firebase_credentials: str = None
+
+    smtp_server: str = "smtp.gmail.com"
+    smtp_port: int = 587
+    # Credentials only ever come from the environment or .env.
+    smtp_user: str = ""
+    smtp_password: str = ""
+
+    settings_watch_interval: float = 0.0
+
+    @property
+    def db_connection_string(self):
+        if self.db_backend == "sqlite":
+            return self.sqlite_path
+        if not all([self.db_server, self.db_name, self.db_user, self.db_password, self.db_driver]):
+            return None
+        return (
+            f"DRIVER={self.db_driver};SERVER={self.db_server};DATABASE={self.db_name};"
+            f"UID={self.db_user};PWD={self.db_password}"
+        )
+
+    @property
+    def db_replica_connection_strings(self):
+        # Replicas share the primary's driver, database and credentials.
+        if self.db_backend == "sqlite" or not self.db_replica_servers or not self.db_connection_string:
+            return []
+        return [
+            f"DRIVER={self.db_driver};SERVER={server.strip()};DATABASE={self.db_name};"
+            f"UID={self.db_user};PWD={self.db_password}"
+            for server in self.db_replica_servers.split(",") if server.strip()
+        ]
+
+    @property
+    def time_slots(self):
+        return tuple(s.strip() for s in (self.collection_time_slots or "").split(",") if s.strip())
+
+    def validate(self):
+        errors = []
+
+        if self.db_backend not in ("mssql", "sqlite"):
+            errors.append(f"DB_BACKEND must be 'mssql' or 'sqlite', got {self.db_backend!r}.")
+        if not self.db_connection_string:
+            errors.append("Missing one or more database environment variables.")
+        if not self.firebase_credentials:
+            errors.append("FIREBASE_CREDENTIALS is not set.")
+        elif not os.path.isfile(self.firebase_credentials):
+            errors.append(f"FIREBASE_CREDENTIALS file not found: {self.firebase_credentials}")
+        if not self.smtp_server or not self.smtp_user or not self.smtp_password:
+            errors.append("SMTP_SERVER, SMTP_USER and SMTP_PASSWORD must be set.")
+        if self.db_pool_size < 1:
+            errors.append("DB_POOL_SIZE must be at least 1.")
+        if self.stream_batch_size < 1:
+            errors.append("STREAM_BATCH_SIZE must be at least 1.")
+        if not self.time_slots:
+            errors.append("COLLECTION_TIME_SLOTS must list at least one slot.")
+        if self.slot_capacity < 0:
+            errors.append("SLOT_CAPACITY cannot be negative.")
+        if self.max_bulk_collections < 1:
+            errors.append("MAX_BULK_COLLECTIONS must be at least 1.")
+        if self.reprice_batch_size < 1:
+            errors.append("REPRICE_BATCH_SIZE must be at least 1.")
+        if self.idempotency_max_keys < 1:
+            errors.append("IDEMPOTENCY_MAX_KEYS must be at least 1.")
+        if self.rate_limit_backend not in ("memory", "redis"):
+            errors.append(f"RATE_LIMIT_BACKEND must be 'memory' or 'redis', got {self.rate_limit_backend!r}.")
+        elif self.rate_limit_backend == "redis":
+            if not self.rate_limit_redis_url:
+                errors.append("RATE_LIMIT_REDIS_URL is required when RATE_LIMIT_BACKEND is 'redis'.")
+            if importlib.util.find_spec("redis") is None:
+                errors.append("RATE_LIMIT_BACKEND=redis needs the redis package installed.")
+        try:
+            from app.ratelimit import effective_limits
+            effective_limits(self.rate_limits)
+        except SettingsError as e:
+            errors.append(str(e))
+
+        if errors:
+            raise SettingsError(" ".join(errors))
+        return self
+
+
+def settings_path():
+    return os.getenv("ENV_FILE") or os.path.join(os.getcwd(), '.env')
+
+def load_settings(path=None):
+    path = path or settings_path()
+
+    # Same precedence as load_dotenv(): real environment variables win over .env.
+    values = {**dotenv_values(path), **os.environ} if os.path.isfile(path) else dict(os.environ)
+
+    kwargs = {}
+    for field in fields(Settings):
+        raw = values.get(field.name.upper())
+        if raw in (None, ""):
+            continue
+        try:
+            kwargs[field.name] = field.type(raw) if field.type in (int, float) else raw
+        except ValueError:
+            raise SettingsError(f"{field.name.upper()} must be a {field.type.__name__}, got {raw!r}.")
+
+    return Settings(**kwargs)
+
+
+_settings = None
+_settings_lock = threading.Lock()
+_reload_callbacks = []
+
+def get_settings():
+    # Built once; only init_settings()/reload_settings() touch the filesystem.
+    global _settings
+    if _settings is None:
+        with _settings_lock:
+            if _settings is None:
+                _settings = load_settings()
+    return _settings
+
+def init_settings():
+    global _settings
+    with _settings_lock:
+        _settings = load_settings().validate()
+    return _settings
+
+def reload_settings():
+    global _settings
+    try:
+        new = load_settings().validate()
+    except SettingsError as e:
+        print(f"Settings reload rejected, keeping current settings: {e}", file=sys.stderr)
+        return False
+
+    with _settings_lock:
+        old, _settings = _settings, new
+
+    if old != new:
+        for callback in list(_reload_callbacks):
+            callback(old, new)
+    return True
+
+def on_settings_reload(callback):
+    _reload_callbacks.append(callback)
+    return callback
+
+def watch_settings(interval=None):
+    if hasattr(signal, "SIGHUP") and threading.current_thread() is threading.main_thread():
+        signal.signal(signal.SIGHUP, lambda signum, frame: reload_settings())
+
+    interval = get_settings().settings_watch_interval if interval is None else interval
+    if interval <= 0:
+        return None
+
+    def poll():
+        path = settings_path()
+        last = _mtime(path)
+        while True:
+            time.sleep(interval)
+            current = _mtime(path)
+            if current != last:
+                last = current
+                reload_settings()
+
+    thread = threading.Thread(target=poll, name="settings-watcher", daemon=True)
+    thread.start()
+    return thread
+
+def _mtime(path):
+    try:
+        return os.stat(path).st_mtime
+    except OSError:
+        return None
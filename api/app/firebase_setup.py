@@ -1,11 +1,11 @@
 import firebase_admin
-import os
 from firebase_admin import credentials
+from app.config import get_settings
 
 def init_firebase():
     # Only initialize once
     if not firebase_admin._apps:
-        cred_path = os.getenv("FIREBASE_CREDENTIALS")
+        cred_path = get_settings().firebase_credentials
         cred = credentials.Certificate(cred_path) 
         firebase_admin.initialize_app(cred)
             
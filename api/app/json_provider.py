@@ -0,0 +1,79 @@
+import datetime
+from decimal import Decimal
+from flask.json.provider import DefaultJSONProvider
+from werkzeug.http import http_date
+
+try:
+    import orjson
+except ImportError:  # optional; the stdlib encoder below gives the same output
+    orjson = None
+
+# Response bodies are mostly rows full of Decimal amounts and DATETIME
+# columns. Flask's default provider renders those through a Python default()
+# hook one value at a time. This one serializes them with orjson when it is
+# installed, and emits:
+#
+#   Decimal         plain decimal string, "12.50" (never "1.25E+1", never a float)
+#   datetime, date  HTTP dates, as Flask always has; naive values are UTC
+#                   ("Wed, 01 Jan 2025 12:00:00 GMT"). Clients (the wallet
+#                   page among them) show these strings as they come.
+#   time            ISO 8601 ("09:30:00")
+#   records, Rows   objects in column order
+#   namedtuples     arrays, as the stdlib encoder writes any tuple subclass
+#                   (the SQLite backend's raw rows are namedtuples)
+#
+# Keys keep their insertion (column) order rather than being sorted, which is
+# deterministic and lets both encoders agree byte for byte.
+
+if orjson is not None:
+    # Dates go through _default() so both encoders keep the HTTP date format.
+    _OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+
+
+def _default(o):
+    if isinstance(o, Decimal):
+        return format(o, "f")
+    if isinstance(o, datetime.date):
+        return http_date(o)
+    if isinstance(o, datetime.time):
+        return o.isoformat()
+    if isinstance(o, tuple):
+        # orjson only handles exact tuples itself; json already writes
+        # subclasses as arrays and never gets here with one.
+        return list(o)
+    if hasattr(o, "_asdict"):
+        return o._asdict()
+    if hasattr(o, "cursor_description"):
+        # pyodbc.Row
+        return {col[0]: value for col, value in zip(o.cursor_description, o)}
+    return DefaultJSONProvider.default(o)
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    default = staticmethod(_default)
+    sort_keys = False
+    ensure_ascii = False
+
+    def dumps(self, obj, **kwargs):
+        if orjson is not None and not kwargs:
+            return orjson.dumps(obj, default=_default, option=_OPTIONS).decode()
+        if not kwargs:
+            kwargs["separators"] = (",", ":")
+        return super().dumps(obj, **kwargs)
+
+    def loads(self, s, **kwargs):
+        if orjson is None or kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        if orjson is None:
+            return super().response(*args, **kwargs)
+
+        obj = self._prepare_response_obj(args, kwargs)
+        option = _OPTIONS
+        if (self.compact is None and self._app.debug) or self.compact is False:
+            option |= orjson.OPT_INDENT_2
+        # Trailing newline, as Flask's own response() adds.
+        body = orjson.dumps(obj, default=_default, option=option) + b"\n"
+        return self._app.response_class(body, mimetype=self.mimetype)
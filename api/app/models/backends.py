@@ -0,0 +1,208 @@
+"""Database backends.
+
+Services are written against pyodbc and SQL Server. The ``mssql`` backend is
+a pass-through; the ``sqlite`` backend wraps sqlite3 so that the same service
+code (including the T-SQL it sends) runs against a local file, which is what
+we use to run and load-test the API without a SQL Server instance.
+"""
+import re
+import sqlite3
+from collections import namedtuple
+from decimal import Decimal
+from functools import lru_cache
+
+
+class SqlServerBackend:
+    name = "mssql"
+
+    def connect(self, conn_str, timeout=None):
+        import pyodbc
+        # timeout is the login timeout, so a dead server fails fast.
+        return pyodbc.connect(conn_str, timeout=timeout) if timeout else pyodbc.connect(conn_str)
+
+
+class SqliteBackend:
+    name = "sqlite"
+
+    def connect(self, path, timeout=None):
+        return SqliteConnection(path)
+
+
+BACKENDS = {
+    SqlServerBackend.name: SqlServerBackend(),
+    SqliteBackend.name: SqliteBackend(),
+}
+
+def get_backend(name):
+    try:
+        return BACKENDS[name]
+    except KeyError:
+        raise ValueError(f"Unknown DB_BACKEND {name!r}; expected one of {', '.join(BACKENDS)}.")
+
+
+# T-SQL -> SQLite. Only the constructs the services actually use are covered.
+_TOP = re.compile(r"\bSELECT\s+TOP\s+\(?(\d+)\)?\s", re.IGNORECASE)
+_OUTPUT = re.compile(r"\bOUTPUT\s+(INSERTED\.\w+(?:\s*,\s*INSERTED\.\w+)*)\s*", re.IGNORECASE)
+_OFFSET_FETCH = re.compile(
+    r"\bOFFSET\s+(\d+)\s+ROWS\s+FETCH\s+(?:NEXT|FIRST)\s+(\?|\d+)\s+ROWS\s+ONLY\b", re.IGNORECASE
+)
+_CONCAT_CAST = re.compile(r"\+\s*CAST\((\w+)\s+AS\s+N?VARCHAR(?:\(\w+\))?\)", re.IGNORECASE)
+# SQLite serializes writers, so locking hints have nothing to do.
+_TABLE_HINTS = re.compile(r"\s+WITH\s*\(\s*(?:UPDLOCK|HOLDLOCK|ROWLOCK)(?:\s*,\s*(?:UPDLOCK|HOLDLOCK|ROWLOCK))*\s*\)", re.IGNORECASE)
+
+@lru_cache(maxsize=512)
+def translate_tsql(sql):
+    sql = re.sub(r"\bGETDATE\(\)", "CURRENT_TIMESTAMP", sql, flags=re.IGNORECASE)
+    sql = re.sub(r"\bSCOPE_IDENTITY\(\)", "last_insert_rowid()", sql, flags=re.IGNORECASE)
+    sql = _CONCAT_CAST.sub(r"|| CAST(\1 AS TEXT)", sql)
+    sql = _OFFSET_FETCH.sub(r"LIMIT \2 OFFSET \1", sql)
+    sql = _TABLE_HINTS.sub("", sql)
+
+    suffix = []
+
+    top = _TOP.search(sql)
+    if top:
+        sql = sql[:top.start()] + "SELECT " + sql[top.end():]
+        suffix.append(f"LIMIT {top.group(1)}")
+
+    output = _OUTPUT.search(sql)
+    if output:
+        columns = re.sub(r"INSERTED\.", "", output.group(1), flags=re.IGNORECASE)
+        sql = sql[:output.start()] + sql[output.end():]
+        suffix.append(f"RETURNING {columns}")
+
+    if suffix:
+        sql = sql.rstrip().rstrip(";") + "\n" + " ".join(suffix)
+    return sql
+
+
+sqlite3.register_adapter(Decimal, float)
+
+def _sqlstate(error):
+    if isinstance(error, sqlite3.IntegrityError):
+        return "23000"
+    if isinstance(error, sqlite3.OperationalError):
+        return "42000"
+    return "HY000"
+
+def _as_driver_error(error):
+    # Services catch pyodbc.Error; surface sqlite failures the same way.
+    try:
+        import pyodbc
+    except ImportError:
+        return error
+    return pyodbc.Error(_sqlstate(error), str(error))
+
+@lru_cache(maxsize=256)
+def _row_type(columns):
+    return namedtuple("Row", columns, rename=True)
+
+def _row_factory(cursor, row):
+    return _row_type(tuple(col[0] for col in cursor.description))._make(row)
+
+
+class SqliteConnection:
+    """sqlite3 connection exposing the slice of the pyodbc API services use."""
+
+    def __init__(self, path):
+        self._cnxn = sqlite3.connect(
+            path, timeout=30, check_same_thread=False, uri=path.startswith("file:")
+        )
+        self._cnxn.row_factory = _row_factory
+        self._cnxn.execute("PRAGMA foreign_keys = ON")
+        if not path.startswith(":memory:"):
+            self._cnxn.execute("PRAGMA journal_mode = WAL")
+
+    def cursor(self):
+        return SqliteCursor(self, self._cnxn.cursor())
+
+    def execute(self, sql, *params):
+        return self.cursor().execute(sql, *params)
+
+    def executescript(self, script):
+        self._cnxn.executescript(script)
+
+    def commit(self):
+        self._cnxn.commit()
+
+    def rollback(self):
+        self._cnxn.rollback()
+
+    def close(self):
+        self._cnxn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.commit()
+        else:
+            self.rollback()
+        return False
+
+
+class SqliteCursor:
+    fast_executemany = False
+
+    def __init__(self, connection, cursor):
+        self.connection = connection
+        self._cursor = cursor
+
+    @staticmethod
+    def _params(params):
+        # pyodbc accepts execute(sql, a, b), execute(sql, (a, b)) and execute(sql, a).
+        if len(params) == 1 and isinstance(params[0], (list, tuple)):
+            return tuple(params[0])
+        return params
+
+    def execute(self, sql, *params):
+        try:
+            self._cursor.execute(translate_tsql(sql), self._params(params))
+        except sqlite3.Error as e:
+            raise _as_driver_error(e) from e
+        return self
+
+    def executemany(self, sql, seq_of_params):
+        try:
+            self._cursor.executemany(translate_tsql(sql), [tuple(p) for p in seq_of_params])
+        except sqlite3.Error as e:
+            raise _as_driver_error(e) from e
+
+    def fetchone(self):
+        return self._cursor.fetchone()
+
+    def fetchmany(self, size=None):
+        return self._cursor.fetchmany(size or self._cursor.arraysize)
+
+    def fetchall(self):
+        return self._cursor.fetchall()
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    def commit(self):
+        self.connection.commit()
+
+    def rollback(self):
+        self.connection.rollback()
+
+    def close(self):
+        self._cursor.close()
+
+    # pyodbc cursors commit on a clean exit from a ``with`` block.
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.connection.commit()
+        return False
@@ -1,23 +1,672 @@
-from dotenv import load_dotenv
 import sys
-import os
+import time
+import threading
+from collections import deque
+import pyodbc
+from flask import g, has_request_context
+from app.config import get_settings, on_settings_reload
+from app.models.backends import get_backend
+from app.models.router import ReplicaRouter
+from app.models.instrumentation import InstrumentedCursor, record_connect
+from app.models.resilience import (
+    CircuitBreaker, DatabaseUnavailable, backoff_delay, is_connection_error, is_transient,
+)
 
 def get_db_connection_string():
-    try: 
-        
-        load_dotenv(dotenv_path=os.path.join(os.getcwd(), '.env')) 
+    conn_str = get_settings().db_connection_string
+    if not conn_str:
+        print("Error loading DB config: Missing one or more database environment variables.", file=sys.stderr)
+    return conn_str
 
-        server = os.getenv('DB_SERVER')
-        database = os.getenv('DB_NAME')
-        username = os.getenv('DB_USER')
-        password = os.getenv('DB_PASSWORD')
-        driver = os.getenv('DB_DRIVER')
 
-        if not all([server, database, username, password, driver]):
-            raise ValueError("Missing one or more database environment variables.")
+class PoolTimeoutError(DatabaseUnavailable):
+    """Raised when no connection could be borrowed within the pool timeout."""
 
-        return f"DRIVER={driver};SERVER={server};DATABASE={database};UID={username};PWD={password}"
 
-    except Exception as e:
-        print(f"Error loading DB config: {e}", file=sys.stderr)
+class PooledConnection:
+    """Thin proxy over a pyodbc connection borrowed from a ConnectionPool.
+
+    Behaves like a pyodbc connection, except that close() (or leaving a
+    ``with`` block) hands the connection back to the pool instead of
+    tearing down the session.
+    """
+
+    def __init__(self, pool, raw, created_at, on_commit=None, validated=False):
+        self._pool = pool
+        self._raw = raw
+        self._created_at = created_at
+        self._cursors = []
+        self._broken = False
+        # True when the pool pinged the connection before handing it out.
+        self.validated = validated
+        self.on_commit = on_commit
+        self.on_error = None
+        self.read_only = False
+
+    def cursor(self):
+        cursor = InstrumentedCursor(self._raw.cursor(), on_error=self._handle_error,
+                                    on_success=self._pool.breaker.record_success)
+        self._cursors.append(cursor)
+        return cursor
+
+    def _handle_error(self, exc, attempt):
+        """Returns a cursor to retry the statement on, or None to re-raise.
+
+        Connection and other transient errors count against the circuit
+        breaker, and surface as DatabaseUnavailable once they can't be retried.
+        """
+        if self.on_error:
+            self.on_error(exc)
+
+        if is_connection_error(exc):
+            self._broken = True
+        elif not is_transient(exc):
+            return None
+        self._pool.breaker.record_failure()
+
+        # Only reads are retried: a write may have been applied before the
+        # error surfaced.
+        settings = get_settings()
+        if not self.read_only or attempt >= settings.db_retry_attempts:
+            raise DatabaseUnavailable() from exc
+
+        time.sleep(backoff_delay(attempt, settings.db_retry_base_delay, settings.db_retry_max_delay))
+        self._pool.breaker.record_retry()
+        if self._broken:
+            self._reconnect()
+        return self._raw.cursor()
+
+    def _reconnect(self):
+        dead, self._raw = self._raw, None
+        self._pool._discard(dead, "broken")
+
+        fresh = _acquire(self._pool)
+        self._raw, self._created_at = fresh._raw, fresh._created_at
+        fresh._raw = None
+        self._broken = False
+
+    def commit(self):
+        self._raw.commit()
+        if self.on_commit:
+            self.on_commit()
+
+    def rollback(self):
+        self._raw.rollback()
+
+    def close(self):
+        if self._raw is None:
+            return
+        raw, self._raw = self._raw, None
+
+        # Drop pending result sets so the session is clean for the next borrower.
+        cursors, self._cursors = self._cursors, []
+        for cursor in cursors:
+            _close_quietly(cursor)
+
+        if self._broken:
+            self._pool._discard(raw, "broken")
+        else:
+            self._pool.release(raw, self._created_at)
+
+    @property
+    def closed(self):
+        return self._raw is None
+
+    def __getattr__(self, name):
+        raw = self.__dict__.get("_raw")
+        if raw is None:
+            raise AttributeError(name)
+        return getattr(raw, name)
+
+    # Same contract as pyodbc.Connection: commit on success, rollback on
+    # error. The connection is then returned to the pool.
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self._raw is not None:
+            try:
+                if exc_type is None:
+                    self.commit()
+                else:
+                    self._raw.rollback()
+            finally:
+                self.close()
+        return False
+
+
+class ConnectionPool:
+    """Bounded pool of pyodbc connections for a single connection string.
+
+    - at most ``max_size`` connections are open at once; borrowers wait up to
+      ``timeout`` seconds for one to be returned, then get PoolTimeoutError
+    - connections idle for more than ``ping_after`` seconds are checked with
+      ``SELECT 1`` before being handed out
+    - connections older than ``max_lifetime`` seconds are closed and replaced
+    """
+
+    def __init__(self, conn_str, max_size=10, timeout=5.0, max_lifetime=1800.0,
+                 ping_after=30.0, connect=None, breaker=None):
+        self.conn_str = conn_str
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_lifetime = max_lifetime
+        self.ping_after = ping_after
+        self._connect = connect or pyodbc.connect
+        self.breaker = breaker or CircuitBreaker()
+
+        self._idle = deque()
+        self._size = 0
+        self._closed = False
+        self._cond = threading.Condition()
+        self._stats = {
+            "created": 0,
+            "reused": 0,
+            "recycled": 0,
+            "broken": 0,
+            "waits": 0,
+            "timeouts": 0,
+            "wait_time": 0.0,
+        }
+
+    def acquire(self, validate=False):
+        """Borrow a connection; ``validate`` pings it even if it was used recently."""
+        deadline = time.monotonic() + self.timeout
+
+        while True:
+            entry = self._checkout(deadline)
+
+            if entry is None:
+                raw = self._open()
+                if validate and not self._ping(raw):
+                    self._discard(raw, "broken")
+                    raise DatabaseUnavailable("New database connection failed its check.")
+                return PooledConnection(self, raw, time.monotonic(), validated=validate)
+
+            raw, created_at, last_used = entry
+            now = time.monotonic()
+
+            if now - created_at > self.max_lifetime:
+                self._discard(raw, "recycled")
+                continue
+
+            pinged = validate or now - last_used > self.ping_after
+            if pinged and not self._ping(raw):
+                self._discard(raw, "broken")
+                continue
+
+            with self._cond:
+                self._stats["reused"] += 1
+            return PooledConnection(self, raw, created_at, validated=pinged)
+
+    def release(self, raw, created_at):
+        try:
+            # Never hand uncommitted work to the next borrower.
+            raw.rollback()
+        except Exception:
+            self._discard(raw, "broken")
+            return
+
+        if self._closed or time.monotonic() - created_at > self.max_lifetime:
+            self._discard(raw, "recycled")
+            return
+
+        with self._cond:
+            self._idle.append((raw, created_at, time.monotonic()))
+            self._cond.notify()
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            idle, self._idle = list(self._idle), deque()
+            self._size -= len(idle)
+            self._cond.notify_all()
+
+        for raw, _, _ in idle:
+            _close_quietly(raw)
+
+    def stats(self):
+        with self._cond:
+            stats = dict(self._stats)
+            stats.update({
+                "size": self._size,
+                "idle": len(self._idle),
+                "in_use": self._size - len(self._idle),
+                "max_size": self.max_size,
+            })
+        stats["wait_time"] = round(stats["wait_time"], 4)
+        stats["breaker"] = self.breaker.stats()
+        return stats
+
+    def _checkout(self, deadline):
+        """Pop an idle entry, or reserve a slot for a new connection (None)."""
+        with self._cond:
+            waited_from = None
+            try:
+                while True:
+                    if self._closed:
+                        raise PoolTimeoutError("Connection pool is closed.")
+
+                    if self._idle:
+                        # LIFO keeps the most recently used connections warm.
+                        return self._idle.pop()
+
+                    if self._size < self.max_size:
+                        self._size += 1
+                        return None
+
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._stats["timeouts"] += 1
+                        raise PoolTimeoutError(
+                            f"Timed out after {self.timeout}s waiting for a database connection."
+                        )
+
+                    if waited_from is None:
+                        waited_from = time.monotonic()
+                        self._stats["waits"] += 1
+                    self._cond.wait(remaining)
+            finally:
+                if waited_from is not None:
+                    self._stats["wait_time"] += time.monotonic() - waited_from
+
+    def _open(self):
+        try:
+            raw = self._connect(self.conn_str)
+        except Exception:
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+
+        with self._cond:
+            self._stats["created"] += 1
+        return raw
+
+    def _ping(self, raw):
+        try:
+            cursor = raw.cursor()
+            try:
+                cursor.execute("SELECT 1")
+                cursor.fetchone()
+            finally:
+                cursor.close()
+            return True
+        except Exception:
+            return False
+
+    def _discard(self, raw, reason):
+        _close_quietly(raw)
+        with self._cond:
+            self._size -= 1
+            self._stats[reason] += 1
+            self._cond.notify()
+
+
+def _close_quietly(raw):
+    try:
+        raw.close()
+    except Exception:
+        pass
+
+
+class UnitOfWork:
+    """One primary connection and transaction shared by a request's service calls.
+
+    get_connection() hands out SharedConnection views of it: commit() only
+    records that the work should be kept, close() hands the connection back to
+    the unit, and a failed statement or an exception marks the whole unit
+    rollback-only. finish() then commits or rolls back exactly once.
+
+    pyodbc connections must not be used by two threads at once, so the
+    connection is leased: while one thread holds it, concurrent callers
+    (e.g. async fan-out) get an ordinary pooled connection of their own.
+
+    Side effects that must only happen once the request's writes are durable
+    (push notifications, idempotent replays) go in after_commit(); cleanup
+    for the other outcome in after_rollback(). Exactly one of the two lists
+    runs, once, when the unit finishes.
+    """
+
+    def __init__(self):
+        self.cnxn = None
+        self.rollback_only = False
+        self._commit_requested = False
+        self._writers = set()
+        self._lease = threading.RLock()
+        self._after_commit = []
+        self._after_rollback = []
+
+    @property
+    def active(self):
+        return self.cnxn is not None
+
+    def lease(self, user_id=None):
+        if not self._lease.acquire(blocking=False):
+            return None
+        try:
+            if self.cnxn is None:
+                pool = get_pool()
+                if pool is None:
+                    raise ValueError("Database configuration error.")
+                self.cnxn = _acquire(pool)
+                self.cnxn.on_error = self._failed
+        except BaseException:
+            self._lease.release()
+            raise
+        return SharedConnection(self, user_id)
+
+    def _failed(self, exc):
+        self.rollback_only = True
+
+    def after_commit(self, callback):
+        self._after_commit.append(callback)
+
+    def after_rollback(self, callback):
+        self._after_rollback.append(callback)
+
+    def finish(self, commit=True):
+        cnxn, self.cnxn = self.cnxn, None
+        committed = False
+        # Anything not committed here is rolled back when the pool takes the
+        # connection back (or dropped with it, if the connection broke).
+        try:
+            if cnxn is not None and commit and self._commit_requested and not self.rollback_only:
+                cnxn.commit()
+                router = get_router()
+                for user_id in self._writers:
+                    router.record_write(user_id)
+            committed = commit and not self.rollback_only
+        finally:
+            if cnxn is not None:
+                cnxn.close()
+            self._run_callbacks(committed)
+
+    def _run_callbacks(self, committed):
+        callbacks = self._after_commit if committed else self._after_rollback
+        self._after_commit, self._after_rollback = [], []
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                print(f"Unit of work {'commit' if committed else 'rollback'} callback failed: {e}", file=sys.stderr)
+
+
+class SharedConnection:
+    """A unit of work's connection as seen by one service call."""
+
+    def __init__(self, unit, user_id=None):
+        self._unit = unit
+        self._user_id = user_id
+        self._leased = True
+
+    def cursor(self):
+        pooled = self._unit.cnxn
+        cursor = _UnitCursor(pooled._raw.cursor(), on_error=pooled._handle_error,
+                             on_success=pooled._pool.breaker.record_success)
+        object.__setattr__(cursor, "_unit", self._unit)
+        pooled._cursors.append(cursor)
+        return cursor
+
+    def commit(self):
+        self._unit._commit_requested = True
+        if self._user_id is not None:
+            self._unit._writers.add(self._user_id)
+
+    def rollback(self):
+        self._unit.rollback_only = True
+
+    def close(self):
+        if self._leased:
+            self._leased = False
+            self._unit._lease.release()
+
+    @property
+    def closed(self):
+        return not self._leased
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            if exc_type is None:
+                self.commit()
+            else:
+                self.rollback()
+        finally:
+            self.close()
+        return False
+
+
+class _UnitCursor(InstrumentedCursor):
+    # pyodbc cursors commit on __exit__; inside a unit of work that is deferred.
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self._unit.rollback_only = True
+        self._cursor.close()
+        return False
+
+
+def current_unit():
+    if not has_request_context():
         return None
+    return g.get("_db_unit")
+
+def after_commit(callback):
+    """Run ``callback`` once the request's writes are committed.
+
+    Dropped if the request rolls back instead. Outside a request there is no
+    deferred commit, so it runs straight away.
+    """
+    unit = current_unit()
+    if unit is None:
+        callback()
+    else:
+        unit.after_commit(callback)
+
+def init_unit_of_work(app):
+    @app.before_request
+    def _begin_unit_of_work():
+        g._db_unit = UnitOfWork()
+
+    @app.after_request
+    def _commit_unit_of_work(response):
+        unit = g.get("_db_unit")
+        if unit is not None:
+            unit.finish(commit=response.status_code < 400)
+        return response
+
+    @app.teardown_request
+    def _end_unit_of_work(exc):
+        # Only does anything when the request failed before after_request.
+        unit = g.pop("_db_unit", None)
+        if unit is not None:
+            unit.finish(commit=False)
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+def get_pool(conn_str=None):
+    conn_str = conn_str or get_db_connection_string()
+    if not conn_str:
+        return None
+
+    pool = _pools.get(conn_str)
+    if pool is not None:
+        return pool
+
+    with _pools_lock:
+        pool = _pools.get(conn_str)
+        if pool is None:
+            settings = get_settings()
+            backend = get_backend(settings.db_backend)
+            pool = ConnectionPool(
+                conn_str,
+                max_size=settings.db_pool_size,
+                timeout=settings.db_pool_timeout,
+                max_lifetime=settings.db_pool_max_lifetime,
+                ping_after=settings.db_pool_ping_after,
+                connect=lambda dsn: backend.connect(dsn, timeout=settings.db_connect_timeout),
+                breaker=CircuitBreaker(settings.db_breaker_threshold, settings.db_breaker_reset),
+            )
+            _pools[conn_str] = pool
+        return pool
+
+def get_connection(conn_str=None, read_only=False, user_id=None):
+    """Borrow a pooled connection.
+
+    read_only=True lets the replica router serve the call from a replica;
+    passing user_id on a write makes that user's reads stick to the primary
+    for a short while after the commit.
+
+    Inside a request, writes (and reads once the request has written) share
+    the request's UnitOfWork instead.
+    """
+    unit = current_unit()
+    if unit is not None and conn_str in (None, get_db_connection_string()):
+        if not read_only or unit.active:
+            shared = unit.lease(None if read_only else user_id)
+            if shared is not None:
+                return shared
+
+    if read_only:
+        router = get_router()
+        if conn_str in (None, router.primary):
+            return _acquire_read(router, user_id)
+
+    pool = get_pool(conn_str)
+    if pool is None:
+        raise ValueError("Database configuration error.")
+
+    cnxn = _acquire(pool)
+    if user_id is not None:
+        cnxn.on_commit = lambda: get_router().record_write(user_id)
+    return cnxn
+
+def get_stream_connection(user_id=None):
+    """Borrow a connection for a result that is read after the view returns.
+
+    The request's UnitOfWork is finished by then, so this is never a shared
+    connection; the caller closes it. Once the request has written, the
+    stream reads from the primary too; otherwise it reads from the server the
+    request's other reads (e.g. the ETag version) used, so it never sees
+    older data than the rest of the request.
+    """
+    unit = current_unit()
+    if unit is not None and unit.active:
+        pool = get_pool()
+        if pool is None:
+            raise ValueError("Database configuration error.")
+        cnxn = _acquire(pool)
+        cnxn.read_only = True
+        return cnxn
+    return get_connection(read_only=True, user_id=user_id)
+
+def _acquire_read(router, user_id):
+    # Within a request every read-only call goes to the server the first one
+    # used, so later reads (the rest of a fan-out, the data behind an ETag
+    # version) are never older than earlier ones. If that replica fails the
+    # request moves to the primary, which is never behind.
+    pinned = g.get("_db_read_dsn") if has_request_context() else None
+    for dsn in [pinned] if pinned else router.read_candidates(user_id):
+        if dsn == router.primary:
+            break
+        try:
+            cnxn = _acquire(get_pool(dsn))
+        except PoolTimeoutError:
+            continue
+        except Exception:
+            router.mark_down(dsn)
+            continue
+        router.record_read(dsn)
+        cnxn.read_only = True
+        _pin_reads(dsn)
+        return cnxn
+
+    pool = get_pool(router.primary)
+    if pool is None:
+        raise ValueError("Database configuration error.")
+    cnxn = _acquire(pool)
+    router.record_read(router.primary)
+    cnxn.read_only = True
+    _pin_reads(router.primary)
+    return cnxn
+
+def _pin_reads(dsn):
+    if has_request_context():
+        g._db_read_dsn = dsn
+
+def _acquire(pool):
+    # Fails fast with DatabaseUnavailable while the circuit is open. Otherwise
+    # success is only recorded after a round trip: a ping here, or a statement
+    # that ran (see PooledConnection.cursor). A half-open probe is always
+    # pinged, so an idle connection can't close the circuit unchecked.
+    pool.breaker.before_call()
+
+    start = time.perf_counter()
+    try:
+        cnxn = pool.acquire(validate=pool.breaker.state != "closed")
+    except PoolTimeoutError:
+        raise
+    except Exception as e:
+        pool.breaker.record_failure()
+        if is_connection_error(e) or is_transient(e):
+            raise DatabaseUnavailable() from e
+        raise
+    finally:
+        record_connect(time.perf_counter() - start)
+
+    if cnxn.validated:
+        pool.breaker.record_success()
+    return cnxn
+
+_router = None
+
+def get_router():
+    global _router
+    if _router is None:
+        settings = get_settings()
+        _router = ReplicaRouter(
+            settings.db_connection_string,
+            settings.db_replica_connection_strings,
+            sticky_seconds=settings.db_replica_sticky_seconds,
+            cooldown=settings.db_replica_cooldown,
+        )
+    return _router
+
+def replica_stats():
+    return get_router().stats()
+
+def pool_stats():
+    # Keyed by server/database so credentials never leak into the output.
+    return {_describe_dsn(conn_str): pool.stats() for conn_str, pool in list(_pools.items())}
+
+def close_pools():
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.close()
+
+@on_settings_reload
+def _reset_pools_on_reload(old, new):
+    global _router
+    _router = None
+
+    # Connections already borrowed finish normally and are closed on return.
+    db_fields = ("db_backend", "db_connection_string", "db_pool_size", "db_pool_timeout",
+                 "db_pool_max_lifetime", "db_pool_ping_after", "db_connect_timeout",
+                 "db_breaker_threshold", "db_breaker_reset")
+    if old is None or any(getattr(old, f) != getattr(new, f) for f in db_fields):
+        close_pools()
+
+def _describe_dsn(conn_str):
+    if "=" not in conn_str:
+        return conn_str  # SQLite file path
+    parts = dict(
+        part.split("=", 1) for part in conn_str.split(";") if "=" in part
+    )
+    parts = {key.strip().upper(): value for key, value in parts.items()}
+    return f"{parts.get('SERVER', '?')}/{parts.get('DATABASE', '?')}"
@@ -0,0 +1,222 @@
+import logging
+import re
+import threading
+import time
+from collections import Counter
+from functools import lru_cache
+from flask import g, has_request_context, request
+from app.config import get_settings
+
+logger = logging.getLogger("app.sql")
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)", re.IGNORECASE)
+_SPACE = re.compile(r"\s+")
+
+@lru_cache(maxsize=1024)
+def fingerprint(sql):
+    """Normalize a statement so executions that differ only in literals group together."""
+    sql = _STRING.sub("?", sql)
+    sql = _NUMBER.sub("?", sql)
+    sql = _IN_LIST.sub("IN (...)", sql)
+    return _SPACE.sub(" ", sql).strip()
+
+
+class RequestQueryStats:
+    def __init__(self):
+        self.queries = 0
+        self.rows = 0
+        self.db_time = 0.0
+        self.connections = 0
+        self.connect_time = 0.0
+        self.fingerprints = Counter()
+        self._lock = threading.Lock()
+
+    def record_query(self, fp, duration):
+        with self._lock:
+            self.queries += 1
+            self.db_time += duration
+            self.fingerprints[fp] += 1
+
+    def record_rows(self, count):
+        with self._lock:
+            self.rows += count
+
+    def record_connect(self, duration):
+        with self._lock:
+            self.connections += 1
+            self.connect_time += duration
+
+    def repeated(self, threshold):
+        return {fp: n for fp, n in self.fingerprints.items() if n >= threshold}
+
+
+def current_stats():
+    if not has_request_context():
+        return None
+    return g.get("_query_stats")
+
+def record_connect(duration):
+    stats = current_stats()
+    if stats is not None:
+        stats.record_connect(duration)
+
+
+class InstrumentedCursor:
+    """Cursor proxy that times statements and counts fetched rows."""
+
+    def __init__(self, cursor, on_error=None, on_success=None):
+        object.__setattr__(self, "_cursor", cursor)
+        object.__setattr__(self, "_on_error", on_error)
+        object.__setattr__(self, "_on_success", on_success)
+
+    def execute(self, sql, *params):
+        self._run("execute", sql, *params)
+        return self
+
+    def executemany(self, sql, seq_of_params):
+        self._run("executemany", sql, seq_of_params)
+
+    def _run(self, method, sql, *args):
+        # on_error(exc, attempt) may hand back a fresh cursor to retry on, or
+        # raise an error of its own in place of exc.
+        attempt = 0
+        while True:
+            try:
+                self._timed(sql, getattr(self._cursor, method), sql, *args)
+            except Exception as e:
+                retry_cursor = self._on_error(e, attempt) if self._on_error else None
+                if retry_cursor is None:
+                    raise
+                object.__setattr__(self, "_cursor", retry_cursor)
+                attempt += 1
+            else:
+                if self._on_success:
+                    self._on_success()
+                return
+
+    def _timed(self, sql, fn, *args):
+        start = time.perf_counter()
+        try:
+            fn(*args)
+        finally:
+            duration = time.perf_counter() - start
+            fp = fingerprint(sql)
+            stats = current_stats()
+            if stats is not None:
+                stats.record_query(fp, duration)
+            if duration * 1000 >= get_settings().slow_query_ms:
+                logger.warning(
+                    "slow query %.1fms rows=%s route=%s: %s",
+                    duration * 1000, self._cursor.rowcount, _route_name(), fp,
+                )
+
+    def fetchone(self):
+        row = self._cursor.fetchone()
+        if row is not None:
+            self._count(1)
+        return row
+
+    def fetchmany(self, *args):
+        rows = self._cursor.fetchmany(*args)
+        self._count(len(rows))
+        return rows
+
+    def fetchall(self):
+        rows = self._cursor.fetchall()
+        self._count(len(rows))
+        return rows
+
+    def _count(self, n):
+        stats = current_stats()
+        if stats is not None and n:
+            stats.record_rows(n)
+
+    def __iter__(self):
+        return iter(self.fetchone, None)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __setattr__(self, name, value):
+        setattr(self._cursor, name, value)
+
+    def __enter__(self):
+        self._cursor.__enter__()
+        return self
+
+    def __exit__(self, *exc):
+        return self._cursor.__exit__(*exc)
+
+
+_route_totals = {}
+_route_lock = threading.Lock()
+
+def _route_name():
+    if not has_request_context():
+        return None
+    rule = request.url_rule
+    return f"{request.method} {rule.rule if rule else request.path}"
+
+def init_instrumentation(app):
+    @app.before_request
+    def _start_query_stats():
+        g._query_stats = RequestQueryStats()
+
+    @app.after_request
+    def _finish_query_stats(response):
+        stats = g.pop("_query_stats", None)
+        if stats is None:
+            return response
+
+        settings = get_settings()
+        route = _route_name()
+        repeated = stats.repeated(settings.n_plus_one_threshold)
+        over_budget = stats.queries > settings.query_budget
+
+        if over_budget or repeated:
+            logger.warning(
+                "query budget: %s ran %d queries (budget %d) on %d connections%s",
+                route, stats.queries, settings.query_budget, stats.connections,
+                f"; possible N+1: {repeated}" if repeated else "",
+            )
+
+        with _route_lock:
+            totals = _route_totals.setdefault(route, {
+                "requests": 0, "queries": 0, "rows": 0, "db_time": 0.0,
+                "connections": 0, "connect_time": 0.0, "max_queries": 0,
+                "over_budget": 0, "n_plus_one": 0,
+            })
+            totals["requests"] += 1
+            totals["queries"] += stats.queries
+            totals["rows"] += stats.rows
+            totals["db_time"] += stats.db_time
+            totals["connections"] += stats.connections
+            totals["connect_time"] += stats.connect_time
+            totals["max_queries"] = max(totals["max_queries"], stats.queries)
+            totals["over_budget"] += over_budget
+            totals["n_plus_one"] += bool(repeated)
+
+        response.headers.add(
+            "Server-Timing",
+            f'db;dur={stats.db_time * 1000:.1f};desc="{stats.queries} queries",'
+            f' dbconn;dur={stats.connect_time * 1000:.1f};desc="{stats.connections} connections"',
+        )
+        return response
+
+def get_route_stats():
+    with _route_lock:
+        snapshot = {route: dict(totals) for route, totals in _route_totals.items()}
+
+    for totals in snapshot.values():
+        requests = totals["requests"] or 1
+        totals["avg_queries"] = round(totals["queries"] / requests, 2)
+        totals["avg_db_ms"] = round(totals["db_time"] * 1000 / requests, 2)
+        totals["db_time"] = round(totals["db_time"], 4)
+        totals["connect_time"] = round(totals["connect_time"], 4)
+    return snapshot
+
+def reset_route_stats():
+    with _route_lock:
+        _route_totals.clear()
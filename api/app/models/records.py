@@ -0,0 +1,71 @@
+import keyword
+import threading
+from dataclasses import make_dataclass
+
+
+class Record:
+    """Base for the slotted row types built by row_mapper().
+
+    Records are dataclasses, so jsonify serializes them as objects; get() and
+    item access keep them drop-in compatible with the dict rows they replace.
+    """
+    __slots__ = ()
+    _fields = ()
+
+    def get(self, key, default=None):
+        return getattr(self, key, default) if key in self._fields else default
+
+    def __getitem__(self, key):
+        if key not in self._fields:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __contains__(self, key):
+        return key in self._fields
+
+    def keys(self):
+        return self._fields
+
+    def _asdict(self):
+        return {name: getattr(self, name) for name in self._fields}
+
+
+_mappers = {}
+_mappers_lock = threading.Lock()
+
+def row_mapper(description):
+    columns = tuple(col[0] for col in description)
+
+    mapper = _mappers.get(columns)
+    if mapper is None:
+        with _mappers_lock:
+            mapper = _mappers.get(columns)
+            if mapper is None:
+                mapper = _mappers[columns] = _compile(columns)
+    return mapper
+
+def _compile(columns):
+    valid = (
+        len(set(columns)) == len(columns)
+        and all(c.isidentifier() and not keyword.iskeyword(c) and not c.startswith("_") for c in columns)
+    )
+    if not valid:
+        return lambda row: dict(zip(columns, row))
+
+    cls = make_dataclass(
+        "Row_" + "_".join(columns)[:60],
+        columns,
+        bases=(Record,),
+        namespace={"_fields": columns},
+        slots=True,
+        eq=False,
+    )
+    return lambda row: cls(*row)
+
+def fetchall_records(cursor):
+    mapper = row_mapper(cursor.description)
+    return [mapper(row) for row in cursor.fetchall()]
+
+def fetchone_record(cursor):
+    row = cursor.fetchone()
+    return row_mapper(cursor.description)(row) if row else None
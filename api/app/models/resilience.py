@@ -0,0 +1,103 @@
+import random
+import threading
+import time
+
+# SQLSTATEs worth retrying: the link dropped, the login/query timed out, or
+# the statement lost a deadlock. Anything else is a real error.
+TRANSIENT_SQLSTATES = {"08S01", "08001", "08004", "08007", "HYT00", "HYT01", "40001"}
+
+
+class DatabaseUnavailable(Exception):
+    """The database cannot take work right now; answered with a 503."""
+
+    def __init__(self, message="Database temporarily unavailable.", retry_after=1):
+        super().__init__(message)
+        self.retry_after = max(1, int(round(retry_after)))
+
+
+def sqlstate_of(exc):
+    args = getattr(exc, "args", ())
+    return args[0] if args and isinstance(args[0], str) else None
+
+def is_transient(exc):
+    return sqlstate_of(exc) in TRANSIENT_SQLSTATES
+
+def is_connection_error(exc):
+    state = sqlstate_of(exc) or ""
+    return state.startswith("08") or state == "HYT01"
+
+def backoff_delay(attempt, base_delay, max_delay):
+    # "Full jitter": spreads retries from many workers instead of syncing them.
+    return random.uniform(0, min(max_delay, base_delay * (2 ** attempt)))
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker for one database.
+
+    closed -> open after ``failure_threshold`` consecutive connection failures;
+    open -> half_open once ``reset_timeout`` has passed, letting one probe
+    through; the probe's outcome closes or re-opens the circuit.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=10.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+
+        self._lock = threading.Lock()
+        self._state = "closed"
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._stats = {"opened": 0, "rejected": 0, "failures": 0, "retries": 0}
+
+    def before_call(self):
+        if self._state == "closed":
+            return
+
+        with self._lock:
+            now = time.monotonic()
+            if self._state == "open" and now - self._opened_at >= self.reset_timeout:
+                self._state = "half_open"
+                self._probe_in_flight = False
+
+            if self._state == "half_open" and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return
+
+            if self._state != "closed":
+                self._stats["rejected"] += 1
+                raise DatabaseUnavailable(retry_after=self.reset_timeout - (now - self._opened_at))
+
+    def record_success(self):
+        if self._state == "closed" and self._failures == 0:
+            return
+        with self._lock:
+            self._state = "closed"
+            self._failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._stats["failures"] += 1
+            if self._state == "half_open" or self._failures >= self.failure_threshold:
+                if self._state != "open":
+                    self._stats["opened"] += 1
+                self._state = "open"
+                self._opened_at = time.monotonic()
+                self._probe_in_flight = False
+
+    def record_retry(self):
+        with self._lock:
+            self._stats["retries"] += 1
+
+    @property
+    def state(self):
+        return self._state
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats["state"] = self._state
+            stats["consecutive_failures"] = self._failures
+        return stats
@@ -0,0 +1,74 @@
+import threading
+import time
+
+
+class ReplicaRouter:
+    """Chooses the DSN for read-only service calls.
+
+    Reads are spread round-robin over the replicas that are currently healthy.
+    A user who committed a write in the last ``sticky_seconds`` reads from the
+    primary so they see their own change. A replica that fails to connect is
+    skipped for ``cooldown`` seconds. With no healthy replica, reads go to the
+    primary.
+    """
+
+    def __init__(self, primary, replicas, sticky_seconds=5.0, cooldown=30.0, max_tracked_writers=10000):
+        self.primary = primary
+        self.replicas = list(replicas)
+        self.sticky_seconds = sticky_seconds
+        self.cooldown = cooldown
+        self.max_tracked_writers = max_tracked_writers
+
+        self._lock = threading.Lock()
+        self._next = 0
+        self._down_until = {}
+        self._last_write = {}
+        self._stats = {"replica_reads": 0, "primary_reads": 0, "sticky_reads": 0, "replica_failures": 0}
+
+    def read_candidates(self, user_key=None):
+        """DSNs to try for a read, in order; the primary is always last."""
+        now = time.monotonic()
+
+        with self._lock:
+            if not self.replicas:
+                return [self.primary]
+
+            if user_key is not None:
+                last_write = self._last_write.get(user_key)
+                if last_write is not None and now - last_write < self.sticky_seconds:
+                    self._stats["sticky_reads"] += 1
+                    return [self.primary]
+
+            start = self._next
+            self._next = (self._next + 1) % len(self.replicas)
+
+        ordered = self.replicas[start:] + self.replicas[:start]
+        healthy = [dsn for dsn in ordered if self._down_until.get(dsn, 0) <= now]
+        return healthy + [self.primary]
+
+    def record_read(self, dsn):
+        with self._lock:
+            self._stats["primary_reads" if dsn == self.primary else "replica_reads"] += 1
+
+    def record_write(self, user_key):
+        if user_key is None or not self.replicas:
+            return
+        now = time.monotonic()
+        with self._lock:
+            if len(self._last_write) >= self.max_tracked_writers:
+                cutoff = now - self.sticky_seconds
+                self._last_write = {k: t for k, t in self._last_write.items() if t > cutoff}
+            self._last_write[user_key] = now
+
+    def mark_down(self, dsn):
+        with self._lock:
+            self._down_until[dsn] = time.monotonic() + self.cooldown
+            self._stats["replica_failures"] += 1
+
+    def stats(self):
+        now = time.monotonic()
+        with self._lock:
+            stats = dict(self._stats)
+            stats["replicas"] = len(self.replicas)
+            stats["replicas_down"] = sum(1 for dsn in self.replicas if self._down_until.get(dsn, 0) > now)
+        return stats
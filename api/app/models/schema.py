@@ -0,0 +1,213 @@
+"""Schema bootstrap for the SQLite backend.
+
+Mirrors the SQL Server tables the services use, closely enough to run the API
+and benchmark it on one machine. Usage, from the api/ directory:
+
+    DB_BACKEND=sqlite SQLITE_PATH=greengo.db python -m app.models.schema
+"""
+import sys
+
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS Users (
+    UserID INTEGER PRIMARY KEY AUTOINCREMENT,
+    firebase_uid TEXT UNIQUE,
+    name TEXT,
+    email TEXT,
+    cpf TEXT,
+    country TEXT,
+    avatar TEXT,
+    phone_number TEXT,
+    password TEXT,
+    language TEXT,
+    notifications INTEGER NOT NULL DEFAULT 1,
+    darkmode INTEGER NOT NULL DEFAULT 0,
+    twofa_enabled INTEGER NOT NULL DEFAULT 0,
+    twofa_secret TEXT,
+    deleted INTEGER NOT NULL DEFAULT 0,
+    created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS IX_Users_email ON Users (email);
+
+CREATE TABLE IF NOT EXISTS Collections (
+    ColID INTEGER PRIMARY KEY AUTOINCREMENT,
+    UserID INTEGER NOT NULL REFERENCES Users (UserID),
+    collection_date TEXT,
+    collection_time TEXT,
+    pickup_address TEXT,
+    number_items INTEGER,
+    weight REAL,
+    rates REAL,
+    amount REAL,
+    status TEXT,
+    notes TEXT,
+    reason TEXT,
+    pickup_lat REAL,
+    pickup_lng REAL
+);
+CREATE INDEX IF NOT EXISTS IX_Collections_UserID_Date ON Collections (UserID, collection_date);
+CREATE INDEX IF NOT EXISTS IX_Collections_User_Status_Date ON Collections (UserID, status, collection_date);
+CREATE INDEX IF NOT EXISTS IX_Collections_Date_Status ON Collections (collection_date, status);
+
+CREATE TABLE IF NOT EXISTS Notifications (
+    NotificationID INTEGER PRIMARY KEY AUTOINCREMENT,
+    UserID INTEGER NOT NULL REFERENCES Users (UserID),
+    title TEXT,
+    messages TEXT,
+    type TEXT,
+    isread INTEGER NOT NULL DEFAULT 0,
+    created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    read_at TEXT
+);
+CREATE INDEX IF NOT EXISTS IX_Notifications_UserID ON Notifications (UserID);
+
+CREATE TABLE IF NOT EXISTS UserTokens (
+    TokenID INTEGER PRIMARY KEY AUTOINCREMENT,
+    UserID INTEGER NOT NULL REFERENCES Users (UserID),
+    fcm_token TEXT NOT NULL,
+    created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    updated_at TEXT
+);
+CREATE INDEX IF NOT EXISTS IX_UserTokens_UserID ON UserTokens (UserID, fcm_token);
+
+CREATE TABLE IF NOT EXISTS PaymentMethod (
+    PmID INTEGER PRIMARY KEY AUTOINCREMENT,
+    UserID INTEGER NOT NULL REFERENCES Users (UserID),
+    firebase_uid TEXT,
+    type TEXT,
+    keyname TEXT,
+    label TEXT,
+    isdefault INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS IX_PaymentMethod_UserID ON PaymentMethod (UserID, firebase_uid);
+
+CREATE TABLE IF NOT EXISTS Wallet (
+    WalletID INTEGER PRIMARY KEY AUTOINCREMENT,
+    UserID INTEGER NOT NULL UNIQUE REFERENCES Users (UserID),
+    current_balance REAL NOT NULL DEFAULT 0,
+    total_income REAL NOT NULL DEFAULT 0,
+    total_expense REAL NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS TransactionType (
+    TransactionTypeID INTEGER PRIMARY KEY,
+    type_name TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS WalletTransaction (
+    TransactionID INTEGER PRIMARY KEY AUTOINCREMENT,
+    WalletID INTEGER NOT NULL REFERENCES Wallet (WalletID),
+    TransactionTypeID INTEGER REFERENCES TransactionType (TransactionTypeID),
+    reference_code TEXT,
+    amount REAL,
+    tran_status TEXT,
+    transaction_date TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS IX_WalletTransaction_WalletID ON WalletTransaction (WalletID, transaction_date);
+
+-- The default_price = 1 rows are the active tiers; see app/pricing.py.
+CREATE TABLE IF NOT EXISTS CanPricing (
+    PricingID INTEGER PRIMARY KEY AUTOINCREMENT,
+    rate_perkg REAL NOT NULL,
+    default_price INTEGER NOT NULL DEFAULT 0,
+    min_weight REAL NOT NULL DEFAULT 0
+);
+
+-- Bookings per collection slot, so capacity checks and availability never
+-- scan Collections. capacity NULL means the SLOT_CAPACITY setting.
+CREATE TABLE IF NOT EXISTS CollectionSlot (
+    slot_date TEXT NOT NULL,
+    time_slot TEXT NOT NULL,
+    capacity INTEGER,
+    booked INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (slot_date, time_slot)
+);
+
+-- Per-user change counters behind the ETags on read endpoints; kept current
+-- by the triggers below so writes from outside the API count too.
+CREATE TABLE IF NOT EXISTS UserDataVersion (
+    UserID INTEGER NOT NULL,
+    resource TEXT NOT NULL,
+    version INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (UserID, resource)
+);
+"""
+
+# (table, resource, SQL for the affected UserID given a NEW/OLD row). Each
+# write to one of these tables bumps that user's UserDataVersion counter.
+VERSIONED_TABLES = [
+    ("Collections", "collections", "{row}.UserID"),
+    ("Notifications", "notifications", "{row}.UserID"),
+    ("Wallet", "wallet", "{row}.UserID"),
+    ("WalletTransaction", "wallet", "(SELECT UserID FROM Wallet WHERE WalletID = {row}.WalletID)"),
+]
+
+_BUMP = """
+    INSERT INTO UserDataVersion (UserID, resource, version) VALUES ({user}, '{resource}', 1)
+    ON CONFLICT (UserID, resource) DO UPDATE SET version = version + 1;"""
+
+def _version_triggers():
+    triggers = []
+    for table, resource, user in VERSIONED_TABLES:
+        for event, rows in (("INSERT", ("NEW",)), ("UPDATE", ("NEW", "OLD")), ("DELETE", ("OLD",))):
+            body = "".join(_BUMP.format(user=user.format(row=row), resource=resource) for row in rows)
+            triggers.append(
+                f"CREATE TRIGGER IF NOT EXISTS TR_{table}_{event.title()}_Version AFTER {event} ON {table}\n"
+                f"BEGIN{body}\nEND;\n"
+            )
+    return "\n".join(triggers)
+
+SQLITE_SCHEMA += _version_triggers()
+
+# TransactionTypeID 1 is the payment type the wallet queries filter on. Slot
+# counters are backfilled from existing bookings the first time they are
+# created.
+SQLITE_SEED = """
+INSERT OR IGNORE INTO TransactionType (TransactionTypeID, type_name) VALUES (1, 'Payment'), (2, 'Withdrawal');
+INSERT INTO CanPricing (rate_perkg, default_price)
+SELECT 5.00, 1 WHERE NOT EXISTS (SELECT 1 FROM CanPricing WHERE default_price = 1);
+INSERT OR IGNORE INTO CollectionSlot (slot_date, time_slot, booked)
+SELECT substr(collection_date, 1, 10), collection_time, COUNT(*)
+FROM Collections
+WHERE status IN ('scheduled', 'pending') AND collection_date IS NOT NULL AND collection_time IS NOT NULL
+GROUP BY substr(collection_date, 1, 10), collection_time;
+"""
+
+# Columns added after the tables were first created; CREATE TABLE IF NOT
+# EXISTS leaves older databases without them.
+SQLITE_ADDED_COLUMNS = [
+    ("Collections", "pickup_lat", "REAL"),
+    ("Collections", "pickup_lng", "REAL"),
+    ("CanPricing", "min_weight", "REAL NOT NULL DEFAULT 0"),
+]
+
+def _add_missing_columns(cnxn):
+    for table, column, decl in SQLITE_ADDED_COLUMNS:
+        existing = {row[1] for row in cnxn.execute(f"PRAGMA table_info({table})").fetchall()}
+        if column not in existing:
+            cnxn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {decl}")
+
+def bootstrap_schema(cnxn):
+    cnxn.executescript(SQLITE_SCHEMA)
+    _add_missing_columns(cnxn)
+    cnxn.executescript(SQLITE_SEED)
+    cnxn.commit()
+
+def main():
+    from app.config import get_settings
+    from app.models.backends import get_backend
+
+    settings = get_settings()
+    if settings.db_backend != "sqlite":
+        print("Schema bootstrap only applies to DB_BACKEND=sqlite.", file=sys.stderr)
+        return 1
+
+    cnxn = get_backend("sqlite").connect(settings.sqlite_path)
+    try:
+        bootstrap_schema(cnxn)
+    finally:
+        cnxn.close()
+    print(f"SQLite schema ready at {settings.sqlite_path}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
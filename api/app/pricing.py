@@ -0,0 +1,233 @@
+"""Collection pricing.
+
+The active price list is every CanPricing row with default_price = 1; each
+row is a tier that applies from ``min_weight`` kg upwards, and a collection
+is charged the rate of the highest tier its weight reaches. Processes keep
+the list in memory and re-read it in the background every
+PRICING_REFRESH_SECONDS, so quoting and booking never wait on the database.
+
+After changing prices, bring already scheduled collections in line with:
+
+    python -m app.pricing reprice
+"""
+import argparse
+import hashlib
+import sys
+import threading
+import time
+from decimal import Decimal, ROUND_HALF_UP
+from app.config import get_settings, on_settings_reload
+from app.models.db import get_connection
+
+CANS_PER_KG = 60
+# Collections that are still to be picked up, and so may be repriced.
+REPRICE_STATUSES = ("scheduled", "pending")
+_CENT = Decimal("0.01")
+
+
+class NoPricing(ValueError):
+    pass
+
+
+class PriceList:
+    """Immutable snapshot of the active tiers; ``version`` changes with their content."""
+
+    __slots__ = ("tiers", "version", "loaded_at")
+
+    def __init__(self, tiers, loaded_at=None):
+        # (min_weight, rate) ascending by min_weight.
+        self.tiers = tuple(sorted((Decimal(str(w or 0)), Decimal(str(r))) for w, r in tiers))
+        self.version = hashlib.sha1(repr(self.tiers).encode()).hexdigest()[:12]
+        self.loaded_at = time.monotonic() if loaded_at is None else loaded_at
+
+    def rate_for(self, weight):
+        if not self.tiers:
+            raise NoPricing("No default pricing found.")
+        rate = self.tiers[0][1]
+        for min_weight, tier_rate in self.tiers:
+            if weight < min_weight:
+                break
+            rate = tier_rate
+        return rate
+
+    def quote(self, cans_count):
+        try:
+            cans = int(cans_count)
+        except (TypeError, ValueError):
+            raise ValueError("cansCount must be a whole number.")
+        if cans < 0:
+            raise ValueError("cansCount cannot be negative.")
+        weight = (Decimal(cans) / CANS_PER_KG).quantize(_CENT, ROUND_HALF_UP)
+        rate = self.rate_for(weight)
+        amount = (weight * rate).quantize(_CENT, ROUND_HALF_UP)
+        return {
+            "cansCount": cans,
+            "weight": float(weight),
+            "rate_perkg": float(rate),
+            "amount": float(amount),
+            "price_version": self.version,
+        }
+
+    def rate_case(self, column="weight"):
+        """SQL CASE (and its params) giving this list's rate for ``column``."""
+        if not self.tiers:
+            raise NoPricing("No default pricing found.")
+        if len(self.tiers) == 1:
+            # A CASE needs at least one WHEN.
+            return "?", [self.tiers[0][1]]
+        whens, params = [], []
+        for min_weight, rate in reversed(self.tiers[1:]):
+            whens.append(f"WHEN {column} >= ? THEN ?")
+            params += [min_weight, rate]
+        params.append(self.tiers[0][1])
+        return f"CASE {' '.join(whens)} ELSE ? END", params
+
+
+def load_price_list():
+    with get_connection(read_only=True) as cnxn, cnxn.cursor() as cursor:
+        cursor.execute("SELECT min_weight, rate_perkg FROM CanPricing WHERE default_price = 1")
+        return PriceList([(row[0], row[1]) for row in cursor.fetchall()])
+
+
+class PricingEngine:
+    def __init__(self, refresh_seconds=60.0):
+        self.refresh_seconds = refresh_seconds
+        self._prices = None
+        self._next_refresh = 0.0
+        self._lock = threading.Lock()
+        self._refreshes = 0
+        self._changes = 0
+        self._failures = 0
+
+    def current(self):
+        """The price list in use. Only the very first call reads the database."""
+        prices = self._prices
+        if prices is None:
+            return self.refresh()
+        if time.monotonic() >= self._next_refresh and self._lock.acquire(blocking=False):
+            self._next_refresh = time.monotonic() + self.refresh_seconds
+            threading.Thread(target=self._refresh_in_background, name="pricing-refresh", daemon=True).start()
+        return prices
+
+    def refresh(self):
+        with self._lock:
+            return self._reload()
+
+    def _refresh_in_background(self):
+        # Called with the lock held by current().
+        try:
+            self._reload()
+        except Exception as e:
+            self._failures += 1
+            print(f"Price list refresh failed, keeping version {self._prices.version}: {e}", file=sys.stderr)
+        finally:
+            self._lock.release()
+
+    def _reload(self):
+        prices = load_price_list()
+        old = self._prices
+        if old is None or old.version != prices.version:
+            self._changes += 1
+            print(f"Price list version {prices.version} ({len(prices.tiers)} tiers)", file=sys.stderr)
+        self._prices = prices
+        self._refreshes += 1
+        self._next_refresh = time.monotonic() + self.refresh_seconds
+        return prices
+
+    def stats(self):
+        prices = self._prices
+        return {
+            "version": prices.version if prices else None,
+            "tiers": len(prices.tiers) if prices else 0,
+            "age": round(time.monotonic() - prices.loaded_at, 1) if prices else None,
+            "refreshes": self._refreshes,
+            "changes": self._changes,
+            "failures": self._failures,
+        }
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+def get_pricing():
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = PricingEngine(get_settings().pricing_refresh_seconds)
+    return _engine
+
+@on_settings_reload
+def _reset_pricing_on_reload(old, new):
+    global _engine
+    if old is None or old.pricing_refresh_seconds != new.pricing_refresh_seconds:
+        _engine = None
+
+
+def reprice_collections(prices=None, batch_size=None):
+    """Recompute rates/amount of collections still to be picked up.
+
+    Works through Collections in ColID order, one short transaction per
+    batch, and only rewrites rows whose price actually changes. Safe to run
+    again; a second run updates nothing.
+    """
+    prices = prices or get_pricing().refresh()
+    batch_size = batch_size or get_settings().reprice_batch_size
+    rate, rate_params = prices.rate_case()
+    amount = f"ROUND(weight * {rate}, 2)"
+    statuses = ", ".join("?" * len(REPRICE_STATUSES))
+
+    last_id, batches, updated = 0, 0, 0
+    while True:
+        with get_connection() as cnxn, cnxn.cursor() as cursor:
+            cursor.execute(f"""
+                SELECT MAX(ColID), COUNT(*) FROM (
+                    SELECT ColID FROM Collections
+                    WHERE ColID > ? AND status IN ({statuses})
+                    ORDER BY ColID
+                    OFFSET 0 ROWS FETCH NEXT ? ROWS ONLY
+                ) AS batch
+            """, (last_id, *REPRICE_STATUSES, batch_size))
+            upper, count = cursor.fetchone()
+            if not count:
+                break
+
+            cursor.execute(f"""
+                UPDATE Collections
+                SET rates = {rate}, amount = {amount}
+                WHERE ColID > ? AND ColID <= ? AND status IN ({statuses}) AND weight IS NOT NULL
+                  AND (rates IS NULL OR amount IS NULL OR rates <> {rate} OR amount <> {amount})
+            """, (*rate_params, *rate_params, last_id, upper, *REPRICE_STATUSES,
+                  *rate_params, *rate_params))
+            updated += max(cursor.rowcount, 0)
+        batches += 1
+        last_id = upper
+
+    return {"version": prices.version, "batches": batches, "updated": updated}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("show", help="print the active price list")
+    reprice = sub.add_parser("reprice", help="reprice scheduled collections")
+    reprice.add_argument("--batch-size", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    prices = load_price_list()
+    if args.command == "show":
+        print(f"version {prices.version}")
+        for min_weight, rate in prices.tiers:
+            print(f"  from {min_weight} kg: {rate} per kg")
+        return 0
+
+    started = time.perf_counter()
+    result = reprice_collections(prices, args.batch_size)
+    print(
+        f"Repriced {result['updated']} collections to version {result['version']} "
+        f"in {result['batches']} batches, {time.perf_counter() - started:.2f}s"
+    )
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,213 @@
+import sys
+import threading
+import time
+from collections import OrderedDict
+from flask import has_request_context, jsonify, request
+from app.config import SettingsError, get_settings, on_settings_reload
+
+# Token buckets per (endpoint, scope, key). Scopes:
+#   ip        request.remote_addr
+#   email     the "email" field of the JSON body or form
+#   uid       the verified firebase uid, checked by login_required (limit_uid)
+#   form_uid  the firebase_uid a registration form names. Nobody has verified
+#             it, so it has its own buckets: a forged value can only use up
+#             registration attempts, never the real user's uid buckets.
+#
+# RATE_LIMITS overrides these per endpoint, e.g.
+#   RATE_LIMITS="auth.login=ip:20/minute,uid:10/minute;password.password="
+# (an empty list switches limiting off for that endpoint).
+DEFAULT_LIMITS = {
+    "auth.login": "ip:20/minute,uid:10/minute",
+    "auth.register": "ip:5/minute,email:3/hour,form_uid:3/hour",
+    "auth.verify_2fa": "ip:10/minute",
+    "password.password": "ip:10/hour,email:3/hour",
+    "password.new_password": "ip:10/minute",
+}
+
+SCOPES = ("ip", "email", "uid", "form_uid")
+_PERIODS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+
+
+def parse_limits(spec):
+    """"ip:20/minute,uid:10/minute" -> [("ip", 20, 60.0), ("uid", 10, 60.0)]"""
+    limits = []
+    for part in filter(None, (p.strip() for p in spec.split(","))):
+        try:
+            scope, rate = part.split(":", 1)
+            count, period = rate.split("/", 1)
+            seconds = _PERIODS[period] if period in _PERIODS else float(period)
+            count = int(count)
+        except (ValueError, KeyError):
+            raise SettingsError(f"Invalid rate limit {part!r}, expected scope:count/period.")
+        if scope not in SCOPES:
+            raise SettingsError(f"Invalid rate limit scope {scope!r}, expected one of {', '.join(SCOPES)}.")
+        if count < 1 or seconds <= 0:
+            raise SettingsError(f"Invalid rate limit {part!r}.")
+        limits.append((scope, count, float(seconds)))
+    return limits
+
+def effective_limits(overrides=None):
+    specs = dict(DEFAULT_LIMITS)
+    for entry in filter(None, (e.strip() for e in (overrides or "").split(";"))):
+        endpoint, _, spec = entry.partition("=")
+        specs[endpoint.strip()] = spec
+    return {endpoint: parse_limits(spec) for endpoint, spec in specs.items()}
+
+
+class MemoryBucketStore:
+    """In-process token buckets, LRU-bounded so spoofed keys can't grow it without limit."""
+
+    def __init__(self, max_keys=100000):
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key, capacity, period):
+        """Returns (allowed, retry_after_seconds)."""
+        rate = capacity / period
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated) * rate)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return allowed, 0.0 if allowed else (1 - tokens) / rate
+
+
+class RedisBucketStore:
+    """Token buckets shared by every worker through Redis."""
+
+    _SCRIPT = """
+    local capacity = tonumber(ARGV[1])
+    local rate = tonumber(ARGV[2])
+    local t = redis.call('TIME')
+    local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+    local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+    local tokens = tonumber(bucket[1]) or capacity
+    local ts = tonumber(bucket[2]) or now
+    tokens = math.min(capacity, tokens + (now - ts) * rate)
+    local allowed = 0
+    local retry_after = 0
+    if tokens >= 1 then
+        tokens = tokens - 1
+        allowed = 1
+    else
+        retry_after = (1 - tokens) / rate
+    end
+    redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+    redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate * 1000))
+    return {allowed, tostring(retry_after)}
+    """
+
+    def __init__(self, url, fallback):
+        import redis
+
+        self._client = redis.Redis.from_url(url, socket_timeout=0.25, socket_connect_timeout=0.25)
+        self._take = self._client.register_script(self._SCRIPT)
+        self._fallback = fallback
+
+    def take(self, key, capacity, period):
+        try:
+            allowed, retry_after = self._take(keys=[f"ratelimit:{key}"], args=[capacity, capacity / period])
+        except Exception as e:
+            # Redis being down must not take the API down with it; keep
+            # limiting per process until it is back.
+            print(f"Rate limit store unavailable, limiting locally: {e}", file=sys.stderr)
+            return self._fallback.take(key, capacity, period)
+        return bool(allowed), float(retry_after)
+
+
+class RateLimiter:
+    def __init__(self, limits, store):
+        self.limits = limits
+        self.store = store
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def check(self, endpoint, scope, key):
+        """None if the request may proceed, else the seconds until it may retry."""
+        if not key:
+            return None
+
+        limits = [(c, p) for s, c, p in self.limits.get(endpoint, ()) if s == scope]
+        if not limits:
+            return None
+
+        retry_after = None
+        for capacity, period in limits:
+            allowed, wait = self.store.take(f"{endpoint}:{scope}:{key}", capacity, period)
+            if not allowed:
+                retry_after = max(retry_after or 0, wait)
+
+        with self._lock:
+            stats = self._stats.setdefault(f"{endpoint} {scope}", {"allowed": 0, "limited": 0})
+            stats["limited" if retry_after is not None else "allowed"] += 1
+        return retry_after
+
+    def stats(self):
+        with self._lock:
+            return {endpoint: dict(stats) for endpoint, stats in self._stats.items()}
+
+
+_limiter = None
+_limiter_lock = threading.Lock()
+
+def get_limiter():
+    global _limiter
+    if _limiter is None:
+        with _limiter_lock:
+            if _limiter is None:
+                settings = get_settings()
+                store = MemoryBucketStore(settings.rate_limit_max_keys)
+                if settings.rate_limit_backend == "redis":
+                    store = RedisBucketStore(settings.rate_limit_redis_url, fallback=store)
+                _limiter = RateLimiter(effective_limits(settings.rate_limits), store)
+    return _limiter
+
+@on_settings_reload
+def _reset_limiter_on_reload(old, new):
+    global _limiter
+    fields = ("rate_limits", "rate_limit_backend", "rate_limit_redis_url", "rate_limit_max_keys")
+    if old is None or any(getattr(old, f) != getattr(new, f) for f in fields):
+        _limiter = None
+
+def too_many_requests(retry_after):
+    response = jsonify({"success": False, "message": "Too many requests, please try again later."})
+    response.headers["Retry-After"] = str(max(1, int(retry_after + 0.999)))
+    return response, 429
+
+def limit_uid(uid):
+    """Per-uid check for endpoints whose uid is only known after token verification."""
+    if not has_request_context() or request.endpoint is None:
+        return None
+    retry_after = get_limiter().check(request.endpoint, "uid", uid)
+    return too_many_requests(retry_after) if retry_after is not None else None
+
+def _request_field(name):
+    body = request.get_json(silent=True)
+    value = body.get(name) if isinstance(body, dict) else None
+    return value or request.form.get(name)
+
+def init_rate_limits(app):
+    @app.before_request
+    def _check_rate_limits():
+        limiter = get_limiter()
+        endpoint = request.endpoint
+        if endpoint not in limiter.limits:
+            return None
+
+        email = _request_field("email")
+        keys = {
+            "ip": request.remote_addr,
+            "email": email.strip().lower() if isinstance(email, str) else None,
+            "form_uid": _request_field("firebase_uid"),
+        }
+        waits = [w for w in (limiter.check(endpoint, scope, key) for scope, key in keys.items()) if w is not None]
+        if waits:
+            return too_many_requests(max(waits))
+        return None
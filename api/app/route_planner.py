@@ -0,0 +1,205 @@
+"""Offline pickup route planner.
+
+Plans one day of scheduled collections: each time slot is planned on its
+own, its stops are split into vehicle routes by bearing from the depot
+(sweep), and every route is ordered by nearest neighbour and then improved
+with 2-opt. Run from the api/ directory:
+
+    python -m app.route_planner 2025-03-10 --vehicles 6 --capacity-kg 400 --depot -23.55,-46.63
+
+Needs numpy, which the API itself does not (pip install -r
+requirements-planner.txt). Collections without pickup_lat/pickup_lng cannot
+be placed and are listed under "unlocated" for ops to route by hand.
+"""
+import argparse
+import json
+import math
+import sys
+import time
+from datetime import date, timedelta
+
+import numpy as np
+
+from app.models.db import get_connection
+
+EARTH_RADIUS_KM = 6371.0
+# Each route gets a full distance matrix, so its size is capped (4000 stops
+# is 128 MB of float64); slots that would exceed it get more routes.
+MAX_ROUTE_STOPS = 4000
+
+
+def haversine_matrix(lat1, lng1, lat2, lng2):
+    """Great-circle distances in km between every point of 1 and every point of 2."""
+    lat1, lng1, lat2, lng2 = (np.radians(np.asarray(a, dtype=float)) for a in (lat1, lng1, lat2, lng2))
+    dlat = lat2[None, :] - lat1[:, None]
+    dlng = lng2[None, :] - lng1[:, None]
+    a = np.sin(dlat / 2) ** 2 + np.cos(lat1)[:, None] * np.cos(lat2)[None, :] * np.sin(dlng / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def sweep(lat, lng, load, depot, routes, capacity=None):
+    """Split stops into ``routes`` groups of neighbouring bearings from the depot.
+
+    Cuts are placed so each group carries about the same load (capped at
+    ``capacity``). Returns a list of index arrays.
+    """
+    n = len(lat)
+    angles = np.arctan2(lat - depot[0], (lng - depot[1]) * math.cos(math.radians(depot[0])))
+    order = np.argsort(angles)
+
+    # Start the sweep after the widest empty sector so no route straddles it.
+    sorted_angles = angles[order]
+    gaps = np.diff(np.append(sorted_angles, sorted_angles[0] + 2 * math.pi))
+    order = np.roll(order, -((int(np.argmax(gaps)) + 1) % n))
+
+    balance = load[order] if load.sum() > 0 else np.ones(n)
+    cum = np.cumsum(balance)
+    cuts, pos, base = [], 0, 0.0
+    for r in range(routes - 1):
+        share = (cum[-1] - base) / (routes - r)
+        limit = base + (min(share, capacity) if capacity else share)
+        cut = min(max(int(np.searchsorted(cum, limit, side="right")), pos + 1), n - (routes - r - 1))
+        cuts.append(cut)
+        pos, base = cut, cum[cut - 1]
+    return [chunk for chunk in np.split(order, cuts) if len(chunk)]
+
+
+def nearest_neighbour(dist):
+    """Visit order over ``dist`` (node 0 is the depot) starting and ending at 0."""
+    n = len(dist)
+    visited = np.zeros(n, dtype=bool)
+    visited[0] = True
+    tour = [0]
+    current = 0
+    for _ in range(n - 1):
+        row = np.where(visited, np.inf, dist[current])
+        current = int(np.argmin(row))
+        visited[current] = True
+        tour.append(current)
+    tour.append(0)
+    return np.array(tour)
+
+
+def two_opt(tour, dist, max_seconds=1.0):
+    """Improve a closed tour in place with 2-opt moves until none helps or time is up."""
+    deadline = time.perf_counter() + max_seconds
+    n = len(tour)
+    improved = True
+    while improved:
+        improved = False
+        for i in range(1, n - 2):
+            if i % 64 == 0 and time.perf_counter() > deadline:
+                return tour
+            a, b = tour[i - 1], tour[i]
+            c, e = tour[i + 1:n - 1], tour[i + 2:n]
+            # Gain of reversing tour[i..j] for every j at once.
+            delta = dist[a, c] + dist[b, e] - dist[a, b] - dist[c, e]
+            j = int(np.argmin(delta))
+            if delta[j] < -1e-9:
+                j += i + 1
+                tour[i:j + 1] = tour[i:j + 1][::-1].copy()
+                improved = True
+    return tour
+
+
+def tour_length(tour, dist):
+    return float(dist[tour[:-1], tour[1:]].sum())
+
+
+def plan_slot(stops, depot, vehicles, capacity=None, improve_seconds=1.0):
+    """Routes for one slot. ``stops`` is a list of (ColID, lat, lng, load)."""
+    ids = np.array([s[0] for s in stops])
+    lat = np.array([s[1] for s in stops], dtype=float)
+    lng = np.array([s[2] for s in stops], dtype=float)
+    load = np.array([s[3] or 0.0 for s in stops], dtype=float)
+
+    routes = max(1, vehicles)
+    if capacity:
+        routes = max(routes, math.ceil(load.sum() / capacity))
+    routes = min(max(routes, math.ceil(len(stops) / MAX_ROUTE_STOPS)), len(stops))
+
+    plan = []
+    for members in sweep(lat, lng, load, depot, routes, capacity):
+        points_lat = np.concatenate([[depot[0]], lat[members]])
+        points_lng = np.concatenate([[depot[1]], lng[members]])
+        dist = haversine_matrix(points_lat, points_lng, points_lat, points_lng)
+        tour = nearest_neighbour(dist)
+        constructed = tour_length(tour, dist)
+        tour = two_opt(tour, dist, improve_seconds)
+        route_load = float(load[members].sum())
+        plan.append({
+            "vehicle": len(plan) + 1,
+            "stops": [int(ids[members[k - 1]]) for k in tour[1:-1]],
+            "distance_km": round(tour_length(tour, dist), 2),
+            "constructed_km": round(constructed, 2),
+            "load_kg": round(route_load, 2),
+            "over_capacity": bool(capacity and route_load > capacity),
+        })
+    return {"vehicles_needed": routes, "routes": plan}
+
+
+def plan_day(rows, vehicles, capacity=None, depot=None, improve_seconds=1.0):
+    """Plan rows of (ColID, collection_time, pickup_lat, pickup_lng, weight)."""
+    located = [r for r in rows if r[2] is not None and r[3] is not None]
+    unlocated = [int(r[0]) for r in rows if r[2] is None or r[3] is None]
+    if depot is None and located:
+        depot = (float(np.median([float(r[2]) for r in located])), float(np.median([float(r[3]) for r in located])))
+
+    by_slot = {}
+    for col_id, slot, lat, lng, weight in located:
+        by_slot.setdefault(slot, []).append((col_id, lat, lng, weight))
+
+    slots = []
+    for slot in sorted(by_slot, key=str):
+        started = time.perf_counter()
+        plan = plan_slot(by_slot[slot], depot, vehicles, capacity, improve_seconds)
+        plan.update(timeSlot=slot, stops=len(by_slot[slot]), seconds=round(time.perf_counter() - started, 3))
+        slots.append(plan)
+    return {"depot": depot, "slots": slots, "unlocated": unlocated}
+
+
+def load_stops(day):
+    with get_connection(read_only=True) as cnxn, cnxn.cursor() as cursor:
+        cursor.execute("""
+            SELECT ColID, collection_time, pickup_lat, pickup_lng, weight
+            FROM Collections
+            WHERE collection_date >= ? AND collection_date < ? AND status IN ('scheduled', 'pending')
+        """, (day.isoformat(), (day + timedelta(days=1)).isoformat()))
+        return [tuple(row) for row in cursor.fetchall()]
+
+
+def _latlng(value):
+    lat, lng = (float(v) for v in value.split(","))
+    return lat, lng
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("date", type=date.fromisoformat, help="day to plan, YYYY-MM-DD")
+    parser.add_argument("--vehicles", type=int, default=1, help="vehicles available per slot")
+    parser.add_argument("--capacity-kg", type=float, default=None, help="load limit per vehicle")
+    parser.add_argument("--depot", type=_latlng, default=None, help="lat,lng; defaults to the stops' median")
+    parser.add_argument("--improve-seconds", type=float, default=1.0, help="2-opt time budget per route")
+    parser.add_argument("--output", default=None, help="write the plan here instead of stdout")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    rows = load_stops(args.date)
+    plan = plan_day(rows, args.vehicles, args.capacity_kg, args.depot, args.improve_seconds)
+    plan["date"] = args.date.isoformat()
+
+    out = open(args.output, "w") if args.output else sys.stdout
+    try:
+        json.dump(plan, out, indent=2)
+        out.write("\n")
+    finally:
+        if args.output:
+            out.close()
+    print(
+        f"Planned {len(rows) - len(plan['unlocated'])} stops in {time.perf_counter() - started:.2f}s "
+        f"({len(plan['unlocated'])} without coordinates)",
+        file=sys.stderr,
+    )
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,21 +1,13 @@
-from flask import Blueprint, request, jsonify 
-from app.services.auth_service import get_firebase_uid
-from app.services.user_service import get_user_id_by_firebase_uid 
+from flask import Blueprint, request, jsonify, g
 from app.services.auth_service import authenticate_user, register_user, twofa_user 
+from app.services.identity_service import login_required
 
 auth_bp = Blueprint('auth', __name__)
 
 @auth_bp.route('/login', methods=['POST'])
+@login_required(load_user=True)
 def login():
-    uid, error_response, status_code = get_firebase_uid()
-    if not uid:
-        return error_response, status_code
- 
-    user_id = get_user_id_by_firebase_uid(uid)
-    if not user_id:
-        return jsonify({"success": False, "message": "User not found"}), 404
- 
-    result = authenticate_user(user_id, uid)
+    result = authenticate_user(g.user)
 
     status_code = 200 if result.get("success") else 400
     return jsonify(result), status_code 
@@ -1,50 +1,43 @@
-from flask import Blueprint, request, jsonify
-import jwt
-from app.services.collections_details_service import get_collections_details, cancel_collection_by_id
-from app.config import Config
-
-secret_key = Config.SECRET_KEY
+from flask import Blueprint, request, jsonify, g
+from app.services.identity_service import login_required
+from app.services.collections_details_service import get_collections_details, get_collections_details_batch, cancel_collection_by_id
 
 collections_details_bp = Blueprint('collections_details', __name__)
 
-def decode_token(auth_header):
-    if not auth_header or not auth_header.startswith("Bearer "):
-        print("Missing or malformed Authorization header")
-        return None
-    try: 
-        token = auth_header.split(" ")[1]
-        decoded = jwt.decode(token, secret_key, algorithms=["HS256"])
-       
-        return decoded
-    except jwt.ExpiredSignatureError:
-        print("Token expired")
-        return None
-    except jwt.InvalidTokenError:
-        print("Invalid token")
-        return None
-
 @collections_details_bp.route('/collections_details', methods=['GET'])
+@login_required
 def collections_details():
-    auth_header = request.headers.get("Authorization")
-    if not auth_header or not auth_header.startswith("Bearer "):
-        return jsonify({"success": False, "message": "Missing or invalid token"}), 401 
-
-    collection_id = int(request.args.get("id", 0))
+    collection_id = request.args.get("id", 0, type=int)
     if not collection_id:
         return jsonify({"success": False, "message": "Missing collection ID"}), 400
 
-    result = get_collections_details(collection_id)
+    result = get_collections_details(collection_id, g.user_id)
+    status_code = 200 if result.get("success") else 400
+    return jsonify(result), status_code
+
+@collections_details_bp.route('/collections_details/batch', methods=['GET', 'POST'])
+@login_required
+def collections_details_batch():
+    # GET ?ids=1,2,3 or POST {"ids": [1, 2, 3]}
+    if request.method == 'POST':
+        data = request.get_json(silent=True) or {}
+        # A JSON body that is not an object (e.g. a bare array) is a bad ids.
+        ids = (data.get("ids") or []) if isinstance(data, dict) else None
+    else:
+        ids = [i for value in request.args.getlist("ids") for i in value.split(",") if i.strip()]
+
+    if not isinstance(ids, list):
+        return jsonify({"success": False, "message": "ids must be a list"}), 400
+
+    result = get_collections_details_batch(ids, g.user_id)
     status_code = 200 if result.get("success") else 400
     return jsonify(result), status_code
 
 @collections_details_bp.route('/collections_details/cancelled', methods=['POST'])
+@login_required
 def cancel_collection():
-    auth_header = request.headers.get("Authorization")
-    if not auth_header or not auth_header.startswith("Bearer "):
-        return jsonify({"success": False, "message": "Missing or invalid token"}), 401 
-    
-    data = request.get_json() 
+    data = request.get_json()
 
-    result = cancel_collection_by_id(data)
+    result = cancel_collection_by_id(data, g.user_id)
     status_code = 200 if result.get("success") else 400
     return jsonify(result), status_code
@@ -1,20 +1,22 @@
-from flask import Blueprint, jsonify, request
-from app.services.auth_service import get_firebase_uid
-from app.services.user_service import get_user_id_by_firebase_uid  
-from app.services.collections_service import get_collections
+from flask import Blueprint, jsonify, request, g
+from app.services.async_service import run_blocking
+from app.services.identity_service import login_required
+from app.services.etag_service import conditional
+from app.services.collections_service import get_collections, DEFAULT_PAGE_SIZE
 
 collections_bp = Blueprint('collections', __name__)
 
 @collections_bp.route('/collections', methods=['GET'])
-def collections():
-    uid, error_response, status_code = get_firebase_uid()
-    if not uid:
-        return error_response, status_code
+@login_required
+@conditional("collections")
+async def collections():
+    limit = request.args.get("limit", DEFAULT_PAGE_SIZE, type=int)
+    # ?status=scheduled,pending and ?status=scheduled&status=pending both work.
+    statuses = [s.strip() for value in request.args.getlist("status") for s in value.split(",") if s.strip()]
 
-    user_id = get_user_id_by_firebase_uid(uid)
-    if not user_id:
-        return jsonify({"success": False, "message": "User not found"}), 404
-    
-    result = get_collections(user_id)
+    result = await run_blocking(
+        get_collections, g.user_id, limit, request.args.get("cursor"),
+        statuses, request.args.get("from"), request.args.get("to"), request.args.get("sort", "desc"),
+    )
     status_code = 200 if result.get("success") else 400
     return jsonify(result), status_code
@@ -1,10 +1,24 @@
-from flask import Blueprint, jsonify
-from app.services.db_service import check_db_connection
+import hmac
+from flask import Blueprint, jsonify, request
+from app.config import get_settings
+from app.services.db_service import check_db_connection, db_stats
 
 db_bp = Blueprint('db', __name__)
 
+def diagnostics_allowed():
+    # Pool, replica, cache and per-route query stats are for operators only.
+    token = get_settings().diagnostics_token
+    supplied = request.headers.get("X-Diagnostics-Token", "")
+    return bool(token) and hmac.compare_digest(supplied.encode(), token.encode())
+
 @db_bp.route('/db-check', methods=['GET'])
 def db_check():
-    result = check_db_connection()
+    result = check_db_connection(details=diagnostics_allowed())
     status = 200 if result.get("success") else 500
-    return jsonify(result), status
\ No newline at end of file
+    return jsonify(result), status
+
+@db_bp.route('/db-stats', methods=['GET'])
+def db_stats_route():
+    if not diagnostics_allowed():
+        return jsonify({"success": False, "message": "Not found."}), 404
+    return jsonify(db_stats()), 200
@@ -1,32 +1,20 @@
 import os 
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, g
 from werkzeug.utils import secure_filename
-from app.services.auth_service import get_firebase_uid
-from app.services.user_service import get_user_id_by_firebase_uid 
+from app.services.identity_service import login_required
+from app.services.etag_service import conditional, row_version
 from app.services.profile_service import get_profile, edit_profile, upload_profile, changepassword_profile, two_factor_profile, twofa_status_profile, language_profile, notif_profile, darkmode_profile
-from firebase_admin import auth
  
 
 profile_bp = Blueprint('profile', __name__)
 
 @profile_bp.route('/profile', methods=['GET'])
+@login_required(load_user=True)
+@conditional("profile", version=lambda: row_version(g.user))
 def profile():    
-    auth_header = request.headers.get("Authorization")
-    if not auth_header or not auth_header.startswith("Bearer "):
-        return jsonify({"success": False, "message": "Missing or invalid token"}), 401
-    
-    id_token = auth_header.split(" ")[1]
-
-    try:
-
-        decoded = auth.verify_id_token(id_token)
-        uid = decoded["uid"]
-        result = get_profile(uid)
-        status_code = 200 if result.get("success") else 400
-        return jsonify(result), status_code
-    
-    except Exception as e:
-        return jsonify({"success": False, "message": f"Token verification failed: {e}"}), 401
+    result = get_profile(g.user)
+    status_code = 200 if result.get("success") else 400
+    return jsonify(result), status_code
     
 @profile_bp.route('/profile/edit', methods=['POST'])
 def profile_edit():    
@@ -52,18 +40,11 @@ def profile_phone():
     return jsonify(result), status_code """
 
 @profile_bp.route('/profile/upload', methods=['POST'])
+@login_required
 def profile_upload():
-
-    auth_header = request.headers.get("Authorization")
-    if not auth_header or not auth_header.startswith("Bearer "):
-        return jsonify({"success": False, "message": "Missing or invalid token"}), 401
-    
-    id_token = auth_header.split(" ")[1]
+    uid = g.uid
 
     try:
-
-        decoded = auth.verify_id_token(id_token)
-        uid = decoded["uid"]
         avatar_file = request.files.get("avatar")
 
         basedir = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../../'))
@@ -76,12 +57,12 @@ def profile_upload():
 
         avatar_url = f"/avatars/{filename}"
  
-        result = upload_profile(uid, avatar_url)
+        result = upload_profile(uid, avatar_url, g.user_id)
 
         status_code = 200 if result.get("success") else 400
         return jsonify(result), status_code
     except Exception as e:
-        return jsonify({"success": False, "message": f"Token verification failed: {e}"}), 401 
+        return jsonify({"success": False, "message": f"Upload failed: {e}"}), 400 
     
 @profile_bp.route('/profile/changepassword', methods=['POST'])
 def profile_changepassword():    
@@ -94,13 +75,10 @@ def profile_changepassword():
     return jsonify(result), status_code
 
 @profile_bp.route('/profile/twofa', methods=['POST'])
+@login_required(load_user=True)
 def profile_2fa():
-    uid, error_response, status_code = get_firebase_uid()
-    if not uid:
-        return error_response, status_code 
-    
     data = request.get_json() 
-    result = two_factor_profile(data, uid)
+    result = two_factor_profile(data, g.user)
 
     status_code = 200 if result.get("success") else 400
     return jsonify(result), status_code
@@ -116,46 +94,29 @@ def profile_language():
     return jsonify(result), status_code
 
 @profile_bp.route('/profile/twofa/status', methods=['GET'])
+@login_required(load_user=True)
 def profile_2fa_status():
+    result = twofa_status_profile(g.user)
 
-    auth_header = request.headers.get("Authorization")
-    if not auth_header or not auth_header.startswith("Bearer "):
-        return jsonify({"success": False, "message": "Missing or invalid token"}), 401
-    
-    id_token = auth_header.split(" ")[1]
-
-    try:
-        decoded = auth.verify_id_token(id_token)
-        uid = decoded["uid"] 
-        result = twofa_status_profile(uid)
-
-        status_code = 200 if result.get("success") else 400
-        return jsonify(result), status_code
-    except Exception as e:
-        return jsonify({"success": False, "message": f"Token verification failed: {e}"}), 401
+    status_code = 200 if result.get("success") else 400
+    return jsonify(result), status_code
     
 @profile_bp.route('/profile/notifications', methods=['POST'])
+@login_required
 def profile_notifications():
-    uid, error_response, status_code = get_firebase_uid()
-    if not uid:
-        return error_response, status_code 
-    
     data = request.get_json() 
  
-    result = notif_profile(data, uid)
+    result = notif_profile(data, g.uid, g.user_id)
 
     status_code = 200 if result.get("success") else 400
     return jsonify(result), status_code
 
 @profile_bp.route('/profile/darkmode', methods=['POST'])
+@login_required
 def profile_darkmode():
-    uid, error_response, status_code = get_firebase_uid()
-    if not uid:
-        return error_response, status_code 
-    
     data = request.get_json()
  
-    result = darkmode_profile(data, uid)
+    result = darkmode_profile(data, g.uid, g.user_id)
 
     status_code = 200 if result.get("success") else 400
     return jsonify(result), status_code
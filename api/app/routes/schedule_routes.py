@@ -1,43 +1,85 @@
-from flask import Blueprint, request, jsonify 
-from app.services.auth_service import get_firebase_uid
-from app.services.user_service import get_user_id_by_firebase_uid  
-from app.services.schedule_service import schedule_collections
+from flask import Blueprint, request, jsonify, g
+from app.services.identity_service import login_required
+from app.services.idempotency_service import idempotent
+from app.services.schedule_service import schedule_collections, schedule_collections_bulk, quote_collection
 from app.services.notifications_service import create_notifications 
 from app.services.user_service import get_user_fcm_token_by_user_id 
+from app.services.async_service import get_executor
+from app.models.db import after_commit
 from firebase_admin import messaging
 from datetime import datetime
+import sys
 
 schedule_bp = Blueprint('schedule', __name__)
 
 @schedule_bp.route('/schedule', methods=['POST'])
+@login_required
+@idempotent
 def schedule():
-    uid, error_response, status_code = get_firebase_uid()
-    if not uid:
-        return error_response, status_code
-
-    user_id = get_user_id_by_firebase_uid(uid)
-    if not user_id:
-        return jsonify({"success": False, "message": "User not found"}), 404
-
+    user_id = g.user_id
     data = request.get_json() 
     result = schedule_collections(data, user_id)
+    if not result.get("success"):
+        return jsonify(result), 400
 
-    raw_date = data.get("date") 
-    formatted_date = None
-
-    if raw_date:
-        try:
-            parsed_date = datetime.fromisoformat(raw_date.replace("Z", ""))
-            formatted_date = parsed_date.strftime("%d/%m/%Y")
-        except Exception:
-            formatted_date = raw_date 
-
-    notif_data = {
+    formatted_date = display_date(data.get("date"))
+    notify(user_id, {
         "title": "Collection scheduled",
         "message": f"Your collection has been scheduled for {formatted_date or data.get('date')} between {data.get('timeSlot')}.",
         "type": "collection"
-    }
+    })
+
+    status_code = 200 if result.get("success") else 400
+    return jsonify(result), status_code
+
+@schedule_bp.route('/schedule/bulk', methods=['POST'])
+@login_required
+@idempotent
+def schedule_bulk():
+    user_id = g.user_id
+    data = request.get_json(silent=True)
+    items = data.get("collections") if isinstance(data, dict) else None
+    result = schedule_collections_bulk(items, user_id)
+    if not result.get("success"):
+        return jsonify(result), 400
+
+    # One notification for the whole batch, not one per collection.
+    booked = result["data"]
+    first, last = display_date(booked["firstDate"]), display_date(booked["lastDate"])
+    when = f"for {first}" if first == last else f"from {first} to {last}"
+    notify(user_id, {
+        "title": "Collections scheduled",
+        "message": f"{booked['count']} collections have been scheduled {when}.",
+        "type": "collection"
+    })
 
+    return jsonify(result), 200
+
+@schedule_bp.route('/schedule/quote', methods=['GET'])
+@login_required
+def schedule_quote():
+    # Priced from the in-memory price list; no database round trip.
+    cans_count = request.args.get("cansCount", type=int)
+    if cans_count is None:
+        return jsonify({"success": False, "message": "cansCount is required."}), 400
+
+    result = quote_collection(cans_count)
+    status_code = 200 if result.get("success") else 400
+    return jsonify(result), status_code
+
+def display_date(raw_date):
+    if not raw_date:
+        return None
+    try:
+        parsed_date = datetime.fromisoformat(raw_date.replace("Z", ""))
+        return parsed_date.strftime("%d/%m/%Y")
+    except Exception:
+        return raw_date
+
+def notify(user_id, notif_data):
+    # The notification row is written in the request's transaction; the push
+    # only goes out once that has committed, so a booking that rolls back
+    # never announces itself.
     notification = create_notifications(user_id, notif_data)
  
     if notification:
@@ -46,12 +88,19 @@ def schedule():
         notif_title = notification.get("result", {}).get("title", "GreenGo")
         notif_body = notification.get("result", {}).get("messages", "")
 
-        print(userfcm_token)
-        for token in userfcm_token:
-            send_push(token, notif_title, notif_body)
+        after_commit(lambda: push_all(userfcm_token, notif_title, notif_body))
 
-    status_code = 200 if result.get("success") else 400
-    return jsonify(result), status_code
+def push_all(tokens, title, body):
+    # One FCM round trip per device, sent concurrently off the request thread.
+    executor = get_executor()
+    for token in tokens:
+        executor.submit(_send_push_logged, token, title, body)
+
+def _send_push_logged(token, title, body):
+    try:
+        send_push(token, title, body)
+    except Exception as e:
+        print(f"Push to {token[:12]}... failed: {e}", file=sys.stderr)
 
 def send_push(token: str, title: str, body: str):
     message = messaging.Message(
@@ -0,0 +1,14 @@
+from flask import Blueprint, request, jsonify
+from app.services.async_service import run_blocking
+from app.services.identity_service import login_required
+from app.services.slot_service import get_availability
+
+slots_bp = Blueprint('slots', __name__)
+
+@slots_bp.route('/slots/availability', methods=['GET'])
+@login_required
+async def slots_availability():
+    # ?from=2025-03-10&to=2025-03-16; to defaults to from.
+    result = await run_blocking(get_availability, request.args.get("from"), request.args.get("to"))
+    status_code = 200 if result.get("success") else 400
+    return jsonify(result), status_code
@@ -1,59 +1,52 @@
-from flask import Blueprint, jsonify
-from app.services.auth_service import get_firebase_uid
-from app.services.user_service import get_user_id_by_firebase_uid 
+from flask import Blueprint, jsonify, g
+from app.services.async_service import run_blocking, gather
+from app.services.identity_service import login_required
+from app.services.etag_service import conditional
+from app.streaming import json_response
 from app.services.wallet_service import get_walletstatement, get_walletaccountsummary, get_wallethomedata
 
 wallet_bp = Blueprint('wallet', __name__)
 
 @wallet_bp.route('/walletstatement', methods=['GET'])
-def walletstatement_methods(): 
-    uid, error_response, status_code = get_firebase_uid()
-    if not uid:
-        return error_response, status_code
- 
-    user_id = get_user_id_by_firebase_uid(uid)
-    if not user_id:
-        return jsonify({"success": False, "message": "User not found"}), 404
-  
-    result = get_walletstatement(user_id)
+@login_required
+@conditional("wallet")
+async def walletstatement_methods(): 
+    result = await run_blocking(get_walletstatement, g.user_id)
     status_code = 200 if result.get("success") else 400
-    return jsonify(result), status_code
+    return json_response(result, status_code)
 
 @wallet_bp.route('/walletaccountsummary', methods=['GET'])
-def walletaccountsummary_methods(): 
-    uid, error_response, status_code = get_firebase_uid()
-    if not uid:
-        return error_response, status_code
- 
-    user_id = get_user_id_by_firebase_uid(uid)
-    if not user_id:
-        return jsonify({"success": False, "message": "User not found"}), 404
-  
-    result = get_walletaccountsummary(user_id)
+@login_required
+@conditional("wallet")
+async def walletaccountsummary_methods(): 
+    result = await run_blocking(get_walletaccountsummary, g.user_id)
     status_code = 200 if result.get("success") else 400
     return jsonify(result), status_code
 
 @wallet_bp.route('/wallethomedata', methods=['GET'])
-def wallethomedata_methods(): 
-    uid, error_response, status_code = get_firebase_uid()
-    if not uid:
-        return error_response, status_code
- 
-    user_id = get_user_id_by_firebase_uid(uid)
-    if not user_id:
-        return jsonify({"success": False, "message": "User not found"}), 404
-  
-    result = get_wallethomedata(user_id)
+@login_required
+@conditional("wallet")
+async def wallethomedata_methods(): 
+    result = await run_blocking(get_wallethomedata, g.user_id)
     status_code = 200 if result.get("success") else 400
     return jsonify(result), status_code
-    uid, error_response, status_code = get_firebase_uid()
-    if not uid:
-        return error_response, status_code 
-    
-    user_id = get_user_id_by_firebase_uid(uid)
-    if not user_id:
-        return jsonify({"success": False, "message": "User not found"}), 404
-     
-    result = default_pm(user_id, uid, pm_id)
-    status_code = 200 if result.get("success") else 400
-    return jsonify(result), status_code
\ No newline at end of file
+
+@wallet_bp.route('/walletoverview', methods=['GET'])
+@login_required
+@conditional("wallet")
+async def walletoverview_methods():
+    summary, homedata = await gather(
+        (get_walletaccountsummary, g.user_id),
+        (get_wallethomedata, g.user_id),
+    )
+    success = summary.get("success") and homedata.get("success")
+    result = {
+        "success": bool(success),
+        "summary": summary.get("result"),
+        "homedata": homedata.get("result"),
+    }
+    if not success:
+        result["message"] = summary.get("message") if not summary.get("success") else homedata.get("message")
+
+    status_code = 200 if success else 400
+    return jsonify(result), status_code
@@ -0,0 +1,36 @@
+import asyncio
+import contextvars
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from app.config import get_settings
+
+# pyodbc and firebase_admin only have blocking APIs, so async views await them
+# on a shared worker pool. The caller's context (Flask request, app context,
+# query stats) is copied into the worker.
+#
+# The app is served over WSGI (app.py). Flask runs each async view to
+# completion on the worker handling the request, so the gain is concurrency
+# within a request (independent lookups in gather()), not across requests.
+_executor = None
+_executor_lock = threading.Lock()
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=get_settings().async_io_workers,
+                    thread_name_prefix="async-io",
+                )
+    return _executor
+
+async def run_blocking(fn, *args, **kwargs):
+    loop = asyncio.get_running_loop()
+    ctx = contextvars.copy_context()
+    return await loop.run_in_executor(get_executor(), functools.partial(ctx.run, fn, *args, **kwargs))
+
+async def gather(*calls):
+    """Run (fn, *args) tuples concurrently and return their results in order."""
+    return await asyncio.gather(*(run_blocking(fn, *args) for fn, *args in calls))
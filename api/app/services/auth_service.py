@@ -1,66 +1,91 @@
 import pyodbc 
 import jwt
 import datetime
+import hashlib
 import os
+import threading
+import time
 import pyotp
 from werkzeug.utils import secure_filename
-from app.models.db import get_db_connection_string
-from app.config import Config 
+from app.models.db import after_commit, get_db_connection_string, get_connection
+from app.models.resilience import DatabaseUnavailable
+from app.services.user_service import remember_user_id
+from app.cache import TTLCache
+from app.config import Config, get_settings
 from firebase_admin import auth
-from flask import jsonify, request
 
 secret_key = Config.SECRET_KEY
 
-def authenticate_user(user_id: int, firebase_uid: str) -> dict:
-    conn_str = get_db_connection_string()
-    if not conn_str:
-        return {"success": False, "message": "Database configuration error."}
+# Verified Firebase ID tokens, keyed by a digest of the raw token so the
+# bearer credential itself is never kept in memory. An entry lives until the
+# token's own exp, capped at TOKEN_CACHE_MAX_TTL so a revoked or disabled
+# account is locked out within that window.
+_token_cache = None
+_token_cache_lock = threading.Lock()
+
+def get_token_cache():
+    global _token_cache
+    if _token_cache is None:
+        with _token_cache_lock:
+            if _token_cache is None:
+                _token_cache = TTLCache(maxsize=get_settings().token_cache_size)
+    return _token_cache
+
+def _token_key(id_token):
+    return hashlib.sha256(id_token.encode()).digest()
+
+def cached_id_token(id_token):
+    """Claims of an already verified token, or None."""
+    return get_token_cache().get(_token_key(id_token))
+
+def verify_id_token(id_token):
+    """auth.verify_id_token() that skips the signature check for tokens seen recently."""
+    key = _token_key(id_token)
+    cache = get_token_cache()
+
+    decoded = cache.get(key)
+    if decoded is not None:
+        return decoded
+
+    decoded = auth.verify_id_token(id_token)
+    ttl = min(decoded.get("exp", 0) - time.time(), get_settings().token_cache_max_ttl)
+    if ttl > 0:
+        cache.set(key, decoded, ttl=ttl)
+    return decoded
+
+def authenticate_user(user) -> dict:
+    """Login response for the Users row already loaded by login_required."""
+    if not user:
+        return {
+            "success": True, 
+            "message": "User not registered in system.", 
+            "result": None
+        }
 
-    try:
-        with pyodbc.connect(conn_str) as cnxn, cnxn.cursor() as cursor:  
-            query = "SELECT UserID, firebase_uid, email, twofa_enabled, twofa_secret FROM Users WHERE firebase_uid = ?"
-            cursor.execute(query, (firebase_uid,)) 
-            rows = cursor.fetchone()
-
-            if not rows:
-                return {
-                    "success": True, 
-                    "message": "User not registered in system.", 
-                    "result": None
-                }
-            
-            columns = [col[0] for col in cursor.description]
-            result = dict(zip(columns, rows))
-            
-            user_id = result["UserID"]
-            twofa_enabled = result["twofa_enabled"]
-            
-            if twofa_enabled == 1:
-                temp_token = generate_token(
-                    {"userId": user_id, "type": "2fa"}, 
-                    custom_expiry=datetime.timedelta(minutes=5)
-                )
-                return {
-                    "success": True,
-                    "message": "2FA required.",
-                    "twofa_required": True,
-                    "temp_token": temp_token
-                } 
+    if user.twofa_enabled == 1:
+        temp_token = generate_token(
+            {"userId": user.UserID, "type": "2fa"}, 
+            custom_expiry=datetime.timedelta(minutes=5)
+        )
         return {
             "success": True,
-            "message": "Authentication successful.",
-            "result" : result,
-            
-        }  
-
-    except pyodbc.Error as ex:
-        sqlstate = ex.args[0]
-        return {"success": False, "message": f"Database error: {sqlstate} - {ex.args[1]}"}
-    except Exception as e:
-        return {"success": False, "message": f"An unexpected error occurred: {e}"}
-    finally:
-        if 'cnxn' in locals() and cnxn:
-            cnxn.close()
+            "message": "2FA required.",
+            "twofa_required": True,
+            "temp_token": temp_token
+        } 
+
+    result = {
+        "UserID": user.UserID,
+        "firebase_uid": user.firebase_uid,
+        "email": user.email,
+        "twofa_enabled": user.twofa_enabled,
+        "twofa_secret": user.twofa_secret,
+    }
+    return {
+        "success": True,
+        "message": "Authentication successful.",
+        "result" : result,
+    }
 
 def generate_token(payload, remember_me=False, custom_expiry=None):
     if custom_expiry:
@@ -83,7 +108,7 @@ def register_user(data):
         return {"success": False, "message": "Database configuration error."}
 
     try:
-        cnxn = pyodbc.connect(conn_str)
+        cnxn = get_connection(conn_str)
         cursor = cnxn.cursor()
  
         firebase_uid = data.get("firebase_uid")
@@ -128,12 +153,17 @@ def register_user(data):
             )
 
         cnxn.commit()
+        # Only cache the id once the row is durable; a rolled-back insert
+        # must not leave a mapping to a UserID that doesn't exist.
+        after_commit(lambda: remember_user_id(firebase_uid, user_id))
 
         return {
             "success": True,
             "message": "User registered successfully."
         }
 
+    except DatabaseUnavailable:
+        raise
     except pyodbc.Error as ex:
         return {"success": False, "message": f"Database error: {ex}"}
     except Exception as e:
@@ -163,7 +193,7 @@ def twofa_user(data):
         email = decoded.get("email")
 
         # Connect to DB
-        cnxn = pyodbc.connect(conn_str)
+        cnxn = get_connection(conn_str)
         cursor = cnxn.cursor()
 
         # Get 2FA secret for the user
@@ -192,6 +222,8 @@ def twofa_user(data):
         return {"success": False, "message": "2FA token expired."}
     except jwt.InvalidTokenError:
         return {"success": False, "message": "Invalid token."}
+    except DatabaseUnavailable:
+        raise
     except pyodbc.Error as ex:
         return {"success": False, "message": f"Database error: {ex}"}
     except Exception as e:
@@ -199,16 +231,3 @@ def twofa_user(data):
     finally:
         if 'cnxn' in locals() and cnxn:
             cnxn.close()
-
-def get_firebase_uid(): 
-    auth_header = request.headers.get("Authorization")
-    if not auth_header or not auth_header.startswith("Bearer "):
-        return None, jsonify({"success": False, "message": "Missing or invalid token"}), 401
-
-    id_token = auth_header.split(" ")[1]
-
-    try:
-        decoded = auth.verify_id_token(id_token)
-        return decoded["uid"], None, None
-    except Exception as e:
-        return None, jsonify({"success": False, "message": f"Token verification failed: {e}"}), 401
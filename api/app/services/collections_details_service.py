@@ -1,54 +1,122 @@
 import pyodbc
-from app.models.db import get_db_connection_string
+from app.models.db import get_db_connection_string, get_connection
+from app.models.resilience import DatabaseUnavailable
+from app.models.records import fetchall_records, fetchone_record
+from app.services.slot_service import release_slot, slot_date
 
-def get_collections_details(collection_id):
+MAX_BATCH_IDS = 100
+
+DETAIL_COLUMNS = """
+    'col' + CAST(ColID AS VARCHAR) AS id, ColID, UserID, collection_date, collection_time, pickup_address,
+    number_items, weight, notes, status
+"""
+
+def _collection_detail(collection):
+    return {
+        "id": collection["id"],
+        "collection_date": collection["collection_date"],
+        "collection_time": collection["collection_time"],
+        "pickup_address": collection["pickup_address"],
+        "status": collection["status"],
+        "weight": collection["weight"],
+        "number_items": collection["number_items"],
+        "notes": collection["notes"],
+        # "Collector": {
+        #     "name": collection["CollectorName"],
+        #     "phone": collection["CollectorPhone"],
+        #     "rating": collection["CollectorRating"]
+        # } if collection["CollectorName"] else None,
+        # "PaymentStatus": collection["PaymentStatus"],
+        # "PaymentAmount": collection["PaymentAmount"],
+        # "PaymentMethod": collection["PaymentMethod"],
+        # "PaymentDate": collection["PaymentDate"],
+    }
+
+def parse_collection_id(value):
+    """Accepts 12, "12" or the "col12" ids the list endpoint returns."""
+    if isinstance(value, str):
+        value = value.strip()
+        if value.startswith("col"):
+            value = value[3:]
+    try:
+        col_id = int(value)
+    except (TypeError, ValueError):
+        return None
+    return col_id if col_id > 0 else None
+
+def get_collections_details(collection_id, user_id):
     conn_str = get_db_connection_string()
     if not conn_str:
         return {"success": False, "message": "Database configuration error."}
 
     try:
-        cnxn = pyodbc.connect(conn_str)
+        cnxn = get_connection(conn_str, read_only=True, user_id=user_id)
         cursor = cnxn.cursor() 
 
-        query = """
-        SELECT 
-            'col' + CAST(ColID AS VARCHAR) AS id, UserID, collection_date, collection_time, pickup_address,
-            number_items, weight, notes, status
+        # Someone else's collection is reported exactly like a missing one.
+        query = f"""
+        SELECT {DETAIL_COLUMNS}
         FROM Collections
-        WHERE ColID = ? 
+        WHERE ColID = ? AND UserID = ?
         """
-        cursor.execute(query, (collection_id,))
-        row = cursor.fetchone()
+        cursor.execute(query, (collection_id, user_id))
+        collection = fetchone_record(cursor)
 
-        if not row:
+        if not collection:
             return {"success": False, "message": "Collection not found."}
 
-        # Format collections into a list of dictionaries
-        columns = [column[0] for column in cursor.description]
-        collection = dict(zip(columns, row))
-
-        result = {
-            "id": collection["id"],
-            "collection_date": collection["collection_date"],
-            "collection_time": collection["collection_time"],
-            "pickup_address": collection["pickup_address"],
-            "status": collection["status"],
-            "weight": collection["weight"],
-            "number_items": collection["number_items"],
-            "notes": collection["notes"],
-            # "Collector": {
-            #     "name": collection["CollectorName"],
-            #     "phone": collection["CollectorPhone"],
-            #     "rating": collection["CollectorRating"]
-            # } if collection["CollectorName"] else None,
-            # "PaymentStatus": collection["PaymentStatus"],
-            # "PaymentAmount": collection["PaymentAmount"],
-            # "PaymentMethod": collection["PaymentMethod"],
-            # "PaymentDate": collection["PaymentDate"],
-        }
+        return {"success": True, "collection": _collection_detail(collection)}
+
+    except DatabaseUnavailable:
+        raise
+    except pyodbc.Error as ex:
+        return {"success": False, "message": f"Database error: {ex}"}
+    except Exception as e:
+        return {"success": False, "message": f"Unexpected error: {e}"}
+    finally:
+        if 'cnxn' in locals() and cnxn:
+            cnxn.close() 
+
+def get_collections_details_batch(collection_ids, user_id):
+    """Details for several collections in one query.
 
-        return {"success": True, "collection": result}
+    Results follow the request order, each with a "found" flag; ids that
+    don't exist, or belong to another user, come back as
+    {"id": ..., "found": False}.
+    """
+    if not collection_ids:
+        return {"success": False, "message": "Missing collection IDs."}
+    if len(collection_ids) > MAX_BATCH_IDS:
+        return {"success": False, "message": f"At most {MAX_BATCH_IDS} collection IDs per request."}
 
+    parsed = [parse_collection_id(value) for value in collection_ids]
+    if None in parsed:
+        return {"success": False, "message": "Collection IDs must be positive integers."}
+
+    conn_str = get_db_connection_string()
+    if not conn_str:
+        return {"success": False, "message": "Database configuration error."}
+
+    try:
+        cnxn = get_connection(conn_str, read_only=True, user_id=user_id)
+        cursor = cnxn.cursor() 
+
+        unique_ids = list(dict.fromkeys(parsed))
+        query = f"""
+        SELECT {DETAIL_COLUMNS}
+        FROM Collections
+        WHERE UserID = ? AND ColID IN ({', '.join('?' * len(unique_ids))})
+        """
+        cursor.execute(query, user_id, *unique_ids)
+        found = {row["ColID"]: {**_collection_detail(row), "found": True} for row in fetchall_records(cursor)}
+
+        return {
+            "success": True,
+            "collections": [found.get(col_id) or {"id": f"col{col_id}", "found": False} for col_id in parsed]
+        }
+
+    except DatabaseUnavailable:
+        raise
     except pyodbc.Error as ex:
         return {"success": False, "message": f"Database error: {ex}"}
     except Exception as e:
@@ -57,27 +125,39 @@ def get_collections_details(collection_id):
         if 'cnxn' in locals() and cnxn:
             cnxn.close() 
 
-def cancel_collection_by_id(data):
+def cancel_collection_by_id(data, user_id):
     conn_str = get_db_connection_string()
     if not conn_str:
         return False
 
     try:
-        cnxn = pyodbc.connect(conn_str)
+        cnxn = get_connection(conn_str, user_id=user_id)
         cursor = cnxn.cursor()
 
         coldet_id = data.get("id")
         cancel_reason = data.get("reason")
 
         cursor.execute("""
-            UPDATE Collections
-            SET status = ?, reason = ?
-            WHERE ColID = ? AND status IN ('scheduled', 'pending')
-        """, ("cancelled", cancel_reason, coldet_id))
+            SELECT collection_date, collection_time
+            FROM Collections WITH (UPDLOCK)
+            WHERE ColID = ? AND UserID = ? AND status IN ('scheduled', 'pending')
+        """, (coldet_id, user_id))
+        cancelled = cursor.fetchone()
+
+        if cancelled:
+            cursor.execute("""
+                UPDATE Collections
+                SET status = ?, reason = ?
+                WHERE ColID = ? AND UserID = ?
+            """, ("cancelled", cancel_reason, coldet_id, user_id))
+
+            # Free its place in the slot for someone else.
+            if cancelled[0] is not None:
+                release_slot(cursor, slot_date(cancelled[0]), cancelled[1])
 
         cnxn.commit() 
 
-        if cursor.rowcount > 0:
+        if cancelled:
             return {"success": True, "message": "Collection cancelled successfully."}
         else:
             return {
@@ -85,6 +165,8 @@ def cancel_collection_by_id(data):
                 "message": "Collection not cancelled. It may not exist or is already completed/cancelled."
             }
     
+    except DatabaseUnavailable:
+        raise
     except pyodbc.Error as ex:
         print(f"Database error while cancelling collection: {ex}")
         return False
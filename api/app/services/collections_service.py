@@ -1,35 +1,138 @@
+import base64
+import json
+from datetime import date, timedelta
 import pyodbc
-from app.models.db import get_db_connection_string
+from app.models.db import get_db_connection_string, get_connection
+from app.models.resilience import DatabaseUnavailable
+from app.models.records import fetchall_records
 from firebase_admin import auth
 
-def get_collections(userid):
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+MAX_STATUS_FILTERS = 10
+SORT_ORDERS = ("desc", "asc")
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+# Pages are keyed on (collection_date, ColID) in the requested direction, so
+# fetching page N costs the same as page 1. The cursor is just the last row's
+# key (and the sort it belongs to), packed into an opaque token; forging one
+# can only move within the caller's own rows.
+def encode_cursor(sort, collection_date, col_id):
+    if hasattr(collection_date, "isoformat"):
+        collection_date = collection_date.isoformat()
+    raw = json.dumps([sort, collection_date, col_id], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(token, sort):
+    try:
+        cursor_sort, collection_date, col_id = json.loads(base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)))
+    except Exception:
+        raise InvalidCursor("Invalid cursor.")
+    if cursor_sort != sort:
+        raise InvalidCursor("Cursor belongs to a different sort order.")
+    if not isinstance(col_id, int) or not isinstance(collection_date, (str, type(None))):
+        raise InvalidCursor("Invalid cursor.")
+    return collection_date, col_id
+
+def _after_cursor(sort, cursor_key):
+    # NULL dates sort first ascending and last descending, on both SQL Server
+    # and SQLite.
+    collection_date, col_id = cursor_key
+    if sort == "desc":
+        if collection_date is None:
+            return "collection_date IS NULL AND ColID < ?", [col_id]
+        return (
+            "(collection_date < ? OR collection_date IS NULL OR (collection_date = ? AND ColID < ?))",
+            [collection_date, collection_date, col_id],
+        )
+    if collection_date is None:
+        return "(collection_date IS NOT NULL OR ColID > ?)", [col_id]
+    return "(collection_date > ? OR (collection_date = ? AND ColID > ?))", [collection_date, collection_date, col_id]
+
+def _parse_date(value, name):
+    try:
+        return date.fromisoformat(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{name} must be a date in YYYY-MM-DD format.")
+
+def build_collections_query(userid, limit, page_cursor=None, statuses=None, date_from=None, date_to=None, sort="desc"):
+    """SQL and params for one page. Filters are plain predicates on
+    (UserID, status, collection_date) so they can seek IX_Collections_User_Status_Date."""
+    if sort not in SORT_ORDERS:
+        raise ValueError(f"sort must be one of {', '.join(SORT_ORDERS)}.")
+    if statuses and len(statuses) > MAX_STATUS_FILTERS:
+        raise ValueError(f"At most {MAX_STATUS_FILTERS} status filters are allowed.")
+
+    where, params = ["UserID = ?"], [userid]
+    if statuses:
+        where.append(f"status IN ({', '.join('?' * len(statuses))})")
+        params += statuses
+    if date_from:
+        where.append("collection_date >= ?")
+        params.append(_parse_date(date_from, "from").isoformat())
+    if date_to:
+        # Half-open upper bound, so it also covers DATETIME values on that day.
+        where.append("collection_date < ?")
+        params.append((_parse_date(date_to, "to") + timedelta(days=1)).isoformat())
+    if page_cursor:
+        predicate, cursor_params = _after_cursor(sort, decode_cursor(page_cursor, sort))
+        where.append(predicate)
+        params += cursor_params
+
+    direction = "DESC" if sort == "desc" else "ASC"
+    sql = f"""
+        SELECT 'col' + CAST(ColID AS VARCHAR) AS id, ColID, UserID, collection_date, collection_time,
+               pickup_address, amount, number_items, weight, notes, status
+        FROM Collections
+        WHERE {' AND '.join(where)}
+        ORDER BY collection_date {direction}, ColID {direction}
+        OFFSET 0 ROWS FETCH NEXT ? ROWS ONLY
+    """
+    # One extra row tells us whether another page exists.
+    params.append(limit + 1)
+    return sql, params
+
+def get_collections(userid, limit=DEFAULT_PAGE_SIZE, page_cursor=None, statuses=None,
+                    date_from=None, date_to=None, sort="desc"):
     conn_str = get_db_connection_string()
     if not conn_str:
         return {"success": False, "message": "Database configuration error."}
 
     try:
-        cnxn = pyodbc.connect(conn_str)
-        cursor = cnxn.cursor() 
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        sql, params = build_collections_query(userid, limit, page_cursor, statuses, date_from, date_to, sort)
+    except ValueError as e:
+        return {"success": False, "message": str(e)}
 
-        cursor.execute("SELECT 'col' + CAST(ColID AS VARCHAR) AS id, UserID, collection_date, collection_time, pickup_address, amount, number_items, weight, notes, status FROM Collections WHERE UserID = ?", userid)
-        collections = cursor.fetchall()
+    try:
+        cnxn = get_connection(conn_str, read_only=True, user_id=userid)
+        cursor = cnxn.cursor() 
 
-        if not collections:
-            return {"success": True, "message": "No collections found.", "collections": []}
+        cursor.execute(sql, *params)
+        collections_list = fetchall_records(cursor)
 
-        # Format collections into a list of dictionaries
-        collections_list = []
-        columns = [column[0] for column in cursor.description]
+        next_cursor = None
+        if len(collections_list) > limit:
+            collections_list = collections_list[:limit]
+            last = collections_list[-1]
+            next_cursor = encode_cursor(sort, last["collection_date"], last["ColID"])
 
-        for row in collections:
-            collections_list.append(dict(zip(columns, row)))
+        if not collections_list:
+            return {"success": True, "message": "No collections found.", "collections": [], "next_cursor": None}
 
         return {
             "success": True,
             "message": "Collections retrieved successfully.",
-            "collections": collections_list
+            "collections": collections_list,
+            "next_cursor": next_cursor
         }
 
+    except DatabaseUnavailable:
+        raise
     except pyodbc.Error as ex:
         return {"success": False, "message": f"Database error: {ex}"}
     except Exception as e:
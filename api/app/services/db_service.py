@@ -1,25 +1,39 @@
 import pyodbc 
-from app.models.db import get_db_connection_string 
+from app.models.db import get_db_connection_string, get_connection, pool_stats, replica_stats
+from app.models.resilience import DatabaseUnavailable
+from app.models.instrumentation import get_route_stats
+from app.services.auth_service import get_token_cache
+from app.services.user_service import get_user_id_cache
+from app.services.qr_service import get_qr_cache
+from app.ratelimit import get_limiter
+from app.pricing import get_pricing
+from app.services.idempotency_service import get_idempotency_store
 
-def check_db_connection():
+def check_db_connection(details=False):
     conn_str = get_db_connection_string()
     if not conn_str:
         return {"success": False, "message": "Database configuration error."}
 
     try:
-        cnxn = pyodbc.connect(conn_str)
+        cnxn = get_connection(conn_str)
         cursor = cnxn.cursor()
  
         query = "SELECT 1"
         cursor.execute(query) 
         result = cursor.fetchone() 
 
-        return {
+        response = {
             "success": True,
             "message": "Database connection successful.",
             "result": result[0] if result else None
         }
+        if details:
+            response["pool"] = pool_stats()
+            response["replicas"] = replica_stats()
+        return response
 
+    except DatabaseUnavailable:
+        raise
     except pyodbc.Error as ex:
         sqlstate = ex.args[0]
         return {"success": False, "message": f"Database error: {sqlstate} - {ex.args[1]}"}
@@ -27,4 +41,18 @@ def check_db_connection():
         return {"success": False, "message": f"An unexpected error occurred: {e}"}
     finally:
         if 'cnxn' in locals() and cnxn:
-            cnxn.close()
\ No newline at end of file
+            cnxn.close()
+
+def db_stats():
+    return {
+        "success": True,
+        "routes": get_route_stats(),
+        "pool": pool_stats(),
+        "replicas": replica_stats(),
+        "token_cache": get_token_cache().stats(),
+        "user_id_cache": get_user_id_cache().stats(),
+        "qr_cache": get_qr_cache().stats(),
+        "rate_limits": get_limiter().stats(),
+        "pricing": get_pricing().stats(),
+        "idempotency": get_idempotency_store().stats()
+    }
@@ -0,0 +1,94 @@
+import functools
+import hashlib
+import inspect
+import sys
+import pyodbc
+from flask import g, make_response, request
+from app.models.db import get_db_connection_string, get_connection
+from app.services.async_service import run_blocking
+
+# Conditional GET for per-user read endpoints. Each resource has a counter in
+# UserDataVersion that the database bumps on every write (triggers, see
+# app/models/schema.py and sql/mssql_data_version.sql). The ETag is that
+# counter plus a digest of the URL, so different pages/filters of the same
+# resource get different tags.
+#
+# The counter is read like any other read-only query, so it can come from a
+# replica. Read-only calls of one request all go to the server the first one
+# used (see _acquire_read), and the counter is read before the view runs, so
+# a tag can be older than the data it is sent with, never newer.
+
+_unavailable_logged = False
+
+def get_data_version(user_id, resource):
+    global _unavailable_logged
+    conn_str = get_db_connection_string()
+    try:
+        with get_connection(conn_str, read_only=True, user_id=user_id) as cnxn, cnxn.cursor() as cursor:
+            cursor.execute(
+                "SELECT version FROM UserDataVersion WHERE UserID = ? AND resource = ?",
+                (user_id, resource),
+            )
+            row = cursor.fetchone()
+    except pyodbc.Error as ex:
+        # Table not deployed yet: serve the endpoint without ETags.
+        if not _unavailable_logged:
+            _unavailable_logged = True
+            print(f"ETags disabled, cannot read UserDataVersion: {ex}", file=sys.stderr)
+        return None
+    return row[0] if row else 0
+
+def make_etag(resource, version):
+    variant = hashlib.sha1(request.full_path.encode()).hexdigest()[:12]
+    return f"{resource}-{version}-{variant}"
+
+def row_version(row):
+    """Version derived from a row already loaded for this request (e.g. g.user)."""
+    return hashlib.sha1(repr(sorted(row._asdict().items())).encode()).hexdigest()[:16]
+
+def conditional(resource, version=None):
+    """Answer If-None-Match with 304 while the caller's ``resource`` is unchanged.
+
+    Goes below login_required, which provides g.user_id. ``version`` may be a
+    callable computing the version from data the request already holds,
+    instead of reading UserDataVersion.
+    """
+    def decorator(view):
+        if inspect.iscoroutinefunction(view):
+            @functools.wraps(view)
+            async def wrapper(*args, **kwargs):
+                current = version() if version else await run_blocking(get_data_version, g.user_id, resource)
+                if current is None:
+                    return await view(*args, **kwargs)
+                etag = make_etag(resource, current)
+                if request.if_none_match.contains(etag):
+                    return _not_modified(etag)
+                return _tagged(await view(*args, **kwargs), etag)
+        else:
+            @functools.wraps(view)
+            def wrapper(*args, **kwargs):
+                current = version() if version else get_data_version(g.user_id, resource)
+                if current is None:
+                    return view(*args, **kwargs)
+                etag = make_etag(resource, current)
+                if request.if_none_match.contains(etag):
+                    return _not_modified(etag)
+                return _tagged(view(*args, **kwargs), etag)
+        return wrapper
+    return decorator
+
+def _cache_headers(response, etag):
+    response.set_etag(etag)
+    # Per-user data: browsers may keep it but must revalidate every time.
+    response.headers["Cache-Control"] = "private, no-cache"
+    response.vary.add("Authorization")
+    return response
+
+def _not_modified(etag):
+    return _cache_headers(make_response("", 304), etag)
+
+def _tagged(rv, etag):
+    response = make_response(rv)
+    if response.status_code == 200:
+        _cache_headers(response, etag)
+    return response
@@ -0,0 +1,234 @@
+import asyncio
+import functools
+import hashlib
+import inspect
+import threading
+import time
+from collections import OrderedDict
+from flask import Response, g, jsonify, make_response, request
+from app.config import get_settings, on_settings_reload
+from app.models.db import current_unit
+
+# Idempotency-Key support for write endpoints that mobile clients retry.
+#
+# The first request with a key runs the view; its response is kept (per user,
+# endpoint and key) for IDEMPOTENCY_TTL seconds and replayed to every retry
+# without running the view again, so no second INSERT, notification or push.
+# A retry that arrives while the first request is still running waits for it
+# instead of racing it.
+#
+# A response is only kept once the request's unit of work has committed (see
+# UnitOfWork.after_commit), and only if it is a 2xx. A request that fails, or
+# whose commit fails, releases the key instead, so its retry runs normally.
+#
+# The store is per process and bounded to IDEMPOTENCY_MAX_KEYS finished entries
+# (least recently used keys are dropped first); requests still in flight are
+# never dropped.
+
+HEADER = "Idempotency-Key"
+MAX_KEY_LENGTH = 255
+
+
+class _Entry:
+    __slots__ = ("fingerprint", "done", "response", "expires_at")
+
+    def __init__(self, fingerprint):
+        self.fingerprint = fingerprint
+        self.done = threading.Event()
+        self.response = None
+        self.expires_at = None
+
+
+class IdempotencyStore:
+    def __init__(self, max_keys=10000, ttl=86400.0):
+        self.max_keys = max_keys
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"executed": 0, "replayed": 0, "waited": 0, "conflicts": 0, "evictions": 0}
+
+    def begin(self, key, fingerprint):
+        """(entry, owner). The owner runs the request and must call finish()."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires_at is not None and entry.expires_at <= now:
+                del self._entries[key]
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+                return entry, False
+
+            entry = self._entries[key] = _Entry(fingerprint)
+            self._evict()
+            self._stats["executed"] += 1
+            return entry, True
+
+    def _evict(self):
+        # In-flight entries are never dropped: their retries must still find
+        # them and wait. The store can grow past max_keys while they run.
+        excess = len(self._entries) - self.max_keys
+        if excess <= 0:
+            return
+        evict = []
+        for key, entry in self._entries.items():
+            if entry.done.is_set():
+                evict.append(key)
+                if len(evict) == excess:
+                    break
+        for key in evict:
+            del self._entries[key]
+        self._stats["evictions"] += len(evict)
+
+    def finish(self, key, entry, response):
+        """Keep ``response`` for replay, or forget the key if it is None."""
+        with self._lock:
+            if response is None:
+                if self._entries.get(key) is entry:
+                    del self._entries[key]
+            else:
+                entry.response = response
+                entry.expires_at = time.monotonic() + self.ttl
+        entry.done.set()
+
+    def count(self, stat):
+        with self._lock:
+            self._stats[stat] += 1
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats["size"] = len(self._entries)
+        stats["max_keys"] = self.max_keys
+        return stats
+
+
+_store = None
+_store_lock = threading.Lock()
+
+def get_idempotency_store():
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                settings = get_settings()
+                _store = IdempotencyStore(settings.idempotency_max_keys, settings.idempotency_ttl)
+    return _store
+
+@on_settings_reload
+def _reset_store_on_reload(old, new):
+    global _store
+    if old is None or (old.idempotency_max_keys, old.idempotency_ttl) != (new.idempotency_max_keys, new.idempotency_ttl):
+        _store = None
+
+
+def idempotent(view):
+    """Replay the first response to retries carrying the same Idempotency-Key.
+
+    Goes below login_required, which provides g.user_id. Requests without the
+    header are not affected.
+    """
+    if inspect.iscoroutinefunction(view):
+        @functools.wraps(view)
+        async def wrapper(*args, **kwargs):
+            key, fingerprint, error = _request_key()
+            if key is None:
+                return error or await view(*args, **kwargs)
+            store = get_idempotency_store()
+            while True:
+                entry, owner = store.begin(key, fingerprint)
+                if owner:
+                    kept = None
+                    try:
+                        response = make_response(await view(*args, **kwargs))
+                        kept = _keepable(response)
+                        return response
+                    finally:
+                        _finish_after_unit(store, key, entry, kept)
+                if entry.fingerprint != fingerprint:
+                    return _conflict(store)
+                if not entry.done.is_set():
+                    store.count("waited")
+                    await _wait_async(entry.done, get_settings().idempotency_wait_seconds)
+                rv = _replay_or_retry(store, entry)
+                if rv is not None:
+                    return rv
+    else:
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            key, fingerprint, error = _request_key()
+            if key is None:
+                return error or view(*args, **kwargs)
+            store = get_idempotency_store()
+            while True:
+                entry, owner = store.begin(key, fingerprint)
+                if owner:
+                    kept = None
+                    try:
+                        response = make_response(view(*args, **kwargs))
+                        kept = _keepable(response)
+                        return response
+                    finally:
+                        _finish_after_unit(store, key, entry, kept)
+                if entry.fingerprint != fingerprint:
+                    return _conflict(store)
+                if not entry.done.is_set():
+                    store.count("waited")
+                    entry.done.wait(get_settings().idempotency_wait_seconds)
+                rv = _replay_or_retry(store, entry)
+                if rv is not None:
+                    return rv
+    return wrapper
+
+def _request_key():
+    """(store key, request fingerprint, error response)."""
+    value = request.headers.get(HEADER)
+    if value is None:
+        return None, None, None
+    value = value.strip()
+    if not value or len(value) > MAX_KEY_LENGTH:
+        error = jsonify({"success": False, "message": f"{HEADER} must be 1 to {MAX_KEY_LENGTH} characters."})
+        return None, None, (error, 400)
+    fingerprint = hashlib.sha1(request.method.encode() + request.full_path.encode() + b"\n" + request.get_data()).hexdigest()
+    return (g.user_id, request.endpoint, value), fingerprint, None
+
+def _finish_after_unit(store, key, entry, kept):
+    # Waiters are released (and the response kept) only once the request's
+    # transaction has an outcome, so nothing is replayed that didn't commit.
+    unit = current_unit()
+    if unit is None:
+        store.finish(key, entry, kept)
+        return
+    unit.after_commit(lambda: store.finish(key, entry, kept))
+    unit.after_rollback(lambda: store.finish(key, entry, None))
+
+async def _wait_async(event, timeout):
+    # Polled rather than waited on a worker thread: waiting retries must not
+    # tie up the shared executor the async views run their queries on.
+    deadline = time.monotonic() + timeout
+    while not event.is_set() and time.monotonic() < deadline:
+        await asyncio.sleep(0.05)
+
+def _keepable(response):
+    if 200 <= response.status_code < 300 and not response.is_streamed:
+        return response.status_code, response.content_type, response.get_data()
+    return None
+
+def _replay_or_retry(store, entry):
+    """The kept response; None if the first request failed and this one should run."""
+    if entry.response is not None:
+        store.count("replayed")
+        status, content_type, body = entry.response
+        response = Response(body, status, content_type=content_type)
+        response.headers["Idempotent-Replayed"] = "true"
+        return response
+    if not entry.done.is_set():
+        response = jsonify({"success": False, "message": "A request with this Idempotency-Key is still in progress."})
+        response.headers["Retry-After"] = "1"
+        return response, 409
+    return None
+
+def _conflict(store):
+    store.count("conflicts")
+    message = f"{HEADER} was already used for a different request."
+    return jsonify({"success": False, "message": message}), 422
@@ -0,0 +1,133 @@
+import asyncio
+import functools
+import inspect
+import jwt
+from flask import g, jsonify, request
+from app.ratelimit import limit_uid
+from app.services.async_service import run_blocking
+from app.services.auth_service import cached_id_token, verify_id_token
+from app.services.user_service import cached_user_id, get_user_context, get_user_id_by_firebase_uid
+
+# Every authenticated route goes through login_required, which verifies the
+# Firebase token once and leaves the caller's identity on flask.g:
+#
+#   g.uid      firebase uid
+#   g.user_id  Users.UserID
+#   g.user     the Users row (see get_user_context), only with load_user=True
+#
+# Without load_user the UserID usually comes from the in-process cache, so
+# the request costs no query at all; with it, the row is read exactly once.
+
+def login_required(view=None, *, load_user=False):
+    def decorator(view):
+        if inspect.iscoroutinefunction(view):
+            @functools.wraps(view)
+            async def wrapper(*args, **kwargs):
+                error_response, status_code = await _resolve_async(load_user)
+                if error_response is not None:
+                    return error_response, status_code
+                return await view(*args, **kwargs)
+        else:
+            @functools.wraps(view)
+            def wrapper(*args, **kwargs):
+                error_response, status_code = _resolve(load_user)
+                if error_response is not None:
+                    return error_response, status_code
+                return view(*args, **kwargs)
+        return wrapper
+
+    return decorator(view) if view is not None else decorator
+
+def _bearer_token():
+    auth_header = request.headers.get("Authorization")
+    if not auth_header or not auth_header.startswith("Bearer "):
+        return None
+    return auth_header.split(" ")[1]
+
+def _unverified_uid(id_token):
+    try:
+        claims = jwt.decode(id_token, options={"verify_signature": False})
+    except jwt.InvalidTokenError:
+        return None
+    return claims.get("user_id") or claims.get("sub")
+
+def _missing_token():
+    return jsonify({"success": False, "message": "Missing or invalid token"}), 401
+
+def _verification_failed(e):
+    return jsonify({"success": False, "message": f"Token verification failed: {e}"}), 401
+
+def _lookup(uid, load_user):
+    if load_user:
+        return get_user_context(uid)
+    return get_user_id_by_firebase_uid(uid)
+
+def _finish(uid, found, load_user):
+    g.uid = uid
+    g.user = found if load_user else None
+    g.user_id = found.UserID if load_user and found else found
+    if not found:
+        return jsonify({"success": False, "message": "User not found"}), 404
+    return None, None
+
+def _resolve(load_user):
+    id_token = _bearer_token()
+    if not id_token:
+        return _missing_token()
+
+    try:
+        uid = verify_id_token(id_token)["uid"]
+    except Exception as e:
+        return _verification_failed(e)
+
+    limited = limit_uid(uid)
+    if limited:
+        return limited
+    return _finish(uid, _lookup(uid, load_user), load_user)
+
+async def _resolve_async(load_user):
+    """Like _resolve(), but for a user this process already knows, the row
+    lookup for the uid the token claims runs while its signature is being
+    verified. The lookup result is only used once verification succeeds for
+    that same uid."""
+    id_token = _bearer_token()
+    if not id_token:
+        return _missing_token()
+
+    # A cached token needs no verification, so there is nothing to overlap.
+    decoded = cached_id_token(id_token)
+    if decoded is not None:
+        uid = decoded["uid"]
+        limited = limit_uid(uid)
+        if limited:
+            return limited
+        found = None if load_user else cached_user_id(uid)
+        if not found:
+            found = await run_blocking(_lookup, uid, load_user)
+        return _finish(uid, found, load_user)
+
+    # The claimed uid is unverified and chosen by the caller: only start the
+    # lookup early if the uid cache already maps it to a user. Otherwise a
+    # forged token could buy a Users query (and a pool thread) before its
+    # signature or the uid rate limit is checked.
+    claimed_uid = _unverified_uid(id_token)
+    verify = run_blocking(verify_id_token, id_token)
+    if load_user and claimed_uid and cached_user_id(claimed_uid) is not None:
+        decoded, found = await asyncio.gather(
+            verify, run_blocking(_lookup, claimed_uid, load_user), return_exceptions=True
+        )
+    else:
+        decoded, found = (await asyncio.gather(verify, return_exceptions=True))[0], None
+
+    if isinstance(decoded, Exception):
+        return _verification_failed(decoded)
+
+    uid = decoded["uid"]
+    limited = limit_uid(uid)
+    if limited:
+        return limited
+    if uid != claimed_uid or not found or isinstance(found, Exception):
+        found = None if load_user else cached_user_id(uid)
+        if not found:
+            found = await run_blocking(_lookup, uid, load_user)
+    return _finish(uid, found, load_user)
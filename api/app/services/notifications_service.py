@@ -1,5 +1,8 @@
 import pyodbc 
-from app.models.db import get_db_connection_string 
+from app.models.db import get_db_connection_string, get_connection, get_stream_connection
+from app.models.resilience import DatabaseUnavailable
+from app.models.records import fetchone_record
+from app.streaming import stream_query
 
 def get_notifications(user_id: int, firebase_uid: str) -> dict:
     conn_str = get_db_connection_string()
@@ -7,18 +10,12 @@ def get_notifications(user_id: int, firebase_uid: str) -> dict:
         return {"success": False, "message": "Database configuration error."}
 
     try:
-        with pyodbc.connect(conn_str) as cnxn, cnxn.cursor() as cursor:
-            query = """
-                SELECT NotificationID, UserID, title, messages, type, isread, created_at, read_at
-                FROM Notifications
-                WHERE UserID = ?
-            """
-            cursor.execute(query, (user_id))
-            rows = cursor.fetchall()
-
-            # Convert rows into list of dictionaries
-            columns = [col[0] for col in cursor.description]
-            result = [dict(zip(columns, row)) for row in rows] or None
+        query = """
+            SELECT NotificationID, UserID, title, messages, type, isread, created_at, read_at
+            FROM Notifications
+            WHERE UserID = ?
+        """
+        result = stream_query(get_stream_connection(user_id), query, (user_id, )) or None
 
         return {
             "success": True,
@@ -26,6 +23,8 @@ def get_notifications(user_id: int, firebase_uid: str) -> dict:
             "result": result,
         }
 
+    except DatabaseUnavailable:
+        raise
     except pyodbc.Error as ex:
         return {
             "success": False,
@@ -45,7 +44,7 @@ def markasread_notifications(user_id: int, notif_id: int) -> dict:
         return {"success": False, "message": "Database configuration error.", "result": None}
 
     try:
-        with pyodbc.connect(conn_str) as cnxn, cnxn.cursor() as cursor:  
+        with get_connection(conn_str, user_id=user_id) as cnxn, cnxn.cursor() as cursor:  
 
             if notif_id == 0:
 
@@ -67,6 +66,8 @@ def markasread_notifications(user_id: int, notif_id: int) -> dict:
 
             return {"success": True, "message": "Notifications mark as read successfully"}
 
+    except DatabaseUnavailable:
+        raise
     except pyodbc.Error as ex:
         return {
             "success": False,
@@ -90,19 +91,22 @@ def create_notifications(user_id: int, data: dict) -> dict:
     message = data.get("message") 
  
     try:
-        with pyodbc.connect(conn_str) as cnxn, cnxn.cursor() as cursor:  
+        with get_connection(conn_str, user_id=user_id) as cnxn, cnxn.cursor() as cursor:  
  
+                # No OUTPUT clause: SQL Server refuses it on tables with
+                # triggers, and Notifications has the version trigger.
                 insert_query = """
                     INSERT INTO Notifications (UserID, title, messages, type, isread, created_at, read_at) 
-                    OUTPUT INSERTED.UserID, INSERTED.title,
-                        INSERTED.messages, INSERTED.type, INSERTED.isread, INSERTED.created_at, INSERTED.read_at
                     VALUES (?, ?, ?, ?, ?, GETDATE(), NULL)
                 """
                 cursor.execute(insert_query, (user_id, title, message, type, 0))
+                cursor.execute("""
+                    SELECT UserID, title, messages, type, isread, created_at, read_at
+                    FROM Notifications
+                    WHERE NotificationID = SCOPE_IDENTITY()
+                """)
 
-                row = cursor.fetchone()
-                columns = [col[0] for col in cursor.description]
-                result = dict(zip(columns, row)) if row else None
+                result = fetchone_record(cursor)
 
                 cnxn.commit()
 
@@ -113,6 +117,8 @@ def create_notifications(user_id: int, data: dict) -> dict:
                 "result": result
             } 
 
+    except DatabaseUnavailable:
+        raise
     except pyodbc.Error as ex:
         return {
             "success": False,
@@ -134,21 +140,23 @@ def savefcmtoken_notifications(user_id: int, data: dict) -> dict:
     fcm_token = data.get("fcm_token") 
  
     try:
-        with pyodbc.connect(conn_str) as cnxn, cnxn.cursor() as cursor:  
+        with get_connection(conn_str, user_id=user_id) as cnxn, cnxn.cursor() as cursor:  
  
                 cursor.execute("""
-                    IF EXISTS (SELECT 1 FROM UserTokens WHERE UserID = ? AND fcm_token = ?)
-                        UPDATE UserTokens SET updated_at = GETDATE()
-                        WHERE UserID = ? AND fcm_token = ?
-                    ELSE
-                        INSERT INTO UserTokens (UserID, fcm_token) VALUES (?, ?)
-                    """, (user_id, fcm_token, user_id, fcm_token, user_id, fcm_token))
+                    UPDATE UserTokens SET updated_at = GETDATE()
+                    WHERE UserID = ? AND fcm_token = ?
+                    """, (user_id, fcm_token))
+
+                if cursor.rowcount == 0:
+                    cursor.execute("INSERT INTO UserTokens (UserID, fcm_token) VALUES (?, ?)", (user_id, fcm_token))
                 
                 cnxn.commit()
                 cnxn.close()
 
                 return {"success": True, "message": "FCM token saved"}
 
+    except DatabaseUnavailable:
+        raise
     except pyodbc.Error as ex:
         return {
             "success": False,
@@ -4,8 +4,9 @@ import jwt
 import datetime
 import os
 import smtplib
-from app.models.db import get_db_connection_string
-from app.config import Config
+from app.models.db import get_db_connection_string, get_connection
+from app.models.resilience import DatabaseUnavailable
+from app.config import Config, get_settings
 from passlib.hash import bcrypt
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
@@ -18,7 +19,7 @@ def reset_password(email):
         return {"success": False, "message": "Database configuration error."}
 
     try:
-        cnxn = pyodbc.connect(conn_str)
+        cnxn = get_connection(conn_str)
         cursor = cnxn.cursor() 
 
         
@@ -52,6 +53,8 @@ def reset_password(email):
         else:
             return {"success": False, "message": "Failed to send email."}
        
+    except DatabaseUnavailable:
+        raise
     except pyodbc.Error as ex:
         sqlstate = ex.args[0]
         return {"success": False, "message": f"Database error: {sqlstate} - {ex.args[1]}"}
@@ -83,7 +86,7 @@ def set_new_password(data):
         return {"success": False, "message": "Invalid token."}
     
     try:
-        cnxn = pyodbc.connect(conn_str)
+        cnxn = get_connection(conn_str)
         cursor = cnxn.cursor() 
 
         hashed_pass = bcrypt.hash(password)
@@ -100,6 +103,8 @@ def set_new_password(data):
             "success": True, "message" : "Update Password Successful"
         }
        
+    except DatabaseUnavailable:
+        raise
     except pyodbc.Error as ex:
         sqlstate = ex.args[0]
         return {"success": False, "message": f"Database error: {sqlstate} - {ex.args[1]}"}
@@ -121,10 +126,11 @@ def generate_token(payload):
     )
 
 def send_email(to, subject, body):
-    smtp_server = "smtp.gmail.com"
-    smtp_port = 587
-    sender_email = "temporaryml222@gmail.com"
-    sender_password = "zvnt btxg kgvj fhwt"
+    settings = get_settings()
+    smtp_server = settings.smtp_server
+    smtp_port = settings.smtp_port
+    sender_email = settings.smtp_user
+    sender_password = settings.smtp_password
 
     msg = MIMEMultipart()
     msg['From'] = sender_email
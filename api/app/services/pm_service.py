@@ -1,5 +1,7 @@
 import pyodbc 
-from app.models.db import get_db_connection_string 
+from app.models.db import get_db_connection_string, get_connection
+from app.models.resilience import DatabaseUnavailable
+from app.models.records import fetchall_records, fetchone_record
 
 def get_pm(user_id: int, firebase_uid: str) -> dict:
     conn_str = get_db_connection_string()
@@ -7,18 +9,14 @@ def get_pm(user_id: int, firebase_uid: str) -> dict:
         return {"success": False, "message": "Database configuration error."}
 
     try:
-        with pyodbc.connect(conn_str) as cnxn, cnxn.cursor() as cursor:
+        with get_connection(conn_str, read_only=True, user_id=user_id) as cnxn, cnxn.cursor() as cursor:
             query = """
                 SELECT PmID, UserID, firebase_uid, type, keyname, label, isdefault
                 FROM PaymentMethod
                 WHERE UserID = ? AND firebase_uid = ?
             """
             cursor.execute(query, (user_id, firebase_uid))
-            rows = cursor.fetchall()
-
-            # Convert rows into list of dictionaries
-            columns = [col[0] for col in cursor.description]
-            result = [dict(zip(columns, row)) for row in rows] or None
+            result = fetchall_records(cursor) or None
 
         return {
             "success": True,
@@ -26,6 +24,8 @@ def get_pm(user_id: int, firebase_uid: str) -> dict:
             "result": result,
         }
 
+    except DatabaseUnavailable:
+        raise
     except pyodbc.Error as ex:
         return {
             "success": False,
@@ -62,7 +62,7 @@ def create_pm(user_id: int, firebase_uid: str, data: dict) -> dict:
     pm_id = int(pm_id_raw) if pm_id_raw not in (None, "", "null") else 0
  
     try:
-        with pyodbc.connect(conn_str) as cnxn, cnxn.cursor() as cursor:  
+        with get_connection(conn_str, user_id=user_id) as cnxn, cnxn.cursor() as cursor:  
  
             if pm_id > 0:  
  
@@ -74,9 +74,7 @@ def create_pm(user_id: int, firebase_uid: str, data: dict) -> dict:
                     WHERE PmID = ? AND UserID = ? AND firebase_uid = ?
                 """
                 cursor.execute(update_query, (pm_type, pm_key, pm_label, is_default, pm_id, user_id, firebase_uid))
-                row = cursor.fetchone()
-                columns = [col[0] for col in cursor.description]
-                result = dict(zip(columns, row)) if row else None
+                result = fetchone_record(cursor)
 
             else: 
                 insert_query = """
@@ -87,9 +85,7 @@ def create_pm(user_id: int, firebase_uid: str, data: dict) -> dict:
                 """
                 cursor.execute(insert_query, (user_id, firebase_uid, pm_type, pm_key, pm_label, is_default))
 
-                row = cursor.fetchone()
-                columns = [col[0] for col in cursor.description]
-                result = dict(zip(columns, row)) if row else None
+                result = fetchone_record(cursor)
 
                 cnxn.commit()
 
@@ -106,6 +102,8 @@ def create_pm(user_id: int, firebase_uid: str, data: dict) -> dict:
                 "result": result
             }
 
+    except DatabaseUnavailable:
+        raise
     except pyodbc.Error as ex:
         return {
             "success": False,
@@ -125,7 +123,7 @@ def delete_pm(user_id: int, firebase_uid: str, pm_id: int) -> dict:
         return {"success": False, "message": "Database configuration error.", "result": None}
  
     try:
-        with pyodbc.connect(conn_str) as cnxn, cnxn.cursor() as cursor:  
+        with get_connection(conn_str, user_id=user_id) as cnxn, cnxn.cursor() as cursor:  
  
             check_query = """
                 SELECT isdefault 
@@ -150,6 +148,8 @@ def delete_pm(user_id: int, firebase_uid: str, pm_id: int) -> dict:
 
             return {"success": True, "message": "Payment method deleted successfully"}
 
+    except DatabaseUnavailable:
+        raise
     except pyodbc.Error as ex:
         return {
             "success": False,
@@ -169,7 +169,7 @@ def default_pm(user_id: int, firebase_uid: str, pm_id: int) -> dict:
         return {"success": False, "message": "Database configuration error.", "result": None}
  
     try:
-        with pyodbc.connect(conn_str) as cnxn, cnxn.cursor() as cursor:  
+        with get_connection(conn_str, user_id=user_id) as cnxn, cnxn.cursor() as cursor:  
  
             update_query = """
                 UPDATE PaymentMethod
@@ -179,13 +179,13 @@ def default_pm(user_id: int, firebase_uid: str, pm_id: int) -> dict:
                 WHERE PmID = ? AND UserID = ? AND firebase_uid = ?
             """
             cursor.execute(update_query, (pm_id, user_id, firebase_uid))
-            row = cursor.fetchone()
-            columns = [col[0] for col in cursor.description]
-            result = dict(zip(columns, row)) if row else None
+            result = fetchone_record(cursor)
 
             cnxn.commit()
             return {"success": True, "message": "Default updated", "result": result}
 
+    except DatabaseUnavailable:
+        raise
     except pyodbc.Error as ex:
         return {
             "success": False,
@@ -1,47 +1,24 @@
 import pyodbc
-import io
 import pyotp
-import qrcode
-import base64
-from app.models.db import get_db_connection_string
+from app.models.db import get_db_connection_string, get_connection
+from app.models.resilience import DatabaseUnavailable
+from app.services.qr_service import FORMATS, qr_data_uri
 from passlib.hash import bcrypt
 
-def get_profile(uid):
-    conn_str = get_db_connection_string()
-    if not conn_str:
-        return {"success": False, "message": "Database configuration error."}
-
-    try:
-        cnxn = pyodbc.connect(conn_str)
-        cursor = cnxn.cursor() 
-
-        cursor.execute("SELECT name, email, cpf, country, avatar, phone_number, notifications, darkmode FROM Users WHERE firebase_uid = ?", uid)
-        profile = cursor.fetchone()
-                    
-        cnxn.commit()
-
-        return {
-            "success": True, 
-            "profile": {
-                "name" : profile.name,
-                "email" : profile.email,
-                "phone" : profile.phone_number,
-                "cpf" : profile.cpf,
-                "country" : profile.country,
-                "avatar" : profile.avatar,
-                "notif" : profile.notifications,
-                "darkmode" : profile.darkmode
-            }
+def get_profile(user):
+    return {
+        "success": True, 
+        "profile": {
+            "name" : user.name,
+            "email" : user.email,
+            "phone" : user.phone_number,
+            "cpf" : user.cpf,
+            "country" : user.country,
+            "avatar" : user.avatar,
+            "notif" : user.notifications,
+            "darkmode" : user.darkmode
         }
-       
-    except pyodbc.Error as ex:
-        sqlstate = ex.args[0]
-        return {"success": False, "message": f"Database error: {sqlstate} - {ex.args[1]}"}
-    except Exception as e:
-        return {"success": False, "message": f"An unexpected error occurred: {e}"}
-    finally:
-        if 'cnxn' in locals() and cnxn:
-            cnxn.close()
+    }
 
 def edit_profile(data):
     conn_str = get_db_connection_string()
@@ -49,7 +26,7 @@ def edit_profile(data):
         return {"success": False, "message": "Database configuration error."}
 
     try:
-        cnxn = pyodbc.connect(conn_str)
+        cnxn = get_connection(conn_str)
         cursor = cnxn.cursor()
 
         id = data.get("id")
@@ -70,6 +47,8 @@ def edit_profile(data):
             "success": True, "message" : "Update Profile Successful"
         }
        
+    except DatabaseUnavailable:
+        raise
     except pyodbc.Error as ex:
         sqlstate = ex.args[0]
         return {"success": False, "message": f"Database error: {sqlstate} - {ex.args[1]}"}
@@ -79,13 +58,13 @@ def edit_profile(data):
         if 'cnxn' in locals() and cnxn:
             cnxn.close()
             
-def upload_profile(uid, avatar_url):
+def upload_profile(uid, avatar_url, user_id):
     conn_str = get_db_connection_string()
     if not conn_str:
         return {"success": False, "message": "Database configuration error."} 
 
     try:
-        cnxn = pyodbc.connect(conn_str)
+        cnxn = get_connection(conn_str, user_id=user_id)
         cursor = cnxn.cursor() 
 
         cursor.execute("""
@@ -102,6 +81,8 @@ def upload_profile(uid, avatar_url):
             "message": "Avatar updated successfully."
         }
        
+    except DatabaseUnavailable:
+        raise
     except pyodbc.Error as ex:
         sqlstate = ex.args[0]
         return {"success": False, "message": f"Database error: {sqlstate} - {ex.args[1]}"}
@@ -117,7 +98,7 @@ def changepassword_profile(data):
         return {"success": False, "message": "Database configuration error."}
 
     try:
-        cnxn = pyodbc.connect(conn_str)
+        cnxn = get_connection(conn_str)
         cursor = cnxn.cursor()
 
         id = data.get("userId")
@@ -137,6 +118,8 @@ def changepassword_profile(data):
             "success": True, "message" : "Update Password Successful"
         }
        
+    except DatabaseUnavailable:
+        raise
     except pyodbc.Error as ex:
         sqlstate = ex.args[0]
         return {"success": False, "message": f"Database error: {sqlstate} - {ex.args[1]}"}
@@ -153,7 +136,7 @@ def language_profile(data):
         return {"success": False, "message": "Database configuration error."}
 
     try:
-        cnxn = pyodbc.connect(conn_str)
+        cnxn = get_connection(conn_str)
         cursor = cnxn.cursor()
 
         id = data.get("id")
@@ -171,6 +154,8 @@ def language_profile(data):
             "success": True, "message" : "Update language Successful"
         } 
        
+    except DatabaseUnavailable:
+        raise
     except pyodbc.Error as ex:
         sqlstate = ex.args[0]
         return {"success": False, "message": f"Database error: {sqlstate} - {ex.args[1]}"}
@@ -180,21 +165,25 @@ def language_profile(data):
         if 'cnxn' in locals() and cnxn:
             cnxn.close()
 
-def two_factor_profile(data, uid):
+def two_factor_profile(data, user):
     conn_str = get_db_connection_string()
     if not conn_str:
         return {"success": False, "message": "Database configuration error."}
 
     try:
-        cnxn = pyodbc.connect(conn_str)
+        cnxn = get_connection(conn_str, user_id=user.UserID)
         cursor = cnxn.cursor() 
  
+        uid = user.firebase_uid
         action = data.get("action") 
         
         if action == "generate":
 
-            user = get_user_by_id(cursor, uid)
-            secret = user.get("twofa_secret")
+            qr_format = data.get("format", "png")
+            if qr_format not in FORMATS:
+                return {"success": False, "message": f"Invalid QR format, expected one of {', '.join(FORMATS)}"}
+
+            secret = user.twofa_secret
 
             if not secret:
                 secret = pyotp.random_base32()
@@ -204,22 +193,15 @@ def two_factor_profile(data, uid):
             totp = pyotp.TOTP(secret)
             otpauth_url = totp.provisioning_uri(issuer_name="GreenGo")
 
-            qr = qrcode.make(otpauth_url)
-            buffered = io.BytesIO()
-            qr.save(buffered, format="PNG")
-            qr_base64 = base64.b64encode(buffered.getvalue()).decode("utf-8")
-
             return {
                 "success": True,
                 "message" : "Generate Qrcode Successful",
-                "qrCode": f"data:image/png;base64,{qr_base64}",
+                "qrCode": qr_data_uri(otpauth_url, qr_format),
                 "secret": secret 
             } 
         elif action == "verify":
             code = data.get("code")
-            user = get_user_by_id(cursor, uid)
-            
-            secret = user.get("twofa_secret")
+            secret = user.twofa_secret
 
             if not secret:
                 return {"success": False, "message": "2FA not initiated"}
@@ -242,6 +224,8 @@ def two_factor_profile(data, uid):
         else:
             return {"success": False, "message": "Invalid action"}
        
+    except DatabaseUnavailable:
+        raise
     except pyodbc.Error as ex:
         sqlstate = ex.args[0]
         return {"success": False, "message": f"Database error: {sqlstate} - {ex.args[1]}"}
@@ -260,53 +244,20 @@ def enable_user_2fa(cursor, uid):
 def disabled_user_2fa(cursor, uid): 
     cursor.execute("UPDATE Users SET twofa_enabled = 0, twofa_secret = NULL WHERE firebase_uid = ?", (uid,))
 
-def get_user_by_id(cursor, uid):
-    cursor.execute("SELECT twofa_secret, twofa_enabled FROM Users WHERE firebase_uid = ?", (uid,))
-    row = cursor.fetchone()
-    if row:
-        columns = [column[0] for column in cursor.description]
-        return dict(zip(columns, row))
-    return None
-
-def twofa_status_profile(uid):
-    conn_str = get_db_connection_string()
-    if not conn_str:
-        return {"success": False, "message": "Database configuration error."}
-
-    try:
-        cnxn = pyodbc.connect(conn_str)
-        cursor = cnxn.cursor()  
-
-        user = get_user_by_id(cursor, uid)
-        
-        twoenabled = user.get('twofa_enabled') 
- 
-        if not user:
-            return {"success": False, "message": "User not found"}
-        
-        if twoenabled == 1: 
-            return {"success": True, "enabled": bool(True)}
-        else:
-            return {"success": True, "enabled": bool(False)}
-       
-    except pyodbc.Error as ex:
-        sqlstate = ex.args[0]
-        return {"success": False, "message": f"Database error: {sqlstate} - {ex.args[1]}"}
-    except Exception as e:
-        return {"success": False, "message": f"An unexpected error occurred: {e}"}
-    finally:
-        if 'cnxn' in locals() and cnxn:
-            cnxn.close()
+def twofa_status_profile(user):
+    if not user:
+        return {"success": False, "message": "User not found"}
+    return {"success": True, "enabled": user.twofa_enabled == 1}
 
 """ notifications """
-def notif_profile(data, uid):
+def notif_profile(data, uid, user_id):
 
     conn_str = get_db_connection_string()
     if not conn_str:
         return {"success": False, "message": "Database configuration error."}
 
     try:
-        cnxn = pyodbc.connect(conn_str)
+        cnxn = get_connection(conn_str, user_id=user_id)
         cursor = cnxn.cursor()
  
         notif = data.get("notif")
@@ -323,6 +274,8 @@ def notif_profile(data, uid):
             "success": True, "message" : "Update notification successful"
         } 
        
+    except DatabaseUnavailable:
+        raise
     except pyodbc.Error as ex:
         sqlstate = ex.args[0]
         return {"success": False, "message": f"Database error: {sqlstate} - {ex.args[1]}"}
@@ -332,14 +285,14 @@ def notif_profile(data, uid):
         if 'cnxn' in locals() and cnxn:
             cnxn.close()
 
-def darkmode_profile(data, uid):
+def darkmode_profile(data, uid, user_id):
 
     conn_str = get_db_connection_string()
     if not conn_str:
         return {"success": False, "message": "Database configuration error."}
 
     try:
-        cnxn = pyodbc.connect(conn_str)
+        cnxn = get_connection(conn_str, user_id=user_id)
         cursor = cnxn.cursor()
  
         darkmode = data.get("darkmode") 
@@ -356,6 +309,8 @@ def darkmode_profile(data, uid):
             "success": True, "message" : "Update notification successful"
         } 
        
+    except DatabaseUnavailable:
+        raise
     except pyodbc.Error as ex:
         sqlstate = ex.args[0]
         return {"success": False, "message": f"Database error: {sqlstate} - {ex.args[1]}"}
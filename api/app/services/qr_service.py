@@ -0,0 +1,51 @@
+import base64
+import io
+import threading
+from app.cache import TTLCache
+from app.config import get_settings
+
+# Rendered QR codes, keyed by (payload, format). The same provisioning URI
+# always renders to the same image, so entries never expire; the LRU bound
+# keeps memory flat.
+_qr_cache = None
+_qr_cache_lock = threading.Lock()
+
+FORMATS = ("png", "svg")
+
+def get_qr_cache():
+    global _qr_cache
+    if _qr_cache is None:
+        with _qr_cache_lock:
+            if _qr_cache is None:
+                _qr_cache = TTLCache(maxsize=get_settings().qr_cache_size)
+    return _qr_cache
+
+def qr_data_uri(data: str, fmt: str = "png") -> str:
+    """data: URI of a QR code for ``data``, as PNG or SVG."""
+    if fmt not in FORMATS:
+        raise ValueError(f"Unsupported QR format: {fmt}")
+
+    key = (data, fmt)
+    cache = get_qr_cache()
+    uri = cache.get(key)
+    if uri is None:
+        uri = _render_svg(data) if fmt == "svg" else _render_png(data)
+        cache.set(key, uri)
+    return uri
+
+# qrcode (and Pillow, for PNG) are imported on first render rather than at
+# startup.
+def _render_png(data):
+    import qrcode
+
+    buffered = io.BytesIO()
+    qrcode.make(data).save(buffered, format="PNG")
+    return "data:image/png;base64," + base64.b64encode(buffered.getvalue()).decode("utf-8")
+
+def _render_svg(data):
+    import qrcode
+    from qrcode.image.svg import SvgPathImage
+
+    buffered = io.BytesIO()
+    qrcode.make(data, image_factory=SvgPathImage).save(buffered)
+    return "data:image/svg+xml;base64," + base64.b64encode(buffered.getvalue()).decode("utf-8")
@@ -1,5 +1,68 @@
 import pyodbc 
-from app.models.db import get_db_connection_string
+from collections import Counter
+from decimal import Decimal
+from app.config import get_settings
+from app.models.db import get_db_connection_string, get_connection
+from app.models.resilience import DatabaseUnavailable
+from app.pricing import get_pricing
+from app.services.slot_service import ACTIVE_STATUSES, SlotFull, book_slot, check_time_slot, release_slot, slot_date
+
+def pickup_coordinates(data):
+    """(lat, lng) of the pickup address if the client geocoded it, else (None, None)."""
+    lat, lng = data.get("lat"), data.get("lng")
+    if lat is None and lng is None:
+        return None, None
+    try:
+        lat, lng = float(lat), float(lng)
+    except (TypeError, ValueError):
+        raise ValueError("lat and lng must both be numbers.")
+    if not (-90 <= lat <= 90 and -180 <= lng <= 180):
+        raise ValueError("lat/lng out of range.")
+    return lat, lng
+
+def quote_collection(cans_count):
+    try:
+        return {"success": True, "result": get_pricing().current().quote(cans_count)}
+    except DatabaseUnavailable:
+        raise
+    except pyodbc.Error as ex:
+        return {"success": False, "message": f"Database error: {ex.args[0]} - {ex.args[1]}"}
+    except ValueError as e:
+        return {"success": False, "message": str(e)}
+
+INSERT_COLLECTION = """
+    INSERT INTO Collections (UserID, collection_date, collection_time, pickup_address, pickup_lat, pickup_lng, number_items, weight, rates, amount, status, notes)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+def prepare_booking(data, prices):
+    """Validate and price one booking payload. Raises ValueError."""
+    date = data.get("date")
+    time_slot = data.get("timeSlot")
+    if not date or not time_slot:
+        raise ValueError("date and timeSlot are required.")
+    day = slot_date(date)
+    check_time_slot(time_slot)
+    lat, lng = pickup_coordinates(data)
+    price = prices.quote(data.get("cansCount"))
+    return {
+        "day": day,
+        "timeSlot": time_slot,
+        "address": data.get("address"),
+        "lat": lat,
+        "lng": lng,
+        "cansCount": price["cansCount"],
+        "notes": data.get("notes"),
+        "weight": price["weight"],
+        "rate_perkg": price["rate_perkg"],
+        "amount": price["amount"],
+    }
+
+def insert_params(userid, booking, status="scheduled"):
+    return (
+        userid, booking["day"].isoformat(), booking["timeSlot"], booking["address"], booking["lat"], booking["lng"],
+        booking["cansCount"], booking["weight"], booking["rate_perkg"], booking["amount"], status, booking["notes"],
+    )
 
 def schedule_collections(data, userid):
     conn_str = get_db_connection_string()
@@ -7,46 +70,53 @@ def schedule_collections(data, userid):
         return {"success": False, "message": "Database configuration error."}
 
     try:
-        cnxn = pyodbc.connect(conn_str)
-        cursor = cnxn.cursor()
- 
         id = int(data.get("id", 0))
         date = data.get("date")
-        time_slot = data.get("timeSlot")
-        address = data.get("address")
         cans_count = data.get("cansCount")
-        notes = data.get("notes")
-        weight = round(int(cans_count) / 60, 2)
         status = "scheduled"
 
-        cursor.execute("""
-            SELECT rate_perkg
-            FROM CanPricing
-            WHERE default_price = 1
-        """)
-        row = cursor.fetchone()
-        if not row:
-            return {"success": False, "message": "No default pricing found."}
+        booking = prepare_booking(data, get_pricing().current())
+        day, time_slot = booking["day"], booking["timeSlot"]
+        address, notes, lat, lng = booking["address"], booking["notes"], booking["lat"], booking["lng"]
+        weight, rate_perkg, total_price = booking["weight"], booking["rate_perkg"], booking["amount"]
 
-        rate_perkg = float(row[0])   # convert Decimal → float
-        total_price = round(weight * rate_perkg, 2) 
+        cnxn = get_connection(conn_str, user_id=userid)
+        cursor = cnxn.cursor()
 
         if id == 0: 
-            insert_query = """
-            INSERT INTO Collections (UserID, collection_date, collection_time, pickup_address, number_items, weight, rates, amount, status, notes)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """
-            cursor.execute(insert_query, (userid, date, time_slot, address, cans_count, weight, rate_perkg, total_price, status, notes))
+            book_slot(cursor, day, time_slot)
+            cursor.execute(INSERT_COLLECTION, insert_params(userid, booking, status))
             
         else: 
-    
+            cursor.execute("""
+                SELECT collection_date, collection_time, status
+                FROM Collections WITH (UPDLOCK)
+                WHERE ColID = ? AND UserID = ?
+            """, (id, userid))
+            current = cursor.fetchone()
+            if not current:
+                return {"success": False, "message": "Collection not found."}
+
+            # Move the booking only if the collection changes slot (or had
+            # been cancelled and is scheduled again).
+            old_slot = None
+            if current[2] in ACTIVE_STATUSES and current[0] is not None:
+                old_slot = (slot_date(current[0]), current[1])
+            if old_slot != (day, time_slot):
+                book_slot(cursor, day, time_slot)
+                if old_slot:
+                    release_slot(cursor, *old_slot)
+
             update_query = """
                 UPDATE Collections
                 SET UserID = ?, collection_date = ?, collection_time = ?, pickup_address = ?, 
+                    pickup_lat = ?, pickup_lng = ?,
                     number_items = ?, weight = ?, rates = ?, amount = ?, status = ?, notes = ?
-                WHERE ColID = ?
+                WHERE ColID = ? AND UserID = ?
             """
-            cursor.execute(update_query, (userid, date, time_slot, address, cans_count, weight, rate_perkg, total_price, status, notes, id))
+            # Coordinates always travel with the address they describe, so an
+            # edit without them clears any stale pair.
+            cursor.execute(update_query, (userid, day.isoformat(), time_slot, address, lat, lng, booking["cansCount"], weight, rate_perkg, total_price, status, notes, id, userid))
         
         cnxn.commit()
 
@@ -65,11 +135,97 @@ def schedule_collections(data, userid):
         }
        
 
+    except SlotFull as e:
+        return {"success": False, "message": str(e)}
+    except DatabaseUnavailable:
+        raise
     except pyodbc.Error as ex:
         sqlstate = ex.args[0]
         return {"success": False, "message": f"Database error: {sqlstate} - {ex.args[1]}"}
+    except ValueError as e:
+        return {"success": False, "message": str(e)}
+    except Exception as e:
+        return {"success": False, "message": f"An unexpected error occurred: {e}"}
+    finally:
+        if 'cnxn' in locals() and cnxn:
+            cnxn.close()
+
+
+def schedule_collections_bulk(items, userid):
+    """Book a batch of new collections in one transaction: all or none.
+
+    The whole batch is validated and priced (from one price list snapshot)
+    before anything is written; slot places are taken per (date, slot) and
+    the rows are inserted with a single executemany.
+    """
+    conn_str = get_db_connection_string()
+    if not conn_str:
+        return {"success": False, "message": "Database configuration error."}
+
+    limit = get_settings().max_bulk_collections
+    if not isinstance(items, list) or not items:
+        return {"success": False, "message": "collections must be a non-empty list."}
+    if len(items) > limit:
+        return {"success": False, "message": f"At most {limit} collections per request."}
+
+    try:
+        prices = get_pricing().current()
+        bookings, errors = [], []
+        for index, item in enumerate(items):
+            try:
+                if not isinstance(item, dict):
+                    raise ValueError("Each collection must be an object.")
+                if int(item.get("id") or 0):
+                    raise ValueError("Use /schedule to change an existing collection.")
+                bookings.append(prepare_booking(item, prices))
+            except ValueError as e:
+                errors.append({"index": index, "message": str(e)})
+        if errors:
+            return {"success": False, "message": "Some collections are invalid; none were scheduled.", "errors": errors}
+
+        cnxn = get_connection(conn_str, user_id=userid)
+        cursor = cnxn.cursor()
+
+        # Sorted so concurrent batches lock slot rows in the same order.
+        places = Counter((b["day"], b["timeSlot"]) for b in bookings)
+        for (day, time_slot), count in sorted(places.items()):
+            book_slot(cursor, day, time_slot, count)
+
+        cursor.fast_executemany = True
+        cursor.executemany(INSERT_COLLECTION, [insert_params(userid, b) for b in bookings])
+        cnxn.commit()
+
+        return {
+            "success": True,
+            "message": f"Scheduled {len(bookings)} collections successfully",
+            "data": {
+                "count": len(bookings),
+                "amount": float(sum(Decimal(str(b["amount"])) for b in bookings)),
+                "price_version": prices.version,
+                "firstDate": min(b["day"] for b in bookings).isoformat(),
+                "lastDate": max(b["day"] for b in bookings).isoformat(),
+                "collections": [
+                    {
+                        "date": b["day"].isoformat(),
+                        "timeSlot": b["timeSlot"],
+                        "address": b["address"],
+                        "cansCount": b["cansCount"],
+                        "notes": b["notes"],
+                        "amount": b["amount"],
+                    }
+                    for b in bookings
+                ],
+            },
+        }
+
+    except SlotFull as e:
+        return {"success": False, "message": str(e)}
+    except DatabaseUnavailable:
+        raise
+    except pyodbc.Error as ex:
+        return {"success": False, "message": f"Database error: {ex.args[0]} - {ex.args[1]}"}
     except Exception as e:
         return {"success": False, "message": f"An unexpected error occurred: {e}"}
     finally:
         if 'cnxn' in locals() and cnxn:
-            cnxn.close()
\ No newline at end of file
+            cnxn.close()
@@ -0,0 +1,121 @@
+import pyodbc
+from datetime import date, datetime, timedelta
+from app.config import get_settings
+from app.models.db import get_db_connection_string, get_connection
+from app.models.resilience import DatabaseUnavailable
+
+# CollectionSlot keeps one booked counter per (date, time slot), moved in the
+# same transaction as the Collections row that books or frees it. Checks and
+# availability are primary-key lookups; Collections is never scanned.
+#
+# Statuses that hold a place in their slot:
+ACTIVE_STATUSES = ("scheduled", "pending")
+
+
+class SlotFull(Exception):
+    pass
+
+
+def slot_date(value):
+    """Calendar date of a collection: a date, or an ISO date/timestamp string."""
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    try:
+        return date.fromisoformat(str(value)[:10])
+    except ValueError:
+        raise ValueError("date must be an ISO date, e.g. 2025-03-10.")
+
+def check_time_slot(time_slot):
+    if time_slot not in get_settings().time_slots:
+        raise ValueError(f"Invalid time slot {time_slot!r}.")
+
+def book_slot(cursor, day, time_slot, places=1):
+    """Take ``places`` places in a slot, or raise SlotFull. Runs in the caller's transaction."""
+    params = (places, day.isoformat(), time_slot, places, get_settings().slot_capacity)
+    cursor.execute("""
+        UPDATE CollectionSlot SET booked = booked + ?
+        WHERE slot_date = ? AND time_slot = ? AND booked + ? <= COALESCE(capacity, ?)
+    """, params)
+    if cursor.rowcount:
+        return
+
+    # Either the slot is full or nobody has booked it yet. Create the row if
+    # it is missing (the range lock makes concurrent first bookings queue
+    # here rather than both inserting) and try once more.
+    cursor.execute("""
+        INSERT INTO CollectionSlot (slot_date, time_slot, booked)
+        SELECT ?, ?, 0
+        WHERE NOT EXISTS (
+            SELECT 1 FROM CollectionSlot WITH (UPDLOCK, HOLDLOCK) WHERE slot_date = ? AND time_slot = ?
+        )
+    """, (day.isoformat(), time_slot, day.isoformat(), time_slot))
+    cursor.execute("""
+        UPDATE CollectionSlot SET booked = booked + ?
+        WHERE slot_date = ? AND time_slot = ? AND booked + ? <= COALESCE(capacity, ?)
+    """, params)
+    if cursor.rowcount:
+        return
+    if places == 1:
+        raise SlotFull(f"The {time_slot} slot on {day.isoformat()} is full.")
+    raise SlotFull(f"The {time_slot} slot on {day.isoformat()} has fewer than {places} places left.")
+
+def release_slot(cursor, day, time_slot):
+    cursor.execute("""
+        UPDATE CollectionSlot SET booked = booked - 1
+        WHERE slot_date = ? AND time_slot = ? AND booked > 0
+    """, (day.isoformat(), time_slot))
+
+def get_availability(date_from, date_to=None):
+    conn_str = get_db_connection_string()
+    if not conn_str:
+        return {"success": False, "message": "Database configuration error."}
+
+    settings = get_settings()
+    try:
+        first = date.fromisoformat(date_from or "")
+        last = date.fromisoformat(date_to) if date_to else first
+    except ValueError:
+        return {"success": False, "message": "from and to must be dates in YYYY-MM-DD format."}
+    days = (last - first).days + 1
+    if days < 1:
+        return {"success": False, "message": "to must not be before from."}
+    if days > settings.max_availability_days:
+        return {"success": False, "message": f"At most {settings.max_availability_days} days per request."}
+
+    try:
+        with get_connection(conn_str, read_only=True) as cnxn, cnxn.cursor() as cursor:
+            cursor.execute("""
+                SELECT slot_date, time_slot, capacity, booked
+                FROM CollectionSlot
+                WHERE slot_date >= ? AND slot_date <= ?
+            """, (first.isoformat(), last.isoformat()))
+            counters = {
+                (slot_date(row[0]), row[1]): (row[2], row[3])
+                for row in cursor.fetchall()
+            }
+
+        result = []
+        for offset in range(days):
+            day = first + timedelta(days=offset)
+            slots = []
+            for time_slot in settings.time_slots:
+                capacity, booked = counters.get((day, time_slot), (None, 0))
+                capacity = settings.slot_capacity if capacity is None else capacity
+                slots.append({
+                    "timeSlot": time_slot,
+                    "capacity": capacity,
+                    "booked": booked,
+                    "available": max(capacity - booked, 0),
+                })
+            result.append({"date": day.isoformat(), "slots": slots})
+
+        return {"success": True, "message": "Availability retrieved successfully.", "result": result}
+
+    except DatabaseUnavailable:
+        raise
+    except pyodbc.Error as ex:
+        return {"success": False, "message": f"Database error: {ex.args[0]} - {ex.args[1]}"}
+    except Exception as e:
+        return {"success": False, "message": f"An unexpected error occurred: {e}"}
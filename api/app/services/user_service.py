@@ -1,6 +1,12 @@
+import threading
+from concurrent.futures import Future
 import pyodbc
 from flask import jsonify, request
-from app.models.db import get_db_connection_string
+from app.cache import TTLCache
+from app.config import get_settings
+from app.models.db import get_db_connection_string, get_connection
+from app.models.records import fetchone_record
+from app.models.resilience import DatabaseUnavailable
 
 
 def get_all_users():
@@ -9,7 +15,7 @@ def get_all_users():
         return {"success": False, "message": "Database configuration error."}
 
     try:
-        cnxn = pyodbc.connect(conn_str)
+        cnxn = get_connection(conn_str)
         cursor = cnxn.cursor() 
 
         cursor.execute("SELECT UserID, Name, Email, CPF, Country FROM Users WHERE Deleted = 0")
@@ -31,6 +37,8 @@ def get_all_users():
             "users": user_list
         }
 
+    except DatabaseUnavailable:
+        raise
     except pyodbc.Error as ex:
         return {"success": False, "message": f"Database error: {ex}"}
     except Exception as e:
@@ -39,16 +47,97 @@ def get_all_users():
         if 'cnxn' in locals() and cnxn:
             cnxn.close()
 
-def get_user_id_by_firebase_uid(uid: str): 
+# firebase_uid -> UserID never changes for a live account, so lookups are
+# cached in-process. Concurrent misses for the same uid share one query.
+_user_ids = None
+_user_ids_lock = threading.Lock()
+_inflight = {}
+_inflight_lock = threading.Lock()
+_generation = 0
+
+def get_user_id_cache():
+    global _user_ids
+    if _user_ids is None:
+        with _user_ids_lock:
+            if _user_ids is None:
+                settings = get_settings()
+                _user_ids = TTLCache(maxsize=settings.user_id_cache_size, ttl=settings.user_id_cache_ttl)
+    return _user_ids
+
+def cached_user_id(uid: str):
+    return get_user_id_cache().get(uid)
+
+def remember_user_id(uid: str, user_id: int):
+    if uid and user_id:
+        get_user_id_cache().set(uid, user_id)
+
+def forget_user_id(uid: str):
+    """Drop a cached mapping; call whenever a user's firebase_uid changes or the user is deleted."""
+    global _generation
+    with _inflight_lock:
+        _generation += 1
+        get_user_id_cache().pop(uid)
+
+def get_user_id_by_firebase_uid(uid: str):
+    user_id = cached_user_id(uid)
+    if user_id is not None:
+        return user_id
+
+    with _inflight_lock:
+        future = _inflight.get(uid)
+        leader = future is None
+        if leader:
+            future = _inflight[uid] = Future()
+        generation = _generation
+
+    if not leader:
+        return future.result()
+
+    try:
+        user_id = _lookup_user_id(uid)
+    except BaseException as e:
+        with _inflight_lock:
+            _inflight.pop(uid, None)
+        future.set_exception(e)
+        raise
+
+    with _inflight_lock:
+        _inflight.pop(uid, None)
+        # Unknown uids are not cached: they may register a moment later.
+        if user_id is not None and generation == _generation:
+            get_user_id_cache().set(uid, user_id)
+    future.set_result(user_id)
+    return user_id
+
+def get_user_context(uid: str):
+    """The caller's Users row (identity, 2FA flags and preferences) in one query."""
     conn_str = get_db_connection_string()
-    with pyodbc.connect(conn_str) as cnxn, cnxn.cursor() as cursor:
+    with get_connection(conn_str) as cnxn, cnxn.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT UserID, firebase_uid, name, email, cpf, country, avatar, phone_number,
+                   language, notifications, darkmode, twofa_enabled, twofa_secret
+            FROM Users
+            WHERE firebase_uid = ?
+            """,
+            (uid,),
+        )
+        user = fetchone_record(cursor)
+
+    if user is not None:
+        remember_user_id(uid, user.UserID)
+    return user
+
+def _lookup_user_id(uid):
+    conn_str = get_db_connection_string()
+    with get_connection(conn_str) as cnxn, cnxn.cursor() as cursor:
         cursor.execute("SELECT UserID FROM Users WHERE firebase_uid = ?", (uid,))
         row = cursor.fetchone()
         return row[0] if row else None
     
 def get_user_fcm_token_by_user_id(userid: str): 
     conn_str = get_db_connection_string()
-    with pyodbc.connect(conn_str) as cnxn, cnxn.cursor() as cursor:
+    with get_connection(conn_str) as cnxn, cnxn.cursor() as cursor:
         cursor.execute("SELECT fcm_token FROM UserTokens WHERE UserID = ?", (userid,))
-        row = cursor.fetchall()
-        return row[0] if row else None
+        rows = cursor.fetchall()
+        return [row[0] for row in rows]
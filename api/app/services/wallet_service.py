@@ -1,5 +1,8 @@
 import pyodbc 
-from app.models.db import get_db_connection_string
+from app.models.db import get_db_connection_string, get_connection, get_stream_connection
+from app.models.resilience import DatabaseUnavailable
+from app.models.records import fetchone_record
+from app.streaming import stream_query
 
 def get_walletstatement(user_id: int) -> dict:
     conn_str = get_db_connection_string()
@@ -7,28 +10,23 @@ def get_walletstatement(user_id: int) -> dict:
         return {"success": False, "message": "Database configuration error."}
 
     try:
-        with pyodbc.connect(conn_str) as cnxn, cnxn.cursor() as cursor:
-            query = """
-                SELECT 
-                wt.TransactionID, 
-                wt.WalletID, 
-                tt.type_name, 
-                wt.reference_code, 
-                wt.amount, 
-                wt.tran_status, 
-                wt.transaction_date
-                FROM WalletTransaction wt
-                LEFT JOIN Wallet w ON w.WalletID = wt.WalletID
-                LEFT JOIN TransactionType tt ON tt.TransactionTypeID = wt.TransactionTypeID
-                WHERE w.UserID = ?
-                ORDER BY wt.transaction_date DESC
-            """
-            cursor.execute(query, (user_id, ))
-            rows = cursor.fetchall()
-
-            # Convert rows into list of dictionaries
-            columns = [col[0] for col in cursor.description]
-            result = [dict(zip(columns, row)) for row in rows] or None
+        query = """
+            SELECT 
+            wt.TransactionID, 
+            wt.WalletID, 
+            tt.type_name, 
+            wt.reference_code, 
+            wt.amount, 
+            wt.tran_status, 
+            wt.transaction_date
+            FROM WalletTransaction wt
+            LEFT JOIN Wallet w ON w.WalletID = wt.WalletID
+            LEFT JOIN TransactionType tt ON tt.TransactionTypeID = wt.TransactionTypeID
+            WHERE w.UserID = ?
+            ORDER BY wt.transaction_date DESC
+        """
+        # Statements grow without bound, so long ones are streamed.
+        result = stream_query(get_stream_connection(user_id), query, (user_id, )) or None
 
         return {
             "success": True,
@@ -36,6 +34,8 @@ def get_walletstatement(user_id: int) -> dict:
             "result": result,
         }
 
+    except DatabaseUnavailable:
+        raise
     except pyodbc.Error as ex:
         return {
             "success": False,
@@ -54,7 +54,7 @@ def get_wallethomedata(user_id: int) -> dict:
         return {"success": False, "message": "Database configuration error."}
 
     try:
-        with pyodbc.connect(conn_str) as cnxn, cnxn.cursor() as cursor:
+        with get_connection(conn_str, read_only=True, user_id=user_id) as cnxn, cnxn.cursor() as cursor:
             query = """
                 SELECT TOP 1
                     w.WalletID,
@@ -69,24 +69,23 @@ def get_wallethomedata(user_id: int) -> dict:
                 ORDER BY wt.transaction_date DESC
             """
             cursor.execute(query, (user_id, ))
-            rows = cursor.fetchone()
+            result = fetchone_record(cursor)
 
-            if not rows:
+            if not result:
                 return {
                     "success": True,
                     "message": "No wallet found for this user.",
                     "result": None,
                 }
 
-            columns = [col[0] for col in cursor.description]
-            result = dict(zip(columns, rows))
-
         return {
             "success": True,
             "message": "Wallet retrieved successfully." if result else "No records found.",
             "result": result,
         }
 
+    except DatabaseUnavailable:
+        raise
     except pyodbc.Error as ex:
         return {
             "success": False,
@@ -105,7 +104,7 @@ def get_walletaccountsummary(user_id: int) -> dict:
         return {"success": False, "message": "Database configuration error."}
 
     try:
-        with pyodbc.connect(conn_str) as cnxn, cnxn.cursor() as cursor:
+        with get_connection(conn_str, read_only=True, user_id=user_id) as cnxn, cnxn.cursor() as cursor:
             query = """
                 SELECT  
                 w.WalletID,  
@@ -116,24 +115,23 @@ def get_walletaccountsummary(user_id: int) -> dict:
                 WHERE w.UserID = ? 
             """
             cursor.execute(query, (user_id, ))
-            rows = cursor.fetchone()
+            result = fetchone_record(cursor)
 
-            if not rows:
+            if not result:
                 return {
                     "success": True,
                     "message": "No wallet found for this user.",
                     "result": None,
                 }
 
-            columns = [col[0] for col in cursor.description]
-            result = dict(zip(columns, rows))
-
         return {
             "success": True,
             "message": "Wallet retrieved successfully." if result else "No records found.",
             "result": result,
         }
 
+    except DatabaseUnavailable:
+        raise
     except pyodbc.Error as ex:
         return {
             "success": False,
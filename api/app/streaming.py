@@ -0,0 +1,95 @@
+import sys
+from flask import current_app, jsonify, stream_with_context
+from app.config import get_settings
+from app.models.records import row_mapper
+
+# Large result sets are read with fetchmany() and written out as they arrive,
+# so a response holds at most STREAM_BATCH_SIZE rows in memory however many
+# the query returns. Results that fit in the first batch are returned as a
+# plain list and go through jsonify() like any other response.
+
+
+class RowStream:
+    """Rows of an executed query still to be read, in fetchmany() batches.
+
+    Owns the connection and closes it once the rows are read (or the
+    response is closed without reading them).
+    """
+
+    def __init__(self, cnxn, cursor, mapper, first, batch_size):
+        self._cnxn = cnxn
+        self._cursor = cursor
+        self._mapper = mapper
+        self._first = first
+        self._batch_size = batch_size
+
+    def __bool__(self):
+        return True
+
+    def batches(self):
+        try:
+            rows, self._first = self._first, None
+            while rows:
+                yield [self._mapper(row) for row in rows]
+                rows = self._cursor.fetchmany(self._batch_size)
+        finally:
+            self.close()
+
+    def close(self):
+        cnxn, self._cnxn = self._cnxn, None
+        if cnxn is not None:
+            cnxn.close()
+
+
+def stream_query(cnxn, sql, params=(), batch_size=None):
+    """Run ``sql`` on ``cnxn``, which this takes ownership of.
+
+    Returns a list of records if they all fit in one batch (the connection is
+    already closed then), otherwise a RowStream for json_response().
+    """
+    batch_size = batch_size or get_settings().stream_batch_size
+    try:
+        cursor = cnxn.cursor()
+        cursor.execute(sql, params)
+        mapper = row_mapper(cursor.description)
+        rows = cursor.fetchmany(batch_size)
+    except BaseException:
+        cnxn.close()
+        raise
+
+    if len(rows) < batch_size:
+        cnxn.close()
+        return [mapper(row) for row in rows]
+    return RowStream(cnxn, cursor, mapper, rows, batch_size)
+
+
+def json_response(payload, status=200):
+    """jsonify(payload), status; a RowStream value is streamed as a JSON array."""
+    key = next((k for k, v in payload.items() if isinstance(v, RowStream)), None)
+    if key is None:
+        return jsonify(payload), status
+
+    rows = payload[key]
+    rest = {k: v for k, v in payload.items() if k != key}
+    dumps = current_app.json.dumps
+
+    def generate():
+        head = dumps(rest)[:-1]
+        yield head + (", " if rest else "") + dumps(key) + ": ["
+        sep = ""
+        try:
+            for batch in rows.batches():
+                yield sep + dumps(batch)[1:-1]
+                sep = ", "
+        except Exception as e:
+            # The status line is long gone; all we can do is cut the body
+            # short, which leaves the client with invalid JSON.
+            print(f"Streaming {key} failed: {e}", file=sys.stderr)
+            raise
+        yield "]}"
+
+    response = current_app.response_class(
+        stream_with_context(generate()), status=status, mimetype=current_app.json.mimetype,
+    )
+    response.call_on_close(rows.close)
+    return response
@@ -0,0 +1,80 @@
+"""Compare Flask's default JSON provider with FastJSONProvider on a wallet statement.
+
+Run from the api/ directory:
+
+    python -m benchmarks.bench_json_provider --rows 20000
+"""
+import argparse
+import datetime
+import gc
+import time
+from decimal import Decimal
+
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+
+from app import json_provider
+from app.json_provider import FastJSONProvider
+from app.models.records import row_mapper
+
+DESCRIPTION = [
+    ("TransactionID",), ("WalletID",), ("type_name",), ("reference_code",),
+    ("amount",), ("tran_status",), ("transaction_date",),
+]
+
+def make_statement(count):
+    mapper = row_mapper(DESCRIPTION)
+    now = datetime.datetime(2025, 1, 1, 12, 0, 0)
+    rows = [
+        mapper((i, 7, "Payment", f"REF{i:08d}", Decimal(i % 5000) / 100, "completed",
+                now - datetime.timedelta(minutes=i, microseconds=i % 3)))
+        for i in range(count)
+    ]
+    return {"success": True, "message": "Wallet statement methods retrieved successfully.", "result": rows}
+
+def render(provider_class, payload):
+    app = Flask(__name__)
+    app.json = provider_class(app)
+    with app.app_context():
+        return app.json.response(payload).get_data()
+
+def measure(provider_class, payload, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        body = render(provider_class, payload)
+        best = min(best, time.perf_counter() - start)
+    return best, body
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    payload = make_statement(args.rows)
+    cases = [("default", DefaultJSONProvider)]
+    if json_provider.orjson is not None:
+        cases.append(("orjson", FastJSONProvider))
+
+    results = {}
+    print(f"{'provider':<10} {'ms':>8} {'ns/row':>8} {'KiB':>8}")
+    for name, provider_class in cases + [("stdlib", None)]:
+        if provider_class is None:
+            # FastJSONProvider's fallback when orjson is not installed.
+            saved, json_provider.orjson = json_provider.orjson, None
+            try:
+                elapsed, body = measure(FastJSONProvider, payload, args.repeat)
+            finally:
+                json_provider.orjson = saved
+        else:
+            elapsed, body = measure(provider_class, payload, args.repeat)
+        results[name] = body
+        print(f"{name:<10} {elapsed * 1000:>8.1f} {elapsed / args.rows * 1e9:>8.0f} {len(body) / 1024:>8.0f}")
+
+    if "orjson" in results:
+        print("orjson and stdlib output identical:", results["orjson"] == results["stdlib"])
+
+if __name__ == "__main__":
+    main()
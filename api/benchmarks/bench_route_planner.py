@@ -0,0 +1,47 @@
+"""Time the route planner on a synthetic day of pickups.
+
+Run from the api/ directory:
+
+    python -m benchmarks.bench_route_planner --stops 20000 --vehicles 10
+"""
+import argparse
+import random
+import time
+
+from app.route_planner import plan_day
+
+SLOTS = ["08:00 - 10:00", "10:00 - 12:00", "13:00 - 15:00", "15:00 - 17:00", "17:00 - 19:00"]
+CENTER = (-23.55, -46.63)
+
+def make_rows(count, seed=1):
+    # Stops spread over a ~40 km wide city, around a few denser districts.
+    rng = random.Random(seed)
+    districts = [(CENTER[0] + rng.uniform(-0.15, 0.15), CENTER[1] + rng.uniform(-0.15, 0.15)) for _ in range(12)]
+    rows = []
+    for i in range(count):
+        lat, lng = rng.choice(districts)
+        rows.append((i + 1, rng.choice(SLOTS), lat + rng.gauss(0, 0.04), lng + rng.gauss(0, 0.04), round(rng.uniform(0.2, 3.0), 2)))
+    return rows
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--stops", type=int, default=20000)
+    parser.add_argument("--vehicles", type=int, default=10)
+    parser.add_argument("--capacity-kg", type=float, default=None)
+    parser.add_argument("--improve-seconds", type=float, default=0.5)
+    args = parser.parse_args()
+
+    rows = make_rows(args.stops)
+    start = time.perf_counter()
+    plan = plan_day(rows, args.vehicles, args.capacity_kg, CENTER, args.improve_seconds)
+    elapsed = time.perf_counter() - start
+
+    print(f"{'slot':<15} {'stops':>6} {'routes':>6} {'built km':>10} {'2-opt km':>10} {'s':>6}")
+    for slot in plan["slots"]:
+        built = sum(r["constructed_km"] for r in slot["routes"])
+        final = sum(r["distance_km"] for r in slot["routes"])
+        print(f"{slot['timeSlot']:<15} {slot['stops']:>6} {len(slot['routes']):>6} {built:>10.0f} {final:>10.0f} {slot['seconds']:>6.2f}")
+    print(f"total {args.stops} stops in {elapsed:.2f}s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""Compare dict(zip(columns, row)) against compiled slotted records.
+
+Run from the api/ directory:
+
+    python -m benchmarks.bench_row_mapper --rows 50000
+"""
+import argparse
+import datetime
+import gc
+import time
+import tracemalloc
+from decimal import Decimal
+
+from app.models.records import row_mapper
+
+DESCRIPTION = [
+    ("TransactionID",), ("WalletID",), ("type_name",), ("reference_code",),
+    ("amount",), ("tran_status",), ("transaction_date",),
+]
+
+def make_rows(count):
+    now = datetime.datetime(2025, 1, 1, 12, 0, 0)
+    return [
+        (i, 7, "Payment", f"REF{i:08d}", Decimal("12.50"), "completed", now + datetime.timedelta(minutes=i))
+        for i in range(count)
+    ]
+
+def as_dicts(description, rows):
+    columns = [col[0] for col in description]
+    return [dict(zip(columns, row)) for row in rows]
+
+def as_records(description, rows):
+    mapper = row_mapper(description)
+    return [mapper(row) for row in rows]
+
+def measure(fn, rows, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        fn(DESCRIPTION, rows)
+        best = min(best, time.perf_counter() - start)
+
+    gc.collect()
+    tracemalloc.start()
+    result = fn(DESCRIPTION, rows)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return best, peak
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=50000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rows = make_rows(args.rows)
+    row_mapper(DESCRIPTION)  # compile outside the timed region
+
+    print(f"{'mapper':<10} {'ns/row':>10} {'peak KiB':>12} {'bytes/row':>10}")
+    for name, fn in (("dict", as_dicts), ("record", as_records)):
+        elapsed, peak = measure(fn, rows, args.repeat)
+        print(f"{name:<10} {elapsed / args.rows * 1e9:>10.0f} {peak / 1024:>12.0f} {peak / args.rows:>10.0f}")
+
+if __name__ == "__main__":
+    main()
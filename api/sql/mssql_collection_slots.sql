@@ -0,0 +1,30 @@
+-- Per-slot booking counters used by /schedule, cancellation and
+-- /slots/availability (see app/services/slot_service.py). SQL Server
+-- counterpart of the CollectionSlot table in app/models/schema.py.
+--
+-- Apply before deploying the API version that uses it: the backfill below
+-- counts the bookings that already exist, and the API keeps the counters in
+-- step from then on. capacity NULL means the SLOT_CAPACITY setting; set it on
+-- a row to give that one slot a different capacity.
+
+IF OBJECT_ID('dbo.CollectionSlot', 'U') IS NULL
+CREATE TABLE dbo.CollectionSlot (
+    slot_date DATE NOT NULL,
+    time_slot VARCHAR(32) NOT NULL,
+    capacity INT NULL,
+    booked INT NOT NULL DEFAULT 0,
+    CONSTRAINT PK_CollectionSlot PRIMARY KEY (slot_date, time_slot)
+);
+GO
+
+MERGE dbo.CollectionSlot AS s
+USING (
+    SELECT CAST(collection_date AS DATE) AS slot_date, collection_time AS time_slot, COUNT(*) AS booked
+    FROM dbo.Collections
+    WHERE status IN ('scheduled', 'pending') AND collection_date IS NOT NULL AND collection_time IS NOT NULL
+    GROUP BY CAST(collection_date AS DATE), collection_time
+) AS c
+    ON s.slot_date = c.slot_date AND s.time_slot = c.time_slot
+WHEN MATCHED THEN UPDATE SET booked = c.booked
+WHEN NOT MATCHED THEN INSERT (slot_date, time_slot, booked) VALUES (c.slot_date, c.time_slot, c.booked);
+GO
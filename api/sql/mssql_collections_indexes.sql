@@ -0,0 +1,13 @@
+-- Indexes behind GET /collections (build_collections_query in
+-- app/services/collections_service.py). SQL Server counterpart of the
+-- IX_Collections_* indexes in app/models/schema.py. Safe to run more than once.
+
+-- Unfiltered pages: seek on the user, walk collection_date in either direction.
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IX_Collections_UserID_Date' AND object_id = OBJECT_ID('dbo.Collections'))
+CREATE INDEX IX_Collections_UserID_Date ON dbo.Collections (UserID, collection_date);
+GO
+
+-- ?status= filters: one seek per status, each already in collection_date order.
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IX_Collections_User_Status_Date' AND object_id = OBJECT_ID('dbo.Collections'))
+CREATE INDEX IX_Collections_User_Status_Date ON dbo.Collections (UserID, status, collection_date);
+GO
@@ -0,0 +1,64 @@
+-- Per-user change counters behind the ETags on read endpoints (see
+-- app/services/etag_service.py). SQL Server counterpart of the UserDataVersion
+-- table and triggers in app/models/schema.py. Until this is applied the API
+-- simply serves those endpoints without ETags.
+
+IF OBJECT_ID('dbo.UserDataVersion', 'U') IS NULL
+CREATE TABLE dbo.UserDataVersion (
+    UserID INT NOT NULL,
+    resource VARCHAR(32) NOT NULL,
+    version BIGINT NOT NULL DEFAULT 0,
+    CONSTRAINT PK_UserDataVersion PRIMARY KEY (UserID, resource)
+);
+GO
+
+CREATE OR ALTER TRIGGER dbo.TR_Collections_Version ON dbo.Collections
+AFTER INSERT, UPDATE, DELETE AS
+BEGIN
+    SET NOCOUNT ON;
+    MERGE dbo.UserDataVersion WITH (HOLDLOCK) AS v
+    USING (SELECT UserID FROM inserted UNION SELECT UserID FROM deleted) AS c
+        ON v.UserID = c.UserID AND v.resource = 'collections'
+    WHEN MATCHED THEN UPDATE SET version = v.version + 1
+    WHEN NOT MATCHED THEN INSERT (UserID, resource, version) VALUES (c.UserID, 'collections', 1);
+END;
+GO
+
+CREATE OR ALTER TRIGGER dbo.TR_Notifications_Version ON dbo.Notifications
+AFTER INSERT, UPDATE, DELETE AS
+BEGIN
+    SET NOCOUNT ON;
+    MERGE dbo.UserDataVersion WITH (HOLDLOCK) AS v
+    USING (SELECT UserID FROM inserted UNION SELECT UserID FROM deleted) AS c
+        ON v.UserID = c.UserID AND v.resource = 'notifications'
+    WHEN MATCHED THEN UPDATE SET version = v.version + 1
+    WHEN NOT MATCHED THEN INSERT (UserID, resource, version) VALUES (c.UserID, 'notifications', 1);
+END;
+GO
+
+CREATE OR ALTER TRIGGER dbo.TR_Wallet_Version ON dbo.Wallet
+AFTER INSERT, UPDATE, DELETE AS
+BEGIN
+    SET NOCOUNT ON;
+    MERGE dbo.UserDataVersion WITH (HOLDLOCK) AS v
+    USING (SELECT UserID FROM inserted UNION SELECT UserID FROM deleted) AS c
+        ON v.UserID = c.UserID AND v.resource = 'wallet'
+    WHEN MATCHED THEN UPDATE SET version = v.version + 1
+    WHEN NOT MATCHED THEN INSERT (UserID, resource, version) VALUES (c.UserID, 'wallet', 1);
+END;
+GO
+
+CREATE OR ALTER TRIGGER dbo.TR_WalletTransaction_Version ON dbo.WalletTransaction
+AFTER INSERT, UPDATE, DELETE AS
+BEGIN
+    SET NOCOUNT ON;
+    MERGE dbo.UserDataVersion WITH (HOLDLOCK) AS v
+    USING (
+        SELECT w.UserID FROM dbo.Wallet w
+        WHERE w.WalletID IN (SELECT WalletID FROM inserted UNION SELECT WalletID FROM deleted)
+    ) AS c
+        ON v.UserID = c.UserID AND v.resource = 'wallet'
+    WHEN MATCHED THEN UPDATE SET version = v.version + 1
+    WHEN NOT MATCHED THEN INSERT (UserID, resource, version) VALUES (c.UserID, 'wallet', 1);
+END;
+GO
@@ -0,0 +1,14 @@
+-- Pickup coordinates for the route planner (app/route_planner.py). SQL Server
+-- counterpart of the pickup_lat/pickup_lng columns in app/models/schema.py.
+-- Collections booked before this (or without coordinates) are reported by
+-- the planner as unlocated.
+
+IF COL_LENGTH('dbo.Collections', 'pickup_lat') IS NULL
+ALTER TABLE dbo.Collections ADD pickup_lat DECIMAL(9, 6) NULL, pickup_lng DECIMAL(9, 6) NULL;
+GO
+
+-- The planner reads one day of active collections across all users.
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IX_Collections_Date_Status' AND object_id = OBJECT_ID('dbo.Collections'))
+CREATE INDEX IX_Collections_Date_Status ON dbo.Collections (collection_date, status)
+    INCLUDE (collection_time, pickup_lat, pickup_lng, weight);
+GO
@@ -0,0 +1,8 @@
+-- Weight tiers for CanPricing (see app/pricing.py). SQL Server counterpart of
+-- the min_weight column in app/models/schema.py. The existing default price
+-- becomes the single tier starting at 0 kg.
+
+IF COL_LENGTH('dbo.CanPricing', 'min_weight') IS NULL
+ALTER TABLE dbo.CanPricing ADD min_weight DECIMAL(10, 2) NOT NULL
+    CONSTRAINT DF_CanPricing_min_weight DEFAULT 0;
+GO
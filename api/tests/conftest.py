@@ -0,0 +1,130 @@
+"""Shared fixtures.
+
+The app runs against the SQLite backend (one database file per test
+session) with Firebase stubbed out: a bearer token is accepted as the uid it
+names, and tokens starting with "forged:" fail verification.
+"""
+import os
+
+import pyodbc
+import pytest
+
+TEST_SETTINGS = {
+    "DB_BACKEND": "sqlite",
+    "DIAGNOSTICS_TOKEN": "diagnostics-secret",
+    "SMTP_USER": "mailer@example.com",
+    "SMTP_PASSWORD": "smtp-secret",
+    # Small uid/form_uid limits so tests can reach them; ip limits out of reach.
+    "RATE_LIMITS": "auth.login=ip:1000/minute,uid:3/minute;auth.register=ip:1000/minute,form_uid:2/hour",
+}
+
+USERS = ("u1", "u2", "victim", "limited", "idem", "idem2", "commit", "lister", "pager", "etag", "streamer", "slotter", "bulk")
+
+
+def _verify_id_token(token, *args, **kwargs):
+    if token.startswith("forged:"):
+        raise ValueError("Invalid token signature.")
+    return {"uid": token, "exp": 9999999999}
+
+
+@pytest.fixture(scope="session")
+def app(tmp_path_factory):
+    tmp = tmp_path_factory.mktemp("api")
+    with pytest.MonkeyPatch.context() as mp:
+        for name, value in TEST_SETTINGS.items():
+            mp.setenv(name, value)
+        mp.setenv("SQLITE_PATH", str(tmp / "test.db"))
+        mp.setenv("ENV_FILE", str(tmp / ".env"))
+        # Only checked for existence; init_firebase is stubbed below.
+        (tmp / "firebase.json").write_text("{}")
+        mp.setenv("FIREBASE_CREDENTIALS", str(tmp / "firebase.json"))
+
+        import firebase_admin.auth
+        import firebase_admin.messaging
+        import app as app_package
+        mp.setattr(firebase_admin.auth, "verify_id_token", _verify_id_token)
+        mp.setattr(firebase_admin.messaging, "send", lambda message: "test-message-id")
+        mp.setattr(app_package, "init_firebase", lambda: None)
+
+        flask_app = app_package.create_app()
+        flask_app.config.update(TESTING=True, PROPAGATE_EXCEPTIONS=False)
+
+        from app.models.db import get_connection
+        with get_connection() as cnxn, cnxn.cursor() as cursor:
+            for uid in USERS:
+                cursor.execute(
+                    "INSERT INTO Users (firebase_uid, name, email) VALUES (?, ?, ?)",
+                    (uid, uid.title(), f"{uid}@example.com"),
+                )
+        yield flask_app
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def user_id(app):
+    from app.services.user_service import get_user_id_by_firebase_uid
+
+    def lookup(uid):
+        with app.app_context():
+            return get_user_id_by_firebase_uid(uid)
+    return lookup
+
+
+@pytest.fixture
+def query(app):
+    from app.models.db import get_connection
+
+    def run(sql, params=()):
+        with app.app_context(), get_connection() as cnxn, cnxn.cursor() as cursor:
+            cursor.execute(sql, params)
+            return [tuple(row) for row in cursor.fetchall()]
+    return run
+
+
+@pytest.fixture
+def add_collection(app, user_id):
+    """Insert a collection for a uid directly, bypassing slots and pricing; returns its ColID."""
+    from app.models.db import get_connection
+
+    def insert(uid, collection_date="2030-01-07", status="Pending", **columns):
+        row = {"UserID": user_id(uid), "collection_date": collection_date, "collection_time": "09:00",
+               "pickup_address": "1 Test Street", "number_items": 1, "weight": 2.0, "status": status, **columns}
+        sql = f"INSERT INTO Collections ({', '.join(row)}) VALUES ({', '.join('?' * len(row))})"
+        with app.app_context(), get_connection() as cnxn, cnxn.cursor() as cursor:
+            cursor.execute(sql, tuple(row.values()))
+            cursor.execute("SELECT MAX(ColID) FROM Collections")
+            return cursor.fetchone()[0]
+    return insert
+
+
+@pytest.fixture
+def pushes(monkeypatch):
+    """Bodies of the push notifications sent, instead of sending them."""
+    import app.routes.schedule_routes as schedule_routes
+
+    sent = []
+    monkeypatch.setattr(schedule_routes, "push_all", lambda tokens, title, body: sent.append(body))
+    return sent
+
+
+def auth(uid, **headers):
+    return {"Authorization": f"Bearer {uid}", **headers}
+
+
+def fail_commit_once(monkeypatch):
+    """Make the next commit on a pooled connection fail like a deadlock victim."""
+    from app.models import db
+
+    original = db.PooledConnection.commit
+    calls = []
+
+    def commit(self):
+        if not calls:
+            calls.append(self)
+            raise pyodbc.Error("40001", "Transaction was deadlocked.")
+        return original(self)
+    monkeypatch.setattr(db.PooledConnection, "commit", commit)
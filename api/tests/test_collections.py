@@ -0,0 +1,120 @@
+import pytest
+
+from conftest import auth
+
+
+@pytest.fixture(scope="module")
+def listed(app):
+    """lister's collections: {name: ColID}."""
+    from app.models.db import get_connection
+    from app.services.user_service import get_user_id_by_firebase_uid
+
+    rows = {
+        "jan-pending": ("2030-01-05", "Pending"),
+        "jan-done": ("2030-01-20", "Completed"),
+        "feb-pending": ("2030-02-03 15:30:00", "Pending"),
+        "feb-cancelled": ("2030-02-10", "Cancelled"),
+    }
+    ids = {}
+    with app.app_context(), get_connection() as cnxn, cnxn.cursor() as cursor:
+        owner = get_user_id_by_firebase_uid("lister")
+        for name, (day, status) in rows.items():
+            cursor.execute(
+                "INSERT INTO Collections (UserID, collection_date, collection_time, pickup_address, status) "
+                "VALUES (?, ?, '09:00', ?, ?)",
+                (owner, day, name, status),
+            )
+            cursor.execute("SELECT MAX(ColID) FROM Collections")
+            ids[name] = cursor.fetchone()[0]
+    return ids
+
+
+def _list(client, query=""):
+    response = client.get(f"/api/collections{query}", headers=auth("lister"))
+    return response.status_code, response.json
+
+
+def _names(body):
+    return [row["pickup_address"] for row in body["collections"]]
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("", ["feb-cancelled", "feb-pending", "jan-done", "jan-pending"]),
+    ("?status=Pending", ["feb-pending", "jan-pending"]),
+    ("?status=Pending,Completed", ["feb-pending", "jan-done", "jan-pending"]),
+    ("?status=Pending&status=Cancelled", ["feb-cancelled", "feb-pending", "jan-pending"]),
+    ("?from=2030-01-20", ["feb-cancelled", "feb-pending", "jan-done"]),
+    # "to" covers the whole day, including times on it.
+    ("?to=2030-02-03", ["feb-pending", "jan-done", "jan-pending"]),
+    ("?from=2030-01-06&to=2030-02-09&status=Pending", ["feb-pending"]),
+    ("?status=Unknown", []),
+])
+def test_filters(client, listed, query, expected):
+    status, body = _list(client, query)
+    assert status == 200
+    assert _names(body) == expected
+
+
+@pytest.mark.parametrize("query, message", [
+    ("?from=05/01/2030", "from must be a date in YYYY-MM-DD format."),
+    ("?to=tomorrow", "to must be a date in YYYY-MM-DD format."),
+    ("?status=" + ",".join(f"s{i}" for i in range(11)), "At most 10 status filters are allowed."),
+])
+def test_bad_filters(client, listed, query, message):
+    status, body = _list(client, query)
+    assert status == 400
+    assert body["message"] == message
+
+
+@pytest.fixture(scope="module")
+def paged(app):
+    """pager's collections, including a tie on date and a NULL date."""
+    from app.models.db import get_connection
+    from app.services.user_service import get_user_id_by_firebase_uid
+
+    with app.app_context(), get_connection() as cnxn, cnxn.cursor() as cursor:
+        owner = get_user_id_by_firebase_uid("pager")
+        for name, day in [("tie-a", "2030-03-01"), ("undated", None), ("second", "2030-03-02"),
+                          ("tie-b", "2030-03-01"), ("third", "2030-03-03")]:
+            cursor.execute(
+                "INSERT INTO Collections (UserID, collection_date, pickup_address, status) VALUES (?, ?, ?, 'Pending')",
+                (owner, day, name),
+            )
+
+
+def _pages(client, sort, limit):
+    names, cursor, requests = [], None, 0
+    while True:
+        query = f"?sort={sort}&limit={limit}" + (f"&cursor={cursor}" if cursor else "")
+        response = client.get(f"/api/collections{query}", headers=auth("pager"))
+        assert response.status_code == 200
+        requests += 1
+        names += _names(response.json)
+        cursor = response.json["next_cursor"]
+        if cursor is None:
+            return names, requests
+
+
+@pytest.mark.parametrize("sort, expected", [
+    ("desc", ["third", "second", "tie-b", "tie-a", "undated"]),
+    ("asc", ["undated", "tie-a", "tie-b", "second", "third"]),
+])
+@pytest.mark.parametrize("limit", [1, 2, 5])
+def test_cursor_pages_cover_every_row_once(client, paged, sort, expected, limit):
+    names, requests = _pages(client, sort, limit)
+    assert names == expected
+    assert requests == -(-len(expected) // limit)
+
+
+def test_cursor_is_tied_to_its_sort(client, paged):
+    first = client.get("/api/collections?sort=desc&limit=1", headers=auth("pager")).json
+    response = client.get(f"/api/collections?sort=asc&cursor={first['next_cursor']}", headers=auth("pager"))
+    assert response.status_code == 400
+    assert response.json["message"] == "Cursor belongs to a different sort order."
+
+
+@pytest.mark.parametrize("cursor", ["not-base64!", "WzEsMl0", "WyJkZXNjIiwiMjAzMC0wMS0wMSIsIjEyIl0"])
+def test_bad_cursors_are_rejected(client, paged, cursor):
+    response = client.get(f"/api/collections?cursor={cursor}", headers=auth("pager"))
+    assert response.status_code == 400
+    assert response.json["message"] == "Invalid cursor."
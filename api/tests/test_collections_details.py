@@ -0,0 +1,21 @@
+import pytest
+
+from conftest import auth
+
+
+@pytest.mark.parametrize("body", [[1, 2], "ids", 5, {"ids": "1,2"}])
+def test_batch_rejects_bad_bodies(client, body):
+    response = client.post("/api/collections_details/batch", json=body, headers=auth("u1"))
+    assert response.status_code == 400
+    assert response.json["message"] == "ids must be a list"
+
+
+def test_batch_marks_found_and_missing(client, add_collection):
+    mine = add_collection("u1")
+    theirs = add_collection("u2")
+    response = client.post("/api/collections_details/batch", json={"ids": [f"col{mine}", theirs]}, headers=auth("u1"))
+    assert response.status_code == 200
+    found, missing = response.json["collections"]
+    assert found["id"] == f"col{mine}" and found["found"] is True
+    assert found["pickup_address"] == "1 Test Street"
+    assert missing == {"id": f"col{theirs}", "found": False}
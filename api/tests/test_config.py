@@ -0,0 +1,20 @@
+import pytest
+
+from app.config import SettingsError, load_settings
+
+
+def test_smtp_credentials_come_from_env_file(app, tmp_path, monkeypatch):
+    monkeypatch.delenv("SMTP_USER")
+    monkeypatch.delenv("SMTP_PASSWORD")
+    env = tmp_path / ".env"
+    env.write_text("SMTP_USER=mailer@example.com\nSMTP_PASSWORD=from-dotenv\n")
+
+    settings = load_settings(str(env)).validate()
+    assert (settings.smtp_user, settings.smtp_password) == ("mailer@example.com", "from-dotenv")
+
+
+@pytest.mark.parametrize("missing", ["SMTP_USER", "SMTP_PASSWORD"])
+def test_missing_smtp_credentials_fail_validation(app, tmp_path, monkeypatch, missing):
+    monkeypatch.delenv(missing)
+    with pytest.raises(SettingsError, match="SMTP_USER and SMTP_PASSWORD must be set"):
+        load_settings(str(tmp_path / "missing.env")).validate()
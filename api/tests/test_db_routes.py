@@ -0,0 +1,16 @@
+def test_db_stats_needs_the_diagnostics_token(client):
+    assert client.get("/api/db-stats").status_code == 404
+    assert client.get("/api/db-stats", headers={"X-Diagnostics-Token": "wrong"}).status_code == 404
+
+    response = client.get("/api/db-stats", headers={"X-Diagnostics-Token": "diagnostics-secret"})
+    assert response.status_code == 200
+    assert "pool" in response.json and "routes" in response.json
+
+
+def test_db_check_hides_details(client):
+    response = client.get("/api/db-check")
+    assert response.status_code == 200
+    assert "pool" not in response.json and "replicas" not in response.json
+
+    response = client.get("/api/db-check", headers={"X-Diagnostics-Token": "diagnostics-secret"})
+    assert "pool" in response.json and "replicas" in response.json
@@ -0,0 +1,54 @@
+from conftest import auth
+
+
+def _get(client, path, etag=None, uid="etag"):
+    headers = auth(uid, **({"If-None-Match": etag} if etag else {}))
+    return client.get(path, headers=headers)
+
+
+def test_unchanged_resource_is_not_modified(client):
+    first = _get(client, "/api/collections")
+    assert first.status_code == 200
+    etag = first.headers["ETag"]
+
+    again = _get(client, "/api/collections", etag)
+    assert again.status_code == 304
+    assert again.get_data() == b""
+    assert again.headers["ETag"] == etag
+    assert again.headers["Cache-Control"] == "private, no-cache"
+    assert "Authorization" in again.headers["Vary"]
+
+
+def test_each_url_gets_its_own_tag(client):
+    first = _get(client, "/api/collections").headers["ETag"]
+    filtered = _get(client, "/api/collections?status=Pending").headers["ETag"]
+    assert first != filtered
+    assert _get(client, "/api/collections?status=Pending", first).status_code == 200
+
+
+def test_writes_invalidate_only_the_writers_resource(client, add_collection):
+    collections = _get(client, "/api/collections").headers["ETag"]
+    notifications = _get(client, "/api/notifications").headers["ETag"]
+
+    add_collection("u2")
+    assert _get(client, "/api/collections", collections).status_code == 304
+
+    add_collection("etag")
+    changed = _get(client, "/api/collections", collections)
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != collections
+    assert _get(client, "/api/notifications", notifications).status_code == 304
+
+
+def test_profile_tag_follows_the_users_row(client):
+    etag = _get(client, "/api/profile").headers["ETag"]
+    assert _get(client, "/api/profile", etag).status_code == 304
+
+    assert client.post("/api/profile/darkmode", json={"darkmode": 1}, headers=auth("etag")).status_code == 200
+    assert _get(client, "/api/profile", etag).status_code == 200
+
+
+def test_errors_are_not_tagged(client):
+    response = _get(client, "/api/collections?sort=sideways")
+    assert response.status_code == 400
+    assert "ETag" not in response.headers
@@ -0,0 +1,173 @@
+import threading
+import time
+
+import pytest
+
+import app.routes.schedule_routes as schedule_routes
+from app.services.idempotency_service import IdempotencyStore
+from conftest import auth, fail_commit_once
+
+SLOT = "10:00 - 12:00"
+
+
+def _booking(day, address):
+    return {"date": day, "timeSlot": SLOT, "cansCount": 60, "address": address}
+
+
+def _count(query, address):
+    return query("SELECT COUNT(*) FROM Collections WHERE pickup_address = ?", (address,))[0][0]
+
+
+def test_retry_replays_the_first_response(client, query, pushes):
+    headers = auth("idem", **{"Idempotency-Key": "replay-1"})
+    first = client.post("/api/schedule", json=_booking("2031-02-03", "replay"), headers=headers)
+    second = client.post("/api/schedule", json=_booking("2031-02-03", "replay"), headers=headers)
+
+    assert first.status_code == second.status_code == 200
+    assert "Idempotent-Replayed" not in first.headers
+    assert second.headers["Idempotent-Replayed"] == "true"
+    assert second.data == first.data
+    assert _count(query, "replay") == 1
+    assert len(pushes) == 1
+
+
+def test_requests_without_a_key_are_not_deduplicated(client, query, pushes):
+    for _ in range(2):
+        response = client.post("/api/schedule", json=_booking("2031-02-04", "no-key"), headers=auth("idem"))
+        assert response.status_code == 200
+    assert _count(query, "no-key") == 2
+
+
+def test_key_reused_with_a_different_body(client, pushes):
+    headers = auth("idem", **{"Idempotency-Key": "conflict-1"})
+    assert client.post("/api/schedule", json=_booking("2031-02-05", "a"), headers=headers).status_code == 200
+    assert client.post("/api/schedule", json=_booking("2031-02-05", "b"), headers=headers).status_code == 422
+
+
+def test_keys_are_per_user(client, query, pushes):
+    for uid in ("idem", "idem2"):
+        response = client.post(
+            "/api/schedule", json=_booking("2031-02-06", "per-user"),
+            headers=auth(uid, **{"Idempotency-Key": "shared-key"}),
+        )
+        assert "Idempotent-Replayed" not in response.headers
+    assert _count(query, "per-user") == 2
+
+
+def test_failed_request_is_not_kept(client, pushes):
+    headers = auth("idem", **{"Idempotency-Key": "invalid-1"})
+    bad = {"date": "2031-02-07", "timeSlot": "midnight", "cansCount": 1}
+    responses = [client.post("/api/schedule", json=bad, headers=headers) for _ in range(2)]
+    assert [r.status_code for r in responses] == [400, 400]
+    assert all("Idempotent-Replayed" not in r.headers for r in responses)
+
+
+def test_failed_commit_is_not_replayed(client, query, pushes, monkeypatch):
+    headers = auth("idem", **{"Idempotency-Key": "commit-fails-1"})
+    body = _booking("2031-02-10", "commit-fails")
+
+    fail_commit_once(monkeypatch)
+    assert client.post("/api/schedule", json=body, headers=headers).status_code == 500
+    assert _count(query, "commit-fails") == 0
+
+    retry = client.post("/api/schedule", json=body, headers=headers)
+    assert retry.status_code == 200
+    assert "Idempotent-Replayed" not in retry.headers
+    assert _count(query, "commit-fails") == 1
+    assert query("SELECT booked FROM CollectionSlot WHERE slot_date = '2031-02-10' AND time_slot = ?", (SLOT,)) == [(1,)]
+    assert len(pushes) == 1
+
+
+def test_concurrent_duplicates_wait_for_the_first(app, query, pushes, monkeypatch):
+    schedule = schedule_routes.schedule_collections
+    runs = []
+
+    def slow_schedule(data, user_id):
+        runs.append(user_id)
+        time.sleep(0.3)
+        return schedule(data, user_id)
+    monkeypatch.setattr(schedule_routes, "schedule_collections", slow_schedule)
+
+    headers = auth("idem", **{"Idempotency-Key": "concurrent-1"})
+    responses = []
+
+    def post():
+        responses.append(app.test_client().post("/api/schedule", json=_booking("2031-02-11", "concurrent"), headers=headers))
+    threads = [threading.Thread(target=post) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(runs) == 1
+    assert [r.status_code for r in responses] == [200] * 4
+    assert sum(r.headers.get("Idempotent-Replayed") == "true" for r in responses) == 3
+    assert len({r.data for r in responses}) == 1
+    assert _count(query, "concurrent") == 1
+
+
+def test_key_length_is_checked(client):
+    response = client.post("/api/schedule", json={}, headers=auth("idem", **{"Idempotency-Key": "x" * 256}))
+    assert response.status_code == 400
+
+
+def test_store_is_bounded():
+    store = IdempotencyStore(max_keys=2)
+    for key in ("a", "b", "c"):
+        entry, owner = store.begin(key, "fp")
+        assert owner
+        store.finish(key, entry, (200, "application/json", b"{}"))
+
+    assert store.stats()["size"] == 2
+    assert store.begin("a", "fp")[1]  # evicted, so runs again
+    assert not store.begin("c", "fp")[1]
+
+
+def test_store_keeps_in_flight_entries():
+    store = IdempotencyStore(max_keys=1)
+    running, _ = store.begin("a", "fp")
+    store.begin("b", "fp")
+    assert store.stats()["size"] == 2
+    assert store.begin("a", "fp") == (running, False)
+
+    store.finish("a", running, (200, "application/json", b"{}"))
+    store.begin("c", "fp")
+    assert store.stats()["size"] == 2  # "b" is still running
+    assert store.begin("a", "fp")[1]
+
+
+def test_store_expires_entries():
+    store = IdempotencyStore(ttl=0.0)
+    entry, _ = store.begin("a", "fp")
+    store.finish("a", entry, (200, "application/json", b"{}"))
+    assert store.begin("a", "fp")[1]
+
+
+def test_async_views_wait_for_the_first(app):
+    import asyncio
+    from flask import Flask, g, jsonify
+    from app.services.idempotency_service import idempotent
+
+    runs = []
+    async_app = Flask(__name__)
+    async_app.before_request(lambda: setattr(g, "user_id", 1))
+
+    @async_app.route("/write", methods=["POST"])
+    @idempotent
+    async def write():
+        runs.append(1)
+        await asyncio.sleep(0.3)
+        return jsonify({"success": True})
+
+    responses = []
+
+    def post():
+        responses.append(async_app.test_client().post("/write", headers={"Idempotency-Key": "async-1"}))
+    threads = [threading.Thread(target=post) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(runs) == 1
+    assert sorted(r.headers.get("Idempotent-Replayed", "") for r in responses) == ["", "true", "true"]
@@ -0,0 +1,60 @@
+import datetime
+from collections import namedtuple
+from decimal import Decimal
+
+import pytest
+from flask import Flask
+
+from app import json_provider
+from app.json_provider import FastJSONProvider
+
+Row = namedtuple("Row", "id amount")
+
+
+def _render(payload, use_orjson):
+    app = Flask(__name__)
+    app.json = FastJSONProvider(app)
+    saved = json_provider.orjson
+    if not use_orjson:
+        json_provider.orjson = None
+    try:
+        with app.app_context():
+            return app.json.response(payload).get_data()
+    finally:
+        json_provider.orjson = saved
+
+
+def test_stdlib_formats():
+    payload = {
+        "amount": Decimal("12.50"),
+        "when": datetime.datetime(2025, 1, 1, 12, 0),
+        "day": datetime.date(2025, 1, 1),
+        "row": Row(1, Decimal("2.5")),
+    }
+    assert _render(payload, use_orjson=False) == (
+        b'{"amount":"12.50","when":"Wed, 01 Jan 2025 12:00:00 GMT","day":"Wed, 01 Jan 2025 00:00:00 GMT",'
+        b'"row":[1,"2.5"]}\n'
+    )
+
+
+@pytest.mark.skipif(json_provider.orjson is None, reason="orjson not installed")
+def test_orjson_matches_stdlib():
+    payload = {
+        "rows": [Row(1, Decimal("0.10")), Row(2, None)],
+        "nested": Row(Row(1, 2), (3, 4)),
+        "when": datetime.datetime(2025, 1, 1, 12, 0, 0, 5),
+        "aware": datetime.datetime(2025, 1, 1, 14, 0, tzinfo=datetime.timezone(datetime.timedelta(hours=2))),
+        "day": datetime.date(2025, 1, 1),
+        "time": datetime.time(9, 30),
+    }
+    assert _render(payload, use_orjson=True) == _render(payload, use_orjson=False)
+
+
+def test_dates_match_flask_default():
+    from flask.json.provider import DefaultJSONProvider
+
+    payload = {"when": datetime.datetime(2025, 1, 1, 12, 0), "day": datetime.date(2025, 1, 1)}
+    app = Flask(__name__)
+    expected = DefaultJSONProvider(app).loads(DefaultJSONProvider(app).dumps(payload))
+    for use_orjson in (False, True):
+        assert FastJSONProvider(app).loads(_render(payload, use_orjson)) == expected
@@ -0,0 +1,75 @@
+import sqlite3
+import threading
+
+import pytest
+
+from app.models.db import ConnectionPool, PoolTimeoutError
+
+
+def _pool(tmp_path, **kwargs):
+    path = str(tmp_path / "pool.db")
+    return ConnectionPool(path, connect=lambda dsn: sqlite3.connect(dsn, check_same_thread=False), **kwargs)
+
+
+def test_connections_are_reused(tmp_path):
+    pool = _pool(tmp_path)
+    first = pool.acquire()
+    raw = first._raw
+    first.close()
+
+    second = pool.acquire()
+    assert second._raw is raw
+    second.close()
+    stats = pool.stats()
+    assert (stats["created"], stats["reused"], stats["idle"]) == (1, 1, 1)
+
+
+def test_borrowers_wait_then_time_out(tmp_path):
+    pool = _pool(tmp_path, max_size=1, timeout=0.2)
+    held = pool.acquire()
+    with pytest.raises(PoolTimeoutError):
+        pool.acquire()
+
+    threading.Timer(0.05, held.close).start()
+    pool.timeout = 2.0
+    pool.acquire().close()
+    assert pool.stats()["timeouts"] == 1
+
+
+def test_release_rolls_back_uncommitted_work(tmp_path):
+    pool = _pool(tmp_path)
+    with pool.acquire() as cnxn:
+        cnxn.execute("CREATE TABLE t (x INTEGER)")
+
+    cnxn = pool.acquire()
+    cnxn.execute("INSERT INTO t VALUES (1)")
+    cnxn.close()
+
+    with pool.acquire() as cnxn:
+        assert cnxn.execute("SELECT COUNT(*) FROM t").fetchone()[0] == 0
+
+
+def test_old_connections_are_recycled(tmp_path):
+    pool = _pool(tmp_path, max_lifetime=0.0)
+    first = pool.acquire()
+    raw = first._raw
+    first.close()
+
+    second = pool.acquire()
+    assert second._raw is not raw
+    second.close()
+    assert pool.stats()["recycled"] >= 1
+
+
+def test_dead_idle_connections_are_replaced(tmp_path):
+    pool = _pool(tmp_path, ping_after=0.0)
+    first = pool.acquire()
+    raw = first._raw
+    first.close()
+    raw.close()  # dies while idle
+
+    second = pool.acquire()
+    assert second._raw is not raw
+    assert second.execute("SELECT 1").fetchone()[0] == 1
+    second.close()
+    assert pool.stats()["broken"] == 1
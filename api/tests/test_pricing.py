@@ -0,0 +1,90 @@
+from decimal import Decimal
+
+import pytest
+
+from app import pricing
+from app.pricing import NoPricing, PriceList, PricingEngine, load_price_list, reprice_collections
+from conftest import auth
+
+TIERED = PriceList([(0, "5.00"), (2, "4.00"), (10, "3.50")])
+
+
+@pytest.mark.parametrize("weight, rate", [
+    ("0", "5.00"), ("1.99", "5.00"), ("2", "4.00"), ("9.99", "4.00"), ("10", "3.50"), ("250", "3.50"),
+])
+def test_highest_tier_reached_sets_the_rate(weight, rate):
+    assert TIERED.rate_for(Decimal(weight)) == Decimal(rate)
+
+
+def test_quote_weighs_and_rounds():
+    assert TIERED.quote(150) == {
+        "cansCount": 150, "weight": 2.5, "rate_perkg": 4.0, "amount": 10.0, "price_version": TIERED.version,
+    }
+    assert TIERED.quote("7")["weight"] == 0.12
+    assert TIERED.quote("7")["amount"] == 0.6
+
+
+@pytest.mark.parametrize("cans, message", [("lots", "cansCount must be a whole number."), (-1, "cansCount cannot be negative.")])
+def test_quote_rejects_bad_counts(cans, message):
+    with pytest.raises(ValueError, match=message):
+        TIERED.quote(cans)
+
+
+def test_version_follows_content_not_order():
+    assert PriceList([(10, "3.50"), (0, "5.00"), (2, "4.00")]).version == TIERED.version
+    assert PriceList([(0, "5.00"), (2, "4.50"), (10, "3.50")]).version != TIERED.version
+    with pytest.raises(NoPricing):
+        PriceList([]).quote(60)
+
+
+def test_engine_serves_memory_until_refreshed(monkeypatch):
+    tiers = [(0, "5.00")]
+    loads = []
+    monkeypatch.setattr(pricing, "load_price_list", lambda: loads.append(1) or PriceList(tiers))
+
+    engine = PricingEngine(refresh_seconds=3600)
+    first = engine.current()
+    tiers.append((2, "4.00"))
+    assert engine.current() is first
+    assert len(loads) == 1
+
+    assert engine.refresh().version != first.version
+    assert engine.stats()["changes"] == 2
+
+
+def test_quote_endpoint(client):
+    response = client.get("/api/schedule/quote?cansCount=90", headers=auth("u1"))
+    assert response.status_code == 200
+    assert response.json["result"]["weight"] == 1.5
+    assert client.get("/api/schedule/quote", headers=auth("u1")).status_code == 400
+
+
+@pytest.fixture
+def repriced(app, add_collection, query):
+    """Scheduled collections of several weights; every collection is put back on the real price list after."""
+    ids = {weight: add_collection("u1", status="scheduled", weight=weight, rates=5.0, amount=weight * 5)
+           for weight in (1.0, 2.5, 12.0)}
+    ids["done"] = add_collection("u1", status="Completed", weight=12.0, rates=5.0, amount=60.0)
+    yield ids
+    with app.app_context():
+        reprice_collections(load_price_list())
+
+
+def test_single_tier_rate_is_a_parameter():
+    assert PriceList([(0, "5.00")]).rate_case() == ("?", [Decimal("5.00")])
+
+
+def test_reprice_updates_changed_rows_in_batches(app, query, repriced):
+    with app.app_context():
+        result = reprice_collections(TIERED, batch_size=2)
+        assert result["updated"] >= 2
+        assert result["batches"] >= 2
+        assert reprice_collections(TIERED, batch_size=2)["updated"] == 0
+
+    def price(col_id):
+        return query("SELECT rates, amount FROM Collections WHERE ColID = ?", (col_id,))[0]
+
+    assert price(repriced[1.0]) == (5.0, 5.0)
+    assert price(repriced[2.5]) == (4.0, 10.0)
+    assert price(repriced[12.0]) == (3.5, 42.0)
+    assert price(repriced["done"]) == (5.0, 60.0)
@@ -0,0 +1,23 @@
+import pytest
+
+from app.models import db
+from conftest import auth
+
+
+@pytest.fixture
+def writes(app, monkeypatch):
+    """User ids the replica router is told have written, in order."""
+    recorded = []
+    with app.app_context():
+        monkeypatch.setattr(db.get_router(), "record_write", recorded.append)
+    return recorded
+
+
+@pytest.mark.parametrize("path, body", [
+    ("/api/profile/darkmode", {"darkmode": 1}),
+    ("/api/profile/notifications", {"notif": 0}),
+])
+def test_profile_writes_stick_to_the_user_id(client, user_id, writes, path, body):
+    response = client.post(path, json=body, headers=auth("u1"))
+    assert response.status_code == 200
+    assert writes == [user_id("u1")]
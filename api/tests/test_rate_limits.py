@@ -0,0 +1,53 @@
+import pytest
+
+from app.config import SettingsError
+from app.ratelimit import effective_limits, parse_limits
+from conftest import auth
+
+
+def test_parse_limits():
+    assert parse_limits("ip:20/minute, form_uid:3/hour") == [("ip", 20, 60.0), ("form_uid", 3, 3600.0)]
+
+
+@pytest.mark.parametrize("spec", ["ip:20", "host:1/minute", "ip:0/minute", "ip:x/minute"])
+def test_parse_limits_rejects_bad_specs(spec):
+    with pytest.raises(SettingsError):
+        parse_limits(spec)
+
+
+def test_registration_is_not_limited_by_uid_scope():
+    assert all(scope != "uid" for scope, _, _ in effective_limits()["auth.register"])
+
+
+def test_verified_uid_is_limited(client):
+    statuses = [client.post("/api/login", headers=auth("limited")).status_code for _ in range(4)]
+    assert statuses[:3] == [200, 200, 200]
+    assert statuses[3] == 429
+
+    response = client.post("/api/login", headers=auth("limited"))
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) >= 1
+
+
+def test_forged_body_uid_cannot_lock_out_a_user(client):
+    for i in range(10):
+        response = client.post(
+            "/api/login",
+            json={"firebase_uid": "victim"},
+            headers=auth(f"forged:{i}"),
+            environ_base={"REMOTE_ADDR": f"10.0.0.{i}"},
+        )
+        assert response.status_code == 401
+
+    assert client.post("/api/login", headers=auth("victim")).status_code == 200
+
+
+def test_registration_form_uid_has_its_own_bucket(client):
+    def register(i):
+        return client.post("/api/register", data={"firebase_uid": "u2", "email": f"reg{i}@example.com"})
+
+    assert [register(i).status_code != 429 for i in range(2)] == [True, True]
+    assert register(2).status_code == 429
+
+    # The real u2 still logs in: registration attempts don't touch its uid bucket.
+    assert client.post("/api/login", headers=auth("u2")).status_code == 200
@@ -0,0 +1,20 @@
+from app.services.user_service import cached_user_id
+from conftest import fail_commit_once
+
+
+def _register(client, uid):
+    return client.post("/api/register", data={"firebase_uid": uid, "name": "New", "email": f"{uid}@example.com"})
+
+
+def test_registration_caches_the_user_id(app, client, user_id):
+    assert _register(client, "registered").status_code == 200
+    with app.app_context():
+        assert cached_user_id("registered") == user_id("registered")
+
+
+def test_failed_commit_caches_nothing(app, client, query, monkeypatch):
+    fail_commit_once(monkeypatch)
+    assert _register(client, "rolled-back").status_code == 500
+    assert query("SELECT COUNT(*) FROM Users WHERE firebase_uid = 'rolled-back'") == [(0,)]
+    with app.app_context():
+        assert cached_user_id("rolled-back") is None
@@ -0,0 +1,138 @@
+import sqlite3
+
+import pyodbc
+import pytest
+
+from app.models.db import ConnectionPool, _acquire
+from app.models.resilience import CircuitBreaker, DatabaseUnavailable
+
+DEADLOCK = ("40001", "Transaction was deadlocked.")
+LINK_DOWN = ("08S01", "Communication link failure.")
+
+
+class _FlakyCursor:
+    def __init__(self, raw, log):
+        self._raw = raw
+        self._log = log
+
+    def execute(self, sql, *params):
+        self._log["statements"].append(sql)
+        if self._log["errors"]:
+            raise pyodbc.Error(*self._log["errors"].pop(0))
+        return self._raw.execute(sql, *params)
+
+    def __getattr__(self, name):
+        return getattr(self._raw, name)
+
+
+class _FlakyConnection:
+    """sqlite3 connection whose statements fail with the queued SQLSTATEs."""
+
+    def __init__(self, raw, log):
+        self._raw = raw
+        self._log = log
+
+    def cursor(self):
+        return _FlakyCursor(self._raw.cursor(), self._log)
+
+    def __getattr__(self, name):
+        return getattr(self._raw, name)
+
+
+@pytest.fixture
+def flaky(app, tmp_path):
+    """(pool, log): queue SQLSTATEs in log["errors"]; log["statements"] records every statement run."""
+    log = {"errors": [], "statements": []}
+    path = str(tmp_path / "flaky.db")
+    pool = ConnectionPool(
+        path,
+        connect=lambda dsn: _FlakyConnection(sqlite3.connect(dsn, check_same_thread=False), log),
+        breaker=CircuitBreaker(failure_threshold=3, reset_timeout=0.0),
+    )
+    yield pool, log
+    pool.close()
+
+
+def _run(pool, read_only=False):
+    cnxn = _acquire(pool)
+    cnxn.read_only = read_only
+    try:
+        cnxn.cursor().execute("SELECT 1")
+    finally:
+        cnxn.close()
+
+
+@pytest.mark.parametrize("error", [DEADLOCK, LINK_DOWN])
+def test_failed_writes_are_unavailable(flaky, error):
+    pool, log = flaky
+    log["errors"].append(error)
+    with pytest.raises(DatabaseUnavailable):
+        _run(pool)
+    assert pool.breaker.stats()["consecutive_failures"] == 1
+    assert log["statements"] == ["SELECT 1"]  # writes are never retried
+
+
+def test_reads_retry_then_are_unavailable(flaky):
+    pool, log = flaky
+    log["errors"].extend([LINK_DOWN] * 3)
+    with pytest.raises(DatabaseUnavailable):
+        _run(pool, read_only=True)
+    stats = pool.stats()
+    assert stats["breaker"]["failures"] == 3
+    assert stats["breaker"]["retries"] == 2
+    assert stats["broken"] >= 1
+
+
+def test_read_retry_success_closes_the_circuit(flaky):
+    pool, log = flaky
+    log["errors"].append(DEADLOCK)
+    _run(pool, read_only=True)
+    assert pool.breaker.stats()["consecutive_failures"] == 0
+
+
+def test_other_errors_are_raised_as_is(flaky):
+    pool, log = flaky
+    log["errors"].append(("42000", "Incorrect syntax."))
+    with pytest.raises(pyodbc.Error):
+        _run(pool)
+    assert pool.breaker.stats()["failures"] == 0
+
+
+def test_only_round_trips_record_success(flaky):
+    pool, log = flaky
+    _run(pool)
+    pool.breaker.record_failure()
+
+    # Reusing a recently used idle connection sends nothing to the server.
+    cnxn = _acquire(pool)
+    assert pool.breaker.stats()["consecutive_failures"] == 1
+    cnxn.cursor().execute("SELECT 2")
+    assert pool.breaker.stats()["consecutive_failures"] == 0
+    cnxn.close()
+
+
+def test_half_open_probe_is_pinged(flaky):
+    pool, log = flaky
+    _run(pool)
+    for _ in range(3):
+        pool.breaker.record_failure()
+    assert pool.breaker.state == "open"
+
+    # reset_timeout is 0, so the next borrower is the probe.
+    log["statements"].clear()
+    cnxn = _acquire(pool)
+    assert log["statements"] == ["SELECT 1"]
+    assert pool.breaker.state == "closed"
+    cnxn.close()
+
+
+def test_failed_probe_reopens_the_circuit(flaky):
+    pool, log = flaky
+    _run(pool)
+    for _ in range(3):
+        pool.breaker.record_failure()
+
+    log["errors"].extend([LINK_DOWN] * 2)  # the idle connection's ping, then the new one's
+    with pytest.raises(DatabaseUnavailable):
+        _acquire(pool)
+    assert pool.breaker.stats()["opened"] == 2
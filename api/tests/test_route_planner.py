@@ -0,0 +1,59 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from app.route_planner import haversine_matrix, plan_day, plan_slot, tour_length, two_opt
+
+DEPOT = (0.0, 0.0)
+
+
+def _ring(n, radius=0.05):
+    """(ColID, lat, lng, load) stops evenly spaced on a circle around the depot."""
+    angles = np.linspace(0, 2 * np.pi, n, endpoint=False)
+    return [(i + 1, radius * np.sin(a), radius * np.cos(a), 10.0) for i, a in enumerate(angles)]
+
+
+def test_haversine_one_degree_of_longitude_at_the_equator():
+    dist = haversine_matrix([0.0], [0.0], [0.0, 0.0], [0.0, 1.0])
+    assert dist[0, 0] == 0.0
+    assert dist[0, 1] == pytest.approx(111.19, abs=0.01)
+
+
+def test_two_opt_uncrosses_a_tour():
+    # The depot and three other corners of a square; 0-2-1-3-0 crosses itself.
+    lat = np.array([0.0, 0.0, 0.1, 0.1])
+    lng = np.array([0.0, 0.1, 0.1, 0.0])
+    dist = haversine_matrix(lat, lng, lat, lng)
+    crossed = np.array([0, 2, 1, 3, 0])
+    improved = two_opt(crossed.copy(), dist)
+    assert list(improved) in ([0, 1, 2, 3, 0], [0, 3, 2, 1, 0])
+    assert tour_length(improved, dist) < tour_length(crossed, dist)
+
+
+def test_every_stop_is_routed_once():
+    stops = _ring(40)
+    plan = plan_slot(stops, DEPOT, vehicles=3)
+    routed = [col_id for route in plan["routes"] for col_id in route["stops"]]
+    assert sorted(routed) == list(range(1, 41))
+    assert len(plan["routes"]) == plan["vehicles_needed"] == 3
+    assert all(route["distance_km"] <= route["constructed_km"] for route in plan["routes"])
+
+
+def test_capacity_adds_routes():
+    plan = plan_slot(_ring(12), DEPOT, vehicles=1, capacity=35.0)
+    assert plan["vehicles_needed"] == 4
+    assert all(route["load_kg"] <= 35.0 for route in plan["routes"])
+    assert not any(route["over_capacity"] for route in plan["routes"])
+
+
+def test_plan_day_groups_slots_and_reports_unlocated():
+    rows = [
+        (1, "08:00 - 10:00", 0.01, 0.0, 5.0),
+        (2, "08:00 - 10:00", 0.0, 0.01, 5.0),
+        (3, "10:00 - 12:00", -0.01, 0.0, None),
+        (4, "10:00 - 12:00", None, None, 5.0),
+    ]
+    plan = plan_day(rows, vehicles=1, depot=DEPOT)
+    assert plan["unlocated"] == [4]
+    assert [(slot["timeSlot"], slot["stops"]) for slot in plan["slots"]] == [("08:00 - 10:00", 2), ("10:00 - 12:00", 1)]
+    assert sorted(plan["slots"][0]["routes"][0]["stops"]) == [1, 2]
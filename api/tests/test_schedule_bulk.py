@@ -0,0 +1,67 @@
+import pytest
+
+from conftest import auth
+
+MORNING, AFTERNOON = "08:00 - 10:00", "13:00 - 15:00"
+
+
+def _item(day, time_slot=MORNING, cans=60, **fields):
+    return {"date": day, "timeSlot": time_slot, "cansCount": cans, "address": "1 Bulk Street", **fields}
+
+
+def _bulk(client, items):
+    return client.post("/api/schedule/bulk", json={"collections": items}, headers=auth("bulk"))
+
+
+def _count(query, day):
+    return query("SELECT COUNT(*) FROM Collections WHERE collection_date = ?", (day,))[0][0]
+
+
+def _booked(query, day, time_slot):
+    rows = query("SELECT booked FROM CollectionSlot WHERE slot_date = ? AND time_slot = ?", (day, time_slot))
+    return rows[0][0] if rows else 0
+
+
+def test_books_the_whole_batch(client, query, pushes):
+    items = [_item("2033-01-10"), _item("2033-01-10", cans=120), _item("2033-01-12", AFTERNOON)]
+    response = _bulk(client, items)
+    assert response.status_code == 200
+    data = response.json["data"]
+    assert (data["count"], data["amount"]) == (3, 20.0)
+    assert (data["firstDate"], data["lastDate"]) == ("2033-01-10", "2033-01-12")
+
+    assert (_count(query, "2033-01-10"), _count(query, "2033-01-12")) == (2, 1)
+    assert _booked(query, "2033-01-10", MORNING) == 2
+    assert _booked(query, "2033-01-12", AFTERNOON) == 1
+    assert pushes == ["3 collections have been scheduled from 10/01/2033 to 12/01/2033."]
+
+
+def test_invalid_items_book_nothing(client, query, pushes):
+    items = [_item("2033-02-01"), _item("2033-02-01", "03:00 - 04:00"), "nope", _item("2033-02-01", id=7)]
+    response = _bulk(client, items)
+    assert response.status_code == 400
+    assert [error["index"] for error in response.json["errors"]] == [1, 2, 3]
+    assert _count(query, "2033-02-01") == 0
+    assert pushes == []
+
+
+def test_a_full_slot_rolls_back_the_whole_batch(client, query, pushes):
+    query("INSERT INTO CollectionSlot (slot_date, time_slot, capacity, booked) VALUES ('2033-03-02', ?, 1, 0)", (MORNING,))
+    items = [_item("2033-03-01"), _item("2033-03-02"), _item("2033-03-02")]
+    response = _bulk(client, items)
+    assert response.status_code == 400
+    assert response.json["message"] == f"The {MORNING} slot on 2033-03-02 has fewer than 2 places left."
+    assert _count(query, "2033-03-01") + _count(query, "2033-03-02") == 0
+    assert _booked(query, "2033-03-01", MORNING) == 0
+    assert pushes == []
+
+
+@pytest.mark.parametrize("items, message", [
+    ([], "collections must be a non-empty list."),
+    ("2033-04-01", "collections must be a non-empty list."),
+    ([_item("2033-04-01")] * 101, "At most 100 collections per request."),
+])
+def test_rejects_bad_batches(client, items, message):
+    response = _bulk(client, items)
+    assert response.status_code == 400
+    assert response.json["message"] == message
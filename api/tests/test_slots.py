@@ -0,0 +1,75 @@
+import itertools
+from datetime import date, timedelta
+
+import pytest
+
+from conftest import auth
+
+SLOT = "13:00 - 15:00"
+_days = itertools.count()
+
+
+@pytest.fixture
+def small_slot(query):
+    """A slot with room for two collections, on a day of its own; returns the date."""
+    day = (date(2032, 5, 1) + timedelta(days=next(_days))).isoformat()
+    query("INSERT INTO CollectionSlot (slot_date, time_slot, capacity, booked) VALUES (?, ?, 2, 0)", (day, SLOT))
+    return day
+
+
+def _book(client, day, time_slot=SLOT, **fields):
+    body = {"date": day, "timeSlot": time_slot, "cansCount": 60, "address": "1 Slot Street", **fields}
+    return client.post("/api/schedule", json=body, headers=auth("slotter"))
+
+
+def _cancel(client, col_id):
+    return client.post("/api/collections_details/cancelled", json={"id": col_id, "reason": "test"}, headers=auth("slotter"))
+
+
+def _slot(client, day, time_slot=SLOT):
+    days = client.get(f"/api/slots/availability?from={day}", headers=auth("slotter")).json["result"]
+    return next(slot for slot in days[0]["slots"] if slot["timeSlot"] == time_slot)
+
+
+def _booked_ids(query, day):
+    rows = query("SELECT ColID FROM Collections WHERE collection_date = ? ORDER BY ColID", (day,))
+    return [row[0] for row in rows]
+
+
+def test_full_slot_refuses_bookings(client, small_slot, pushes):
+    assert [_book(client, small_slot).status_code for _ in range(2)] == [200, 200]
+    full = _book(client, small_slot)
+    assert full.status_code == 400
+    assert full.json["message"] == f"The {SLOT} slot on {small_slot} is full."
+    assert _slot(client, small_slot) == {"timeSlot": SLOT, "capacity": 2, "booked": 2, "available": 0}
+    assert len(pushes) == 2
+
+
+def test_cancelling_frees_the_place_once(client, query, small_slot, pushes):
+    for _ in range(2):
+        _book(client, small_slot)
+    first, _ = _booked_ids(query, small_slot)
+
+    assert _cancel(client, first).status_code == 200
+    assert _slot(client, small_slot)["available"] == 1
+    assert _cancel(client, first).status_code == 400
+    assert _slot(client, small_slot)["available"] == 1
+
+    assert _book(client, small_slot).status_code == 200
+    assert _book(client, small_slot).status_code == 400
+
+
+def test_rescheduling_moves_the_booking(client, query, small_slot, pushes):
+    _book(client, small_slot)
+    col_id, = _booked_ids(query, small_slot)
+
+    other = "15:00 - 17:00"
+    assert _book(client, small_slot, other, id=col_id).status_code == 200
+    assert _slot(client, small_slot)["booked"] == 0
+    assert _slot(client, small_slot, other)["booked"] == 1
+
+
+def test_unknown_slots_are_rejected(client, pushes):
+    response = _book(client, "2032-04-30", "03:00 - 04:00")
+    assert response.status_code == 400
+    assert response.json["message"] == "Invalid time slot '03:00 - 04:00'."
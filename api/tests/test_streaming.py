@@ -0,0 +1,73 @@
+import json
+
+import pytest
+
+from app.models.db import get_connection, get_pool
+from app.streaming import RowStream, json_response, stream_query
+from conftest import auth
+
+SQL = "SELECT NotificationID, title FROM Notifications WHERE UserID = ? ORDER BY NotificationID"
+
+
+@pytest.fixture(scope="module")
+def notified(app):
+    """streamer has 2.5 batches of notifications; returns how many."""
+    from app.services.user_service import get_user_id_by_firebase_uid
+    from app.config import get_settings
+
+    with app.app_context():
+        count = get_settings().stream_batch_size * 5 // 2
+        owner = get_user_id_by_firebase_uid("streamer")
+        with get_connection() as cnxn, cnxn.cursor() as cursor:
+            cursor.executemany(
+                "INSERT INTO Notifications (UserID, title, messages) VALUES (?, ?, 'm')",
+                [(owner, f"n{i}") for i in range(count)],
+            )
+    return count
+
+
+def _in_use(app):
+    with app.app_context():
+        return get_pool().stats()["in_use"]
+
+
+def test_small_results_are_plain_lists(app, user_id):
+    with app.app_context():
+        before = get_pool().stats()["in_use"]
+        rows = stream_query(get_connection(), SQL, (user_id("u1"),), batch_size=10)
+        assert isinstance(rows, list)
+        assert get_pool().stats()["in_use"] == before
+
+
+def test_large_results_stream_as_valid_json(app, user_id, notified):
+    with app.test_request_context():
+        rows = stream_query(get_connection(), SQL, (user_id("streamer"),), batch_size=100)
+        assert isinstance(rows, RowStream)
+        response = json_response({"success": True, "result": rows})
+        assert response.is_streamed
+        chunks = list(response.response)
+        response.close()
+
+    body = json.loads("".join(chunk.decode() if isinstance(chunk, bytes) else chunk for chunk in chunks))
+    assert body["success"] is True
+    assert [row["title"] for row in body["result"]] == [f"n{i}" for i in range(notified)]
+    assert len(chunks) > notified // 100
+
+
+def test_unread_stream_releases_its_connection(app, user_id, notified):
+    before = _in_use(app)
+    with app.test_request_context():
+        rows = stream_query(get_connection(), SQL, (user_id("streamer"),), batch_size=100)
+        assert _in_use(app) == before + 1
+        json_response({"result": rows}).close()
+    assert _in_use(app) == before
+
+
+def test_endpoint_streams_every_row(app, client, notified):
+    before = _in_use(app)
+    response = client.get("/api/notifications", headers=auth("streamer"))
+    assert response.status_code == 200
+    assert response.is_streamed
+    assert len(response.json["result"]) == notified
+    response.close()
+    assert _in_use(app) == before
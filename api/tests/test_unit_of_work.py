@@ -0,0 +1,92 @@
+import pyodbc
+import pytest
+from flask import g
+
+from app.models.db import UnitOfWork, after_commit, get_connection
+from conftest import fail_commit_once
+
+
+def _insert_in_unit(app, title, commit=True):
+    """INSERT in a fresh unit of work and finish it; returns the callbacks that ran."""
+    outcomes = []
+    with app.test_request_context():
+        unit = g._db_unit = UnitOfWork()
+        unit.after_commit(lambda: outcomes.append("commit"))
+        unit.after_rollback(lambda: outcomes.append("rollback"))
+        with get_connection(user_id=1) as cnxn, cnxn.cursor() as cursor:
+            cursor.execute(
+                "INSERT INTO Notifications (UserID, title, messages, type, isread) VALUES (1, ?, '', 'test', 0)",
+                (title,),
+            )
+        assert outcomes == []
+        try:
+            unit.finish(commit=commit)
+        finally:
+            outcomes.append("finished")
+    return outcomes
+
+
+def _titles(query, title):
+    return query("SELECT title FROM Notifications WHERE title = ?", (title,))
+
+
+def test_commit_runs_after_commit_callbacks(app, query):
+    assert _insert_in_unit(app, "uow-commit") == ["commit", "finished"]
+    assert _titles(query, "uow-commit") == [("uow-commit",)]
+
+
+def test_failed_commit_runs_rollback_callbacks(app, query, monkeypatch):
+    fail_commit_once(monkeypatch)
+    with pytest.raises(pyodbc.Error):
+        _insert_in_unit(app, "uow-failed")
+    assert _titles(query, "uow-failed") == []
+
+
+def test_error_response_rolls_back(app, query):
+    assert _insert_in_unit(app, "uow-error", commit=False) == ["rollback", "finished"]
+    assert _titles(query, "uow-error") == []
+
+
+def test_failed_statement_makes_unit_rollback_only(app):
+    outcomes = []
+    with app.test_request_context():
+        unit = g._db_unit = UnitOfWork()
+        unit.after_commit(lambda: outcomes.append("commit"))
+        unit.after_rollback(lambda: outcomes.append("rollback"))
+        with pytest.raises(Exception):
+            with get_connection() as cnxn, cnxn.cursor() as cursor:
+                cursor.execute("SELECT * FROM NoSuchTable")
+        unit.finish(commit=True)
+    assert outcomes == ["rollback"]
+
+
+def test_callbacks_run_once_without_a_connection(app):
+    outcomes = []
+    unit = UnitOfWork()
+    unit.after_commit(lambda: outcomes.append("commit"))
+    unit.finish(commit=True)
+    unit.finish(commit=False)
+    assert outcomes == ["commit"]
+
+
+def test_after_commit_outside_a_request_runs_now():
+    outcomes = []
+    after_commit(lambda: outcomes.append("now"))
+    assert outcomes == ["now"]
+
+
+def test_schedule_push_waits_for_commit(client, query, monkeypatch):
+    import app.routes.schedule_routes as schedule_routes
+    pushes = []
+    monkeypatch.setattr(schedule_routes, "push_all", lambda tokens, title, body: pushes.append(body))
+    body = {"date": "2031-01-06", "timeSlot": "08:00 - 10:00", "cansCount": 60, "address": "uow"}
+    headers = {"Authorization": "Bearer commit"}
+
+    fail_commit_once(monkeypatch)
+    assert client.post("/api/schedule", json=body, headers=headers).status_code == 500
+    assert pushes == []
+    assert query("SELECT COUNT(*) FROM Collections WHERE pickup_address = 'uow'") == [(0,)]
+
+    assert client.post("/api/schedule", json=body, headers=headers).status_code == 200
+    assert len(pushes) == 1
+    assert query("SELECT COUNT(*) FROM Collections WHERE pickup_address = 'uow'") == [(1,)]